@@ -5,11 +5,47 @@ This file contains the configuration for the database connection.
 config = {
     'host': 'localhost',
     'port': 3306,
-    'database': 'nea'
+    'database': 'nea',
+    # Most rows kept in each connection's identity map, None for no limit
+    'identity_map_size': None,
+    # Most query results kept in each connection's query cache, None for no limit
+    'query_cache_size': 256,
+    # SQLite database file, relative to the working directory
+    'path': './nea.db',
+    # Write ahead logging lets readers carry on while a transaction is being written
+    'journal_mode': 'WAL',
+    # NORMAL only syncs at checkpoints, which is safe with WAL
+    'synchronous': 'NORMAL',
+    # Page cache of each connection, negative sizes are in KiB
+    'cache_size': -64000,
+    # Bytes of the database file read through memory mapping
+    'mmap_size': 268435456,
+    # Milliseconds to wait for another connection's lock before giving up
+    'busy_timeout': 5000,
+    # Prepared statements cached by each connection
+    'cached_statements': 256,
+    # Most connections open at once
+    'pool_size': 4,
+    # Seconds to wait for a connection when every one is in use, None to wait forever
+    'pool_timeout': 30,
+    # Master seed of the simulation's random number streams, None to seed from the operating system
+    'seed': None
 }
 
 test_config = {
     'host': 'localhost',
     'port': 3306,
-    'database': 'nea_test'
-}
\ No newline at end of file
+    'database': 'nea_test',
+    'identity_map_size': None,
+    'query_cache_size': 256,
+    'path': './nea.db',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'busy_timeout': 5000,
+    'cached_statements': 256,
+    'pool_size': 4,
+    'pool_timeout': 30,
+    'seed': None
+}
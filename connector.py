@@ -1,9 +1,458 @@
 import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from queue import LifoQueue, Empty
+from typing import Iterator
 
+from config import config
 
-def connect() -> sqlite3.Connection:
-    # Connect to the db in the top level file
-    return sqlite3.connect("./nea.db")
 
+def adapt_datetime(value: datetime) -> str:
+    """
+    Store a datetime as 'YYYY-MM-DD HH:MM:SS[.ffffff]', the format CURRENT_TIMESTAMP uses, so they sort together
 
+    :param value: datetime The datetime to store
+    :return str: the stored value
+    """
+    return value.isoformat(' ')
 
+
+def convert_datetime(value: bytes) -> datetime | str:
+    """
+    Parse a DATETIME or TIMESTAMP column once, when the row is fetched
+
+    :param value: bytes The stored value
+    :return datetime | str: the datetime, or the stored text if it is not a datetime
+    """
+    text = value.decode()
+
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+sqlite3.register_adapter(datetime, adapt_datetime)
+for declared_type in ['DATETIME', 'TIMESTAMP']:
+    sqlite3.register_converter(declared_type, convert_datetime)
+
+
+class Session(sqlite3.Connection):
+    """
+    Connection to the database which also holds the state the models keep for each connection
+
+    Writes made inside `with session.transaction():` are committed together when the outermost transaction ends,
+    the commits the models make after each write are deferred until then. Rows changed inside a transaction are
+    saved once, when the transaction they were changed in ends
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        # The rows loaded through this connection, created by models.identity.identity_map
+        self.identity_map = None
+
+        # The results of queries read through this connection, created by models.cache.query_cache
+        self.query_cache = None
+
+        # The tables and columns of the database, created by models.schema.schema
+        self.schema = None
+
+        # The tables used through this connection, created by models.registry.table_registry
+        self.tables = None
+
+        # How many transactions are open, anything above 1 is a savepoint
+        self.depth = 0
+
+        # The rows changed in each open transaction, by id of the row, saved when the transaction ends
+        self.pending = []
+
+        # Gets the time rows written through this connection are stamped with, the simulation replaces it with its
+        # clock so rows record the simulated time
+        self.clock = datetime.now
+
+    @contextmanager
+    def transaction(self) -> Iterator['Session']:
+        """
+        Group writes into one unit of work, committed when the block ends and rolled back if it raises
+
+        Transactions can be nested, the inner ones are savepoints which roll back on their own without ending the
+        outer transaction
+
+        :return Iterator[Session]: the session
+        """
+        savepoint = f'savepoint_{self.depth}'
+
+        if self.depth == 0:
+            # Commit anything written before the transaction so it is not rolled back with it
+            super().commit()
+            self.execute('BEGIN')
+        else:
+            self.execute(f'SAVEPOINT {savepoint}')
+
+        self.depth += 1
+        self.pending.append({})
+
+        try:
+            yield self
+
+            # Save the rows changed in the transaction before it ends
+            for row in list(self.pending[-1].values()):
+                row.save()
+        except BaseException:
+            self.depth -= 1
+
+            # The changes were rolled back, so the rows are put back as they were before the transaction
+            for row in self.pending.pop().values():
+                row.discard_changes()
+
+            if self.depth == 0:
+                super().rollback()
+            else:
+                self.execute(f'ROLLBACK TO {savepoint}')
+                self.execute(f'RELEASE {savepoint}')
+
+            # The loaded rows and cached results may hold values which were rolled back
+            self.forget_loaded()
+
+            raise
+
+        self.depth -= 1
+        rows = self.pending.pop()
+
+        if self.depth == 0:
+            super().commit()
+
+            for row in rows.values():
+                row.mark_committed()
+        else:
+            self.execute(f'RELEASE {savepoint}')
+
+            # The rows are only committed with the outer transaction, which puts them back if it rolls back
+            self.pending[-1].update(rows)
+
+    def defer_save(self, row) -> bool:
+        """
+        Save a changed row when the current transaction ends, instead of straight away
+
+        :param row: RowBase The changed row
+        :return bool: True if the save was deferred, False if there is no transaction to defer it to
+        """
+        if self.depth == 0:
+            return False
+
+        self.pending[-1][id(row)] = row
+
+        return True
+
+    def flush(self, table_name: str = None) -> None:
+        """
+        Save the changed rows of the open transactions now rather than when they end, so queries read their new values
+
+        :param table_name: str Only save the rows of this table, None saves every changed row
+        """
+        for pending in self.pending:
+            for row in list(pending.values()):
+                if table_name is None or row.table_name == table_name:
+                    row.save()
+
+    def commit(self) -> None:
+        """
+        Commit the current transaction, unless it is part of a unit of work which commits when it ends
+        """
+        if self.depth == 0:
+            super().commit()
+
+    def rollback(self) -> None:
+        """
+        Roll back the current transaction, inside a unit of work this is left to the transaction when the error
+        reaches it
+        """
+        if self.depth == 0:
+            super().rollback()
+
+            self.forget_loaded()
+
+    def forget_loaded(self) -> None:
+        """
+        Forget the rows loaded, the query results cached and the schema read through this connection, e.g. after a
+        rollback
+        """
+        if self.identity_map is not None:
+            self.identity_map.clear()
+
+        if self.query_cache is not None:
+            self.query_cache.clear()
+
+        # Tables created or dropped in a rolled back transaction are gone again
+        if self.schema is not None:
+            self.schema.refresh()
+
+
+def transaction(db: sqlite3.Connection):
+    """
+    Get a unit of work for a connection, plain sqlite3 connections commit or roll back the block as a whole
+
+    :param db: Connection Connection to the database
+    :return: context manager for the transaction
+    """
+    if isinstance(db, Session):
+        return db.transaction()
+
+    return db
+
+
+def current_time(db: sqlite3.Connection) -> datetime:
+    """
+    Get the time to stamp rows written through a connection with
+
+    :param db: Connection Connection to the database
+    :return datetime: the time from the session's clock, plain sqlite3 connections use the current time
+    """
+    if isinstance(db, Session):
+        return db.clock()
+
+    return datetime.now()
+
+
+def open_connection(settings: dict = None) -> Session:
+    """
+    Open a new connection to the database, set up with the pragmas in the config
+
+    :param settings: dict The config to use, defaults to config.config
+    :return Session: the new connection
+    """
+    settings = settings or config
+
+    # Pooled connections are handed between threads, the pool makes sure only one thread uses each at a time
+    # Columns declared as DATETIME or TIMESTAMP are parsed by convert_datetime
+    db = sqlite3.connect(settings['path'], factory=Session, timeout=settings['busy_timeout'] / 1000,
+                         cached_statements=settings['cached_statements'], check_same_thread=False,
+                         detect_types=sqlite3.PARSE_DECLTYPES)
+
+    # Tune the connection, pragmas can not take parameters so the values are formatted in
+    db.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+    db.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    db.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    db.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    db.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+
+    return db
+
+
+class SharedConnection:
+    """
+    Holds a thread's shared connection in the pool's threading.local, when the thread ends its locals are dropped and
+    the connection is released back to the pool
+
+    Attributes
+    ----------
+    db : Session
+        The connection
+    finalizer : weakref.finalize
+        Releases the connection, when called or when the holder is garbage collected
+
+    :returns None
+    """
+
+    def __init__(self, pool: 'ConnectionPool', db: Session) -> None:
+        """
+        Initialise the SharedConnection class
+
+        :param pool: ConnectionPool The pool the connection is released to
+        :param db: Session The connection
+        """
+        self.db = db
+        self.finalizer = weakref.finalize(self, pool.release, db)
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of connections to the database
+
+    Attributes
+    ----------
+    size : int
+        Most connections open at once
+    settings : dict
+        The config the connections are opened with
+    idle : LifoQueue
+        Connections which are not in use, the most recently used is handed out first as its cache is warmest
+    opened : int
+        Number of connections opened so far
+    timeout : float | None
+        Seconds to wait for a connection if the pool is full, None to wait forever
+    local : threading.local
+        The connection each thread shares between its modules, released when the thread ends
+
+    :returns None
+    """
+
+    def __init__(self, size: int = None, settings: dict = None) -> None:
+        """
+        Initialise the ConnectionPool class
+
+        :param size: int Most connections open at once, defaults to the pool_size in the config
+        :param settings: dict The config to use, defaults to config.config
+        """
+        self.settings = settings or config
+        self.size = size or self.settings['pool_size']
+        self.timeout = self.settings['pool_timeout']
+
+        # Validate size
+        if self.size < 1:
+            raise ValueError(f'Pool size must be at least 1, not {self.size}')
+
+        self.idle = LifoQueue()
+        self.opened = 0
+        self.local = threading.local()
+        self.__lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> Session:
+        """
+        Take a connection out of the pool, opening one if there are none idle and the pool is not full
+
+        :param timeout: float Seconds to wait for a connection if the pool is full, defaults to the pool_timeout in
+                the config
+        :return Session: the connection
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        try:
+            return self.idle.get_nowait()
+        except Empty:
+            pass
+
+        with self.__lock:
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+
+        if can_open:
+            try:
+                return open_connection(self.settings)
+            except Exception:
+                with self.__lock:
+                    self.opened -= 1
+                raise
+
+        # Wait for another thread to release a connection
+        try:
+            return self.idle.get(timeout=timeout)
+        except Empty:
+            raise TimeoutError(f'No connection was released within {timeout} seconds') from None
+
+    def release(self, db: Session) -> None:
+        """
+        Put a connection back in the pool, rolling back anything it left uncommitted
+
+        The rows and query results it loaded are forgotten, other connections may change them before it is borrowed
+        again
+
+        :param db: Session The connection to release
+        """
+        if db.in_transaction:
+            db.rollback()
+
+        db.forget_loaded()
+
+        self.idle.put(db)
+
+    @contextmanager
+    def connection(self, timeout: float = None) -> Iterator[Session]:
+        """
+        Borrow a connection for the length of a with block
+
+        :param timeout: float Seconds to wait for a connection if the pool is full, defaults to the pool_timeout in
+                the config
+        :return Iterator[Session]: the connection
+        """
+        db = self.acquire(timeout)
+
+        try:
+            yield db
+        finally:
+            self.release(db)
+
+    def shared(self) -> Session:
+        """
+        Get the connection shared by every module in the current thread, so they see each other's transactions and
+        rows. The connection is released back to the pool when the thread ends
+
+        :return Session: the connection
+        """
+        if getattr(self.local, 'shared', None) is None:
+            self.local.shared = SharedConnection(self, self.acquire())
+
+        return self.local.shared.db
+
+    def release_shared(self) -> None:
+        """
+        Give the current thread's shared connection back to the pool before the thread ends
+        """
+        shared = getattr(self.local, 'shared', None)
+
+        if shared is not None:
+            self.local.shared = None
+            shared.finalizer()
+
+    def close(self) -> None:
+        """
+        Close every idle connection
+        """
+        while True:
+            try:
+                db = self.idle.get_nowait()
+            except Empty:
+                break
+
+            db.close()
+
+            with self.__lock:
+                self.opened -= 1
+
+
+# The pool every module shares, created by get_pool
+pool: ConnectionPool | None = None
+pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Get the pool of connections to the database, creating it the first time
+
+    :return ConnectionPool: the pool
+    """
+    global pool
+
+    with pool_lock:
+        if pool is None:
+            pool = ConnectionPool()
+
+    return pool
+
+
+def connect() -> Session:
+    """
+    Get the connection to the database shared by every module in the current thread
+
+    :return Session: the connection
+    """
+    return get_pool().shared()
+
+
+def use_database(path: str) -> None:
+    """
+    Point every connection this process opens at another database file, e.g. in a worker process with its own file
+
+    Modules keep the connection they get when they are imported, so this has to be called before the first connect
+
+    :param path: str The SQLite database file
+    """
+    # If a connection has already been opened, raise ValueError
+    if pool is not None and pool.opened:
+        raise ValueError(f'Connections to {config["path"]} are already open, {path} can not be used instead')
+
+    config['path'] = path
@@ -1,18 +1,32 @@
+# Percent chance of each event happening, see helper.event_happens
 EVENT_CHANCES = {
-    'order': 0.5,
-    'seat_change': 0.1,
-    'menu_change': 0.1,
-    'bill': 0.1,
-    'staff_illness': 0.05,
-    'staff_leave': 0.005,
-    'staff_hire': 0.005,
-    'staff_fire': 0.005,
-    'item_has_note': 0.1,
-    'booking_cancels': 0.03,
-    'booking_has_comment': 0.2,
-    'customer_wants_another_round': 0.4
+    'order': 50,
+    'seat_change': 10,
+    'menu_change': 10,
+    'bill': 10,
+    'staff_illness': 5,
+    'staff_leave': 0.5,
+    'staff_hire': 0.5,
+    'staff_fire': 0.5,
+    'item_has_note': 10,
+    'booking_cancels': 3,
+    'booking_has_comment': 20,
+    'customer_wants_another_round': 40
 }
 
+# Minutes after an event before a booking's next event in the simulation
+BOOKING_MINUTES = {
+    'order': 10,  # From being seated to ordering
+    'round': 45,  # From ordering to being checked on
+    'payment': 5,  # From asking for the bill to paying
+    'retry': 15,  # From not being seated to trying again
+}
+
+# The hours the bar opens, changes from lunch to dinner service and closes
+OPENING_HOUR = 12
+DINNER_HOUR = 15
+CLOSING_HOUR = 23
+
 ITEM_NOTES = ['No ice', 'no fruit', 'no glass', 'no straw']
 
 ACTION_TYPES = [
@@ -28,6 +42,12 @@ ACTION_TYPES = [
     'payment'
 ]
 
+SEAT_STATUSES = ['clear', 'reserved', 'okay', 'mains', 'desserts', 'bill', 'paid', 'check', 'empty']
+
+SEAT_TYPES = ['table', 'booth', 'bar', 'high-table']
+
+ITEM_DEPARTMENTS = ['drink', 'food', 'other']
+
 """
 Comments have probability
     1. Has dog: 20%
@@ -41,3 +61,9 @@ Comments have probability
 BOOKING_COMMENTS = ['Has dog', 'Gluten free', 'Vegetarian', 'Vegan', 'Birthday', 'Anniversary']
 BOOKING_WEIGHTS = [2, 1, 1, 2, 2, 2]
 
+
+# Number of rows fetched with each query when iterating over a table
+ROW_PAGE_SIZE = 100
+
+# Most parameters SQLite allows in one statement, bulk inserts are split to stay under it
+MAX_QUERY_PARAMETERS = 32766
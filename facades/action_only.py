@@ -1,8 +1,8 @@
-import models.action as A
+from models.registry import table_registry
 
 
-def add_action(cur, db, staff_id, bill_id, approved, action_type, approval_id='NULL', approved_at='NULL'):
-    actions = A.Actions(cur, db)
+def add_action(cur, db, staff_id, bill_id, approved, action_type, approval_id=None, approved_at='NULL'):
+    actions = table_registry(cur, db)['Actions']
     new_action = actions.add(bill_id, staff_id, approved, approval_id, action_type, approved_at)
 
     return new_action
@@ -7,5 +7,5 @@ This file is used to avoid a circular import dependency between models.bill and
 
 
 def get_customer(cid, cur, db):
-    import models.customer as C
-    return C.Customers(cur, db).get(cid=cid)[0]
+    from models.registry import table_registry
+    return table_registry(cur, db)['Customers'].find(cid)
@@ -1,4 +1,4 @@
-import models.seat as S
+from models.registry import table_registry
 
 """
 This file is used to avoid a circular import dependency between other models and models.seat
@@ -7,4 +7,4 @@ This file is used to avoid a circular import dependency between other models and
 
 
 def get_seat(sid, cur, db):
-    return S.Seats(cur, db).get(sid=sid)[0]
\ No newline at end of file
+    return table_registry(cur, db)['Seats'].find(sid)
\ No newline at end of file
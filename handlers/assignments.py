@@ -1,7 +1,6 @@
-import random
-
 from connector import connect
 from models import StaffMember, Booking, Seat, Seats
+from rng import streams
 
 # Connect to the database
 db = connect()
@@ -37,12 +36,12 @@ def assign_staff_member_to_booking(
 def assign_booking_to_seat(covers: int) -> Seat | None:
     seats = Seats(cur, db)
     # Get a random seat
-    seat = random.choice(seats.get(status='empty', max_size=covers))
+    seat = streams.pick('seating', seats.get(status='empty', max_size=covers))
 
     # If there is no seats, handle
     if not seat:
         # Check if there is a seat with a max_size within 2 more than the covers
-        seat = random.choice(seats.get(status='empty', max_size=covers + 2))
+        seat = streams.pick('seating', seats.get(status='empty', max_size=covers + 2))
 
         # If there is still no seat, return None
         if not seat:
@@ -1,15 +1,15 @@
-import random
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import numpy as np
 
-from helper import event_happens, get_random_booking_comment
+from constants import EVENT_CHANCES, BOOKING_COMMENTS, BOOKING_WEIGHTS
 from models import Bookings, Booking, Customers
+from rng import streams
 
 
 def generate_bookings(day_of_the_week: str, date: datetime, bookings: Bookings, customers: Customers) -> list[Booking]:
     """
-    Generate bookings for the day of the week
+    Generate bookings for the day of the week, the whole day is drawn at once and added in one insert
     :param day_of_the_week: str: the day of the week
     :param date: datetime: the date
     :param bookings: Bookings: the bookings class
@@ -23,58 +23,69 @@ def generate_bookings(day_of_the_week: str, date: datetime, bookings: Bookings,
     if day_of_the_week not in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']:
         raise ValueError(f'{day_of_the_week} is not a valid day of the week')
 
+    # Check if the date matches the day_of_the_week
+    if date.strftime('%A').lower() != day_of_the_week:
+        raise ValueError(f'{date} is not a {day_of_the_week}')
+
+    # The bookings are drawn from their own stream, so the same seed gives the same bookings
+    generator = streams.stream('bookings')
+
     if day_of_the_week in ['friday', 'saturday']:
         # Get a random number between 6 and 25 for the amount of bookings
-        amount_of_bookings = random.randint(6, 25)
+        amount_of_bookings = int(generator.integers(6, 25, endpoint=True))
     else:
         # Get a random number between 0 and 10 for the amount of bookings
-        amount_of_bookings = random.randint(0, 10)
+        amount_of_bookings = int(generator.integers(0, 10, endpoint=True))
 
-    # Check if the date matches the day_of_the_week
-    if date.strftime('%A').lower() != day_of_the_week:
-        raise ValueError(f'{date} is not a {day_of_the_week}')
+    # The ids and vip status of the customers, without building a Customer for each
+    customer_ids, customer_vips = np.array(customers.select(['id', 'vip']), dtype=int).reshape(-1, 2).T
 
-    for _ in range(amount_of_bookings):
-        # Generate a poisson distribution for the amount of covers
-        cover_poisson = np.random.poisson(4, 100)
+    # If there are no customers to make the bookings, raise a ValueError
+    if amount_of_bookings and not len(customer_ids):
+        raise ValueError('There are no customers to make bookings')
 
-        # Clip the poisson distribution to be between 0 and 15
-        cover_poisson = np.clip(cover_poisson, 0, 15)
+    # Get the amount of covers from a poisson distribution, clipped to be between 0 and 15
+    covers = np.clip(generator.poisson(4, amount_of_bookings), 0, 15)
 
-        # Get a random number from the poisson distribution
-        covers = random.choice(cover_poisson)
+    # Get a random customer for each booking
+    chosen = generator.integers(0, max(len(customer_ids), 1), amount_of_bookings)
 
-        # Get a random customer
-        customer = random.choice(customers.get())
+    # Get a random time between 12:00 and 14:00 or 18:00 and 20:00, with a 1:2 chance of being at lunch
+    dinner = generator.integers(0, 3, amount_of_bookings) > 0
+    minutes = np.where(dinner, 18 * 60, 12 * 60) + generator.integers(0, 2 * 60, amount_of_bookings, endpoint=True)
 
-        # Get a random time between 12:00 and 20:00, with a 1:2 chance of being between 12:00 and 14:00
-        booking_time = random.choice([random.randint(1200, 1400), random.randint(1800, 2000) * 2])
+    # Round to the nearest multiple of 15
+    minutes = np.round(minutes / 15).astype(int) * 15
 
-        # Round to the nearest multiple of 15
-        booking_time = round(booking_time / 15) * 15
+    # Decide which bookings have a comment, with the same chance as event_happens('booking_has_comment')
+    has_comment = generator.random(amount_of_bookings) * 100 < EVENT_CHANCES['booking_has_comment']
+    comments = generator.choice(BOOKING_COMMENTS, amount_of_bookings,
+                                p=np.array(BOOKING_WEIGHTS) / sum(BOOKING_WEIGHTS))
 
-        date = date.replace(hour=booking_time // 100, minute=booking_time % 100, second=0)
+    # Load the chosen customers in one query
+    chosen_customers = customers.find_many(customer_ids[chosen].tolist())
 
-        # Set to a string
-        comment = ''
+    start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
 
-        # If the booking should have a comment (EVENT_CHANCES['booking_has_comment']% CHANCE) then add a comment
-        if event_happens('booking_has_comment'):
-            comment = get_random_booking_comment()
+    records = []
+    for i in range(amount_of_bookings):
+        comment = str(comments[i]) if has_comment[i] else ''
 
         # If the customer is a VIP, add to comment
-        if customer.vip:
+        if customer_vips[chosen[i]]:
             comment = f'{comment} VIP' if comment else 'VIP'
 
-        # Add the booking
-        bookings.add(
-            date=date,
-            covers=covers,
-            customer=customer,
+        records.append(dict(
+            date=start_of_day + timedelta(minutes=int(minutes[i])),
+            covers=int(covers[i]),
+            customer=chosen_customers[int(customer_ids[chosen[i]])],
             comment=comment
-        )
+        ))
+
+    # Add the bookings
+    bookings.add_many(records)
 
     # Get bookings for day
-    bookings_for_day = bookings.get(date_between=(date, date.replace(hour=23, minute=59, second=59)))
+    bookings_for_day = bookings.get(date_between=(start_of_day, start_of_day.replace(hour=23, minute=59, second=59)))
 
     return bookings_for_day
@@ -1,13 +1,14 @@
-import random
 from datetime import datetime
 from typing import NoReturn
 
-from connector import connect
+from connector import connect, transaction
 from constants import ITEM_NOTES
 from handlers.assignments import assign_staff_member_to_booking, assign_booking_to_seat
 from handlers.stack import PriorityQueue
 from helper import display, event_happens, get_weighted_random_number
 from models import Booking, StaffMember, Seat, Items, Actions, Item, Bills, Bill
+from models.registry import table_registry
+from rng import streams
 
 # Connect to the database
 db = connect()
@@ -58,21 +59,23 @@ def process_booking(booking: Booking, on_shift: list[StaffMember], active_bookin
         display(f'No seats available for {booking.customer.name}\'s booking, they will have to wait...')
         return active_bookings
 
-    # Set the status of the seat to occupied
-    seat.status = 'waiting_for_order'
+    # Seat the booking and open its bill as one unit of work
+    with transaction(bills.db):
+        # Set the status of the seat to occupied
+        seat.status = 'waiting_for_order'
 
-    # Create a new bill for the booking
-    bill: Bill = bills.add(
-        seating_id=seat.id,
-        covers=booking.covers,
-        created_by_staff_id=assigned_staff_member.id
-    )
+        # Create a new bill for the booking
+        bill: Bill = bills.add(
+            seating_id=seat.id,
+            covers=booking.covers,
+            created_by_staff_id=assigned_staff_member.id
+        )
 
-    # Add an action for the bill creation
-    actions.add(bill.id, assigned_staff_member.id, True, 0, 'create', 'NULL')
+        # Add an action for the bill creation
+        actions.add(bill.id, assigned_staff_member.id, True, 0, 'create', 'NULL')
 
-    # Set the bill for the booking
-    booking.bill = bill
+        # Set the bill for the booking
+        booking.bill = bill
 
     # Display that the booking has been seated
     display(
@@ -171,11 +174,13 @@ def take_order(booking: Booking, seat: Seat, time_string: str) -> Bill:
     for cover in range(booking.covers):
         items_to_add = serve_customer(assigned_staff_member, booking, items, items_to_add, time_string)
 
-    # Add the items to the bill
-    booking.bill.add_items(items_to_add, staff_id=assigned_staff_member.id)
+    # Add the order and update the seat as one unit of work
+    with transaction(booking.bill.db):
+        # Add the items to the bill
+        booking.bill.add_items(items_to_add, staff_id=assigned_staff_member.id)
 
-    # Set the status of the seat to okay
-    seat.status = 'okay'
+        # Set the status of the seat to okay
+        seat.status = 'okay'
 
     # Display that the order has been taken
     display(f'{time_string}: {booking.customer.name}\'s order has been taken by {assigned_staff_member.name}')
@@ -203,7 +208,7 @@ def serve_customer(assigned_staff_member: StaffMember, booking: Booking, items:
 
     # If the item has note event happens, set the item comment to a random note
     if event_happens('item_has_note'):
-        item_comment = random.choice(ITEM_NOTES)
+        item_comment = streams.pick('orders', ITEM_NOTES)
 
     # Add the item to the bill
     items_to_add.append((item, item_comment))
@@ -224,7 +229,7 @@ def get_item(items: Items) -> Item:
     :return: Item: the item
     """
     # ! Will be changed for a more realistic approach
-    return random.choice(items.get())
+    return streams.pick('orders', items.get())
 
 
 def pay_and_leave(active_bookings: PriorityQueue, assigned_staff_member: StaffMember, booking: Booking, seat: Seat,
@@ -256,14 +261,16 @@ def pay_and_leave(active_bookings: PriorityQueue, assigned_staff_member: StaffMe
     # Display that the booking has paid and left
     display(f'{time_string}: {booking.customer.name} has paid {total} and left')
 
-    # Add an action for the payment
-    actions.add(booking.bill.id, assigned_staff_member.id, True, 0, 'payment', 'NULL')
+    # Take the payment and free the seat as one unit of work
+    with transaction(actions.db):
+        # Add an action for the payment
+        actions.add(booking.bill.id, assigned_staff_member.id, True, 0, 'payment', 'NULL')
 
-    # Set the status of the seat to empty
-    seat.status = 'empty'
+        # Set the status of the seat to empty
+        seat.status = 'empty'
 
-    # Set the booking to inactive
-    booking.active = False
+        # Set the booking to inactive
+        booking.active = False
 
     # Remove the booking from the active bookings stack
     active_bookings.remove(booking)
@@ -282,8 +289,11 @@ def progress_bookings(active_bookings: PriorityQueue, on_shift: list[StaffMember
     :param actions: Actions: the actions class
     :return: PriorityQueue: the active bookings stack
     """
+    # Take one snapshot of the queue in the order it will be popped
+    queue = active_bookings.queue
+
     # Change all the seat statuses in active_bookings where priority is 2 to needs_checking
-    busy_bookings = [item[0] for item in active_bookings.queue if item[1] == 2]
+    busy_bookings = [item[0] for item in queue if item[1] == 2]
 
     # Loop through the bookings who are currently busy
     for booking in busy_bookings:
@@ -291,7 +301,10 @@ def progress_bookings(active_bookings: PriorityQueue, on_shift: list[StaffMember
         booking.bill.seat.status = 'needs_checking'
 
     # Get the bookings that have been seated
-    seated_bookings = [booking[0] for booking in active_bookings.queue]
+    seated_bookings = [booking[0] for booking in queue]
+
+    # Load the seats of every seated booking's bill in one query
+    table_registry(cur, db)['Bills'].prefetch([booking.bill for booking in seated_bookings], ['seat'])
 
     # Loop through the seated bookings
     for booking in seated_bookings:
@@ -314,10 +327,7 @@ def progress_bookings(active_bookings: PriorityQueue, on_shift: list[StaffMember
             # If the customer wants to order, take their order
             take_order(booking, seat, time_string)
 
-            # Remove the booking from the active bookings stack
-            active_bookings.pop()
-
-            # Add the booking to the active bookings stack with a priority of 2
+            # Move the booking to the back of the bookings with a priority of 2
             active_bookings.push(booking, 2)
 
             # Return the active bookings stack
@@ -332,10 +342,7 @@ def progress_bookings(active_bookings: PriorityQueue, on_shift: list[StaffMember
                 # Set the status of the seat to okay
                 seat.status = 'okay'
 
-                # Remove the booking from the active bookings stack
-                active_bookings.pop()
-
-                # Add the booking to the active bookings stack with a priority of 2
+                # Move the booking to the back of the bookings with a priority of 2
                 active_bookings.push(booking, 2)
 
                 # Return the active bookings stack
@@ -347,7 +354,8 @@ def progress_bookings(active_bookings: PriorityQueue, on_shift: list[StaffMember
         # Display that the booking has been served
         display(f'{time_string}:{booking.customer.name} has been served by {assigned_staff_member.name}')
 
-        # Remove the booking from the active bookings stack
-        active_bookings.pop()
+        # Remove the booking from the active bookings stack, unless it has already left
+        if booking in active_bookings:
+            active_bookings.remove(booking)
 
     return active_bookings
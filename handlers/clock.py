@@ -0,0 +1,58 @@
+"""
+This file contains the simulated clock, which the simulation reads the time from instead of datetime.now()
+"""
+from datetime import datetime
+
+
+class SimulatedClock:
+    """
+    Clock which only moves when the simulation advances it, at minute resolution
+
+    Attributes
+    ----------
+    now : datetime
+        The current simulated time
+
+    :returns None
+    """
+
+    def __init__(self, start: datetime) -> None:
+        """
+        Initialise the SimulatedClock class
+
+        :param start: datetime The time to start at, seconds are dropped
+        """
+        self.__now = start.replace(second=0, microsecond=0)
+
+    def now(self) -> datetime:
+        """
+        Get the current simulated time
+
+        :return datetime: the time
+        """
+        return self.__now
+
+    def advance_to(self, when: datetime) -> None:
+        """
+        Move the clock forward
+
+        :param when: datetime The new time, seconds are dropped
+        """
+        when = when.replace(second=0, microsecond=0)
+
+        # If the time is in the past, raise ValueError
+        if when < self.__now:
+            raise ValueError(f'The clock can not go back from {self.__now} to {when}')
+
+        self.__now = when
+
+    def time_string(self) -> str:
+        """
+        Get the current time for display
+
+        :return str: the time with format HH:MM AM/PM
+        """
+        return self.__now.strftime('%I:%M %p')
+
+    def __repr__(self) -> str:
+        return f'<SimulatedClock now={self.__now}>'
@@ -1,46 +1,48 @@
-import time
 from datetime import datetime
 
 from helper import display
 from models import StaffMember
 
 
-def handle_on_shift(dinner_staff: list[StaffMember], lunch_staff: list[StaffMember], on_shift: list[StaffMember]) \
-        -> list[StaffMember]:
+def handle_on_shift(dinner_staff: list[StaffMember], lunch_staff: list[StaffMember], on_shift: list[StaffMember],
+                    now: datetime = None) -> list[StaffMember]:
     """
     This function handles the clocking in and out of staff members
     :param dinner_staff: list[StaffMember]: The dinner staff
     :param lunch_staff: list[StaffMember]: The lunch staff
     :param on_shift: list[StaffMember]: The staff members currently on shift
+    :param now: datetime: The simulated time, defaults to the current time
     :return: list[StaffMember]: The staff members now on shift
     """
+    if now is None:
+        now = datetime.now()
+
     # If the hour is 12:00PM, clock in the lunch staff
-    if datetime.now().hour == 12:
+    if now.hour == 12:
         for staff in lunch_staff:
-            staff.start_shift()
+            staff.start_shift(now)
             display(f'{staff.name} has clocked in for lunch service!')
             on_shift.append(staff)
-            time.sleep(1)
     # If the hour is 3:00PM, clock in the dinner staff and clock out the lunch staff
-    if datetime.now().hour == 15:
-        for staff_in, staff_out in (dinner_staff, lunch_staff):
+    if now.hour == 15:
+        for staff_in in dinner_staff:
             # Clock the new member of staff in
-            staff_in.start_shift()
+            staff_in.start_shift(now)
             display(f'{staff_in.name} has clocked in for dinner service!')
             on_shift.append(staff_in)
 
+        for staff_out in lunch_staff:
             # Clock the old member of staff out
-            staff_out.end_shift()
+            staff_out.end_shift(now)
             display(f'{staff_out.name} has clocked out from lunch service!')
             on_shift.remove(staff_out)
-            time.sleep(1)
     # If the hour is 11:00PM, clock out the dinner staff
-    if datetime.now().hour == 23:
+    if now.hour == 23:
         for staff in dinner_staff:
             # Clock the member of staff out
-            staff.end_shift()
+            staff.end_shift(now)
             display(f'{staff.name} has clocked out from dinner service!')
             on_shift.remove(staff)
         display('The bar has now closed, time to go home!')
 
-    return on_shift
\ No newline at end of file
+    return on_shift
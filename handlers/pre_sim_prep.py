@@ -3,10 +3,11 @@ import time
 
 from faker import Faker
 
-from helper import get_weighted_random_number
-from models import Roles, StaffMembers, Items, Menus, Seats, Customers
+from helper import get_weighted_random_number, choose_role
+from models import Roles, StaffMembers, Items, Menus, Seats, Customers, MenuItems
 from connector import connect
-import random
+from models.registry import report_missing_indexes
+from rng import streams
 
 db = connect()
 
@@ -22,8 +23,11 @@ def create_roles():
     :return Roles: the roles
     """
 
-    # Create the roles
-    roles = Roles(cur, db)  # Init creates initial roles
+    # Create the roles table
+    roles = Roles(cur, db)
+
+    # Add the roles which do not exist yet
+    roles.add_initial_roles()
 
     return roles
 
@@ -39,16 +43,18 @@ def create_staff_members(roles):
     # Create the staff members
     staff_members = StaffMembers(cur, db)
 
-    if len(staff_members.rows) > 15:
-        return staff_members
+    # Staff have no natural key, so only the staff missing from the 15 are added
+    missing = 15 - staff_members.count()
 
-    # Add 15 staff members
-    for _ in range(15):
-        staff_members.add(
-            name=fake.first_name(),
-            role_id=roles.get(name=choose_role())[0].id,
-            wage=random.randint(1000, 2000) / 100,
-        )
+    # Seed the names from the staff stream, so the same seed gives the same staff
+    fake.seed_instance(streams.randint('staff', 0, 2 ** 32 - 1))
+
+    # Add the missing staff members
+    staff_members.add_many([dict(
+        name=fake.first_name(),
+        role_id=roles.first(name=choose_role()).id,
+        wage=streams.randint('staff', 1000, 2000) / 100,
+    ) for _ in range(missing)])
 
     # Add 15 staff members
     return staff_members
@@ -65,7 +71,7 @@ def get_price(cost: float) -> float:
     gp_percentage = get_weighted_random_number(50, 90, 70, 5)
 
     # Get the price
-    price = cost / (1 - gp_percentage)
+    price = cost / (1 - gp_percentage / 100)
 
     # Round the price to 2 decimal places
     return round(price, 2)
@@ -78,10 +84,6 @@ def create_items():
     """
     items_table = Items(cur, db)
 
-    # If there's already enough items, return
-    if len(items_table.rows) > 150:
-        return items_table
-
     # Import items-sheet.csv
     with open('items-sheet.csv', 'r') as file:
         items = file.readlines()
@@ -90,6 +92,9 @@ def create_items():
         # Remove the headers from the items list
         items = items[1:]
 
+        # The items to add, by name so the sheet's duplicates are only added once
+        new_items = {}
+
         # Get the data from the items list
         for item in items:
             data = item.strip().split(',')
@@ -105,8 +110,8 @@ def create_items():
             name = name.replace('*', '').strip().lower()
             size = size.strip().lower()
 
-            # If the item already exists, skip it
-            if items_table.get(True, name=name):
+            # If the sheet has already had the item, skip it
+            if name in new_items:
                 continue
 
             if units_per_size == '':
@@ -132,18 +137,22 @@ def create_items():
                 size = 0
 
             # Add the item
-            items_table.add(
+            new_items[name] = dict(
                 name=name,
                 price=get_price(cost),  # Get the price (based on the cost price and a normal distribution of GP%)
                 cost=cost,
                 vat=0.2,
-                quantity=random.randint(10, 100),
+                quantity=streams.randint('items', 10, 100),
                 individual_volume=size,
                 total_volume=size * units_per_size,
                 department='drink',
                 description=description
             )
 
+    # Add the new items and update the sheet's values for existing ones, their prices and stock are kept
+    items_table.upsert_many(list(new_items.values()),
+                            update=['cost', 'individual_volume', 'total_volume', 'department', 'description'])
+
     return items_table
 
 
@@ -159,12 +168,8 @@ def create_menus():
     # The names of the menus
     names = ['draught', 'bottles', 'spirits', 'wine', 'soft', 'liquer', 'apertif', 'digestif', 'low-alc', 'other']
 
-    # Add the menus
-    for name in names:
-        if len(menus.get(name=name)) > 0:
-            print(f'Skipping {name}')
-            continue
-        menus.add(name=name, active=True, max_size=40)
+    # Add the menus which do not exist yet
+    menus.upsert_many([dict(name=name, active=True, max_size=40) for name in names])
 
     # Return the menus
     return menus
@@ -192,12 +197,18 @@ def create_menu_items(menus, items):
         'other': ['misc']
     }
 
-    # Assign items to menus
-    for menu, descriptions in description_to_menu.items():
-        for description in descriptions:
-            for item in items.get(description=description):
-                print(f'{menus.get(name=menu)[0].name}: {item.name} <{item.id}>')
-                menus.get(name=menu)[0].add_item(item.id)
+    # Get the menu ids and the item ids for each description once
+    menu_ids = dict(menus.select(['name', 'id']))
+    item_ids = {}
+    for item_id, description in items.select(['id', 'description']):
+        item_ids.setdefault(description, []).append(item_id)
+
+    # Assign items to menus, the items already on their menus are left as they are
+    menu_items = MenuItems(cur, db)
+    menu_items.upsert_many([dict(menu_id=menu_ids[menu], item_id=item_id)
+                            for menu, descriptions in description_to_menu.items()
+                            for description in descriptions
+                            for item_id in item_ids.get(description, [])])
 
     return menus
 
@@ -224,16 +235,16 @@ def create_seats():
     for seat_type, chances in seat_chances.items():
         types.extend([seat_type] * chances)
 
-    # Set seat_type
-    seat_type = random.choice(types)
+    # Set the seat_type of each seat
+    seat_types = streams.pick('seating', types, 10)
 
-    # Set max_size
-    max_size = get_weighted_random_number(0, 15, 4, std_dev=2) if seat_type != 'bar' else 1
+    # Set the max_size of each seat, bars only seat one
+    max_sizes = get_weighted_random_number(0, 15, 4, std_dev=2, size=10)
 
-    # Add 10 seats
-    for i in range(1, 11):
-        seats.add(name=f'{i}', max_size=max_size, flagged=False, status='empty',
-                  seat_type=seat_type)
+    # Add the seats named 1 to 10 which do not exist yet
+    seats.upsert_many([dict(name=f'{i + 1}', max_size=int(max_sizes[i]) if seat_types[i] != 'bar' else 1,
+                            flagged=False, status='empty', seat_type=seat_types[i])
+                       for i in range(10)])
 
     # Add 10 seats
     return seats
@@ -247,9 +258,16 @@ def create_customers():
 
     # Create the customers table
     customers = Customers(cur, db)
-    for _ in range(40):
-        # Set the vip status to True for 10% of the customers
-        customers.add(name=fake.first_name(), vip=random.choice([True] * 10 + [False] * 90))
+
+    # Customers have no natural key, so only the customers missing from the 40 are added
+    missing = 40 - customers.count()
+
+    # Seed the names from the customers stream, so the same seed gives the same customers
+    fake.seed_instance(streams.randint('customers', 0, 2 ** 32 - 1))
+
+    # Set the vip status to True for 10% of the customers
+    customers.add_many([dict(name=fake.first_name(), vip=streams.chance('customers', 10))
+                        for _ in range(missing)])
 
     # Add 40 customers
     return customers
@@ -285,4 +303,8 @@ def simulation_prep():
     print('Creating customers')
     customers = create_customers()
 
+    # Report the columns that are filtered on without an index
+    print('Checking indexes')
+    report_missing_indexes(cur, db)
+
     return roles, staff_members, items, menus, seats, customers
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+This file contains the batch runner which simulates many days at once, each day is written to its own copy of a
+template database by a worker process and the rows they simulate are merged into one database at the end, in date order
+
+Run with python -m handlers.runner, the workers are started with spawn so they import this module rather than main.py,
+which connects to ./nea.db when it is imported
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import repeat
+from typing import Callable
+
+from connector import use_database
+from config import config
+from rng import RandomStreams, seed as seed_streams
+
+# The tables the simulation writes to, with the columns referencing the other merged tables
+MERGED_TABLES = {
+    'bill': {},
+    'bill_item': {'bill_id': 'bill'},
+    'action': {'bill_id': 'bill', 'approval_id': 'approval'},
+    'shift': {'approval_id': 'approval'},
+    'approval': {'action_id': 'action', 'shift_id': 'shift'},
+}
+
+
+def copy_database(source: str, destination: str) -> None:
+    """
+    Copy a database with the backup API, which includes anything still in the source's write ahead log
+
+    :param source: str The database file to copy
+    :param destination: str The file to copy to, its contents are replaced
+    """
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(destination)
+
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def prepare_template(seed: int) -> None:
+    """
+    Fill out the tables of this process's database, run in its own process to build the template
+
+    :param seed: int The master seed of the run
+    """
+    # Imported here so the connection is opened to the database this process was given
+    from connector import connect
+    from handlers.pre_sim_prep import simulation_prep
+    from models import Shifts, Actions, Bills
+
+    seed_streams(seed)
+    simulation_prep()
+
+    # Create the tables the simulation writes to, so every copy of the template has them
+    db = connect()
+    cur = db.cursor()
+    Shifts(cur, db)
+    Actions(cur, db)
+    Bills(cur, db)
+
+
+def simulate_date(date: datetime, seed: int, template: str, directory: str, simulate: Callable = None) -> str:
+    """
+    Simulate a day in a new worker process, on a fresh copy of the template so no day sees the rows of another
+
+    :param date: datetime The day to simulate
+    :param seed: int The master seed of the run
+    :param template: str The template database file
+    :param directory: str The directory the day's database is written to
+    :param simulate: Callable Simulates the day, called like handlers.simulation.simulate_day which it defaults to
+    :return str: the database file the day was written to
+    """
+    path = os.path.join(directory, f'day_{date:%Y%m%d}.db')
+    copy_database(template, path)
+
+    # The worker only simulates this day, so nothing has connected to another database yet
+    use_database(path)
+
+    # Imported here so the connection is opened to the day's database
+    from connector import connect
+    from handlers.pre_sim_prep import simulation_prep
+    from models import Actions, Bills
+
+    if simulate is None:
+        from handlers.simulation import simulate_day as simulate
+
+    # Each day has its own streams, so it draws the same numbers whichever worker simulates it
+    seed_streams(seed, date.toordinal())
+
+    # The tables are already filled out from the template, so this only loads them
+    roles, staff_members, items, menus, seats, customers = simulation_prep()
+
+    db = connect()
+    cur = db.cursor()
+    simulate(staff_members, customers, Actions(cur, db), Bills(cur, db), roles, date)
+    db.commit()
+
+    return path
+
+
+def merge_databases(destination: str, sources: list[str], after: dict[str, int] = None) -> dict[str, int]:
+    """
+    Copy the rows of MERGED_TABLES from each source database into the destination
+
+    Ids are shifted past the rows already in the destination, and the columns referencing the other merged tables are
+    shifted with them, so the rows of different sources do not collide
+
+    :param destination: str The database file to merge into
+    :param sources: list[str] The database files to merge from
+    :param after: dict[str, int] Only rows with a higher id are merged, by table, e.g. to skip rows every source
+            copied from the same template
+    :return dict[str, int]: the number of rows merged into each table
+    """
+    after = after or {}
+    merged = {table: 0 for table in MERGED_TABLES}
+
+    db = sqlite3.connect(destination)
+
+    try:
+        for source in sources:
+            db.execute('ATTACH DATABASE ? AS source', (source,))
+
+            try:
+                # Create the tables the destination does not have yet
+                for table in MERGED_TABLES:
+                    sql = db.execute("SELECT sql FROM source.sqlite_master WHERE type = 'table' AND name = ?",
+                                     (table,)).fetchone()
+                    if sql and not db.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                                              (table,)).fetchone():
+                        db.execute(sql[0])
+
+                tables = [table for table in MERGED_TABLES if
+                          db.execute("SELECT 1 FROM source.sqlite_master WHERE type = 'table' AND name = ?",
+                                     (table,)).fetchone()]
+
+                # Every table is shifted by the rows in the destination before any of this source is merged
+                offsets = {table: db.execute(f'SELECT COALESCE(MAX(id), 0) FROM main.{table}').fetchone()[0]
+                           for table in tables}
+
+                with db:
+                    for table in tables:
+                        columns = [column[1] for column in db.execute(f'PRAGMA source.table_info({table})')]
+
+                        # Shift the id and the references to merged rows, references to rows from before after, to
+                        # no row (0) or NULL are left as they are
+                        values = []
+                        for column in columns:
+                            referenced = 'id' if column == 'id' else MERGED_TABLES[table].get(column)
+
+                            if referenced == 'id':
+                                values.append(f'id + {offsets[table] - after.get(table, 0)}')
+                            elif referenced in offsets:
+                                start = after.get(referenced, 0)
+                                values.append(f'CASE WHEN {column} > {start} '
+                                              f'THEN {column} + {offsets[referenced] - start} ELSE {column} END')
+                            else:
+                                values.append(column)
+
+                        cursor = db.execute(f'''
+                            INSERT INTO main.{table} ({", ".join(columns)})
+                            SELECT {", ".join(values)} FROM source.{table} WHERE id > ?
+                        ''', (after.get(table, 0),))
+                        merged[table] += cursor.rowcount
+            finally:
+                db.execute('DETACH DATABASE source')
+    finally:
+        db.close()
+
+    return merged
+
+
+def run_days(dates: list[datetime], output: str, workers: int = None, directory: str = None,
+             seed: int = None, simulate: Callable = None) -> dict[str, int]:
+    """
+    Simulate days in parallel and merge them into one database
+
+    :param dates: list[datetime] The days to simulate
+    :param output: str The database file to write, its contents are replaced with the template and the merged days
+    :param workers: int Most worker processes, defaults to the number of CPUs
+    :param directory: str The directory for the template and day databases, defaults to a temporary directory
+            removed afterwards
+    :param seed: int The master seed, the same seed and dates give the same days. Defaults to the seed in the
+            config, or one from the operating system
+    :param simulate: Callable Simulates each day, called like handlers.simulation.simulate_day which it defaults to.
+            Workers are spawned, so it has to be a function they can import
+    :return dict[str, int]: the number of rows merged into each table
+    """
+    # Pick the seed here so every process uses the same one
+    seed = RandomStreams(config['seed'] if seed is None else seed).seed
+
+    # Workers are spawned so they do not inherit the connections of this process
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = directory or temporary
+        template = os.path.join(directory, 'template.db')
+
+        # Fill out the template in its own process, as it connects to its database when the models are imported
+        with ProcessPoolExecutor(1, mp_context=context, initializer=use_database, initargs=(template,)) as executor:
+            executor.submit(prepare_template, seed).result()
+
+        copy_database(template, output)
+
+        # The rows in the template are in every worker's database, so only the rows added after them are merged
+        db = sqlite3.connect(template)
+        try:
+            after = {table: db.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+                     for table in MERGED_TABLES if
+                     db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()}
+        finally:
+            db.close()
+
+        # Each day is simulated by a new worker, as the models keep the connection to the database they were
+        # imported with, and map returns the days' databases in date order so they are merged in that order
+        with ProcessPoolExecutor(workers, mp_context=context, max_tasks_per_child=1) as executor:
+            sources = list(executor.map(simulate_date, sorted(dates), repeat(seed), repeat(template),
+                                        repeat(directory), repeat(simulate)))
+
+        return merge_databases(output, sources, after)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate many days at the bar in parallel')
+    parser.add_argument('--days', type=int, default=30, help='number of days to simulate')
+    parser.add_argument('--start', type=datetime.fromisoformat, default=datetime.now(),
+                        help='first day to simulate, YYYY-MM-DD')
+    parser.add_argument('--workers', type=int, default=None, help='most worker processes')
+    parser.add_argument('--output', default='./simulation.db', help='database to write the days to')
+    parser.add_argument('--seed', type=int, default=None, help='master seed, to repeat a run')
+    args = parser.parse_args()
+
+    # Pick the seed here so it can be printed
+    run_seed = RandomStreams(config['seed'] if args.seed is None else args.seed).seed
+    print(f'Simulating {args.days} days with seed {run_seed}')
+
+    merged = run_days([args.start + timedelta(days=i) for i in range(args.days)], args.output, args.workers,
+                      seed=run_seed)
+
+    for table, rows in merged.items():
+        print(f'{rows} rows merged into {table}')
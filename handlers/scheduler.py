@@ -0,0 +1,106 @@
+"""
+This file contains the discrete event scheduler which runs the simulation as fast as the events can be handled
+"""
+from datetime import datetime, timedelta
+from typing import Any, Callable, NamedTuple
+
+from handlers.clock import SimulatedClock
+from handlers.stack import PriorityQueue
+
+
+class Event(NamedTuple):
+    """
+    A named tuple for an event in the simulation
+    """
+    time: datetime
+    kind: str
+    booking: Any = None
+
+
+class Scheduler:
+    """
+    Queue of events ordered by time, events at the same minute are handled in the order they were scheduled
+
+    Running the scheduler moves the clock to each event in turn and calls the handler for its kind, handlers can
+    schedule more events
+
+    Attributes
+    ----------
+    clock : SimulatedClock
+        The clock the events are timed by
+    events : PriorityQueue
+        The events which have not been handled yet, by time
+    handlers : dict
+        The function called for each kind of event
+
+    :returns None
+    """
+
+    def __init__(self, clock: SimulatedClock, max_size: int = 10000) -> None:
+        """
+        Initialise the Scheduler class
+
+        :param clock: SimulatedClock The clock the events are timed by
+        :param max_size: int Most events waiting at once
+        """
+        self.clock = clock
+        self.events = PriorityQueue(max_size=max_size)
+        self.handlers: dict[str, Callable[[Event], None]] = {}
+
+    def on(self, kind: str, handler: Callable[[Event], None]) -> None:
+        """
+        Set the function called for a kind of event
+
+        :param kind: str The kind of event, e.g. arrival
+        :param handler: Callable Called with the event when it happens
+        """
+        self.handlers[kind] = handler
+
+    def schedule(self, kind: str, when: datetime | timedelta, booking: Any = None) -> Event:
+        """
+        Add an event
+
+        :param kind: str The kind of event, must have a handler
+        :param when: datetime | timedelta The time of the event, or how long after the current time it happens.
+                Times in the past happen straight away
+        :param booking: Any The booking the event is for, if any
+        :return Event: the event
+        """
+        # If there is no handler for the event, raise ValueError
+        if kind not in self.handlers:
+            raise ValueError(f'There is no handler for {kind} events')
+
+        if isinstance(when, timedelta):
+            when = self.clock.now() + when
+
+        # Events happen on the minute, and never before the current time
+        event = Event(max(when.replace(second=0, microsecond=0), self.clock.now()), kind, booking)
+        self.events.push(event, event.time)
+
+        return event
+
+    def run(self, until: datetime = None) -> int:
+        """
+        Handle the events in time order until there are none left
+
+        :param until: datetime Stop before any event after this time, None to handle every event
+        :return int: the number of events handled
+        """
+        handled = 0
+
+        while not self.events.empty:
+            event, when = self.events.peek()
+
+            # Leave the events after until in the queue
+            if until is not None and when > until:
+                break
+
+            self.events.pop()
+            self.clock.advance_to(when)
+            self.handlers[event.kind](event)
+            handled += 1
+
+        return handled
+
+    def __len__(self) -> int:
+        return len(self.events)
@@ -1,15 +1,17 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import NamedTuple
 
-from freezegun import freeze_time
-
 from connector import connect
+from constants import BOOKING_MINUTES, OPENING_HOUR, DINNER_HOUR, CLOSING_HOUR
+from handlers.assignments import assign_staff_member_to_booking
 from handlers.booking_generation import generate_bookings
-from handlers.bookings_handler import distribute_bookings, progress_bookings, process_booking
+from handlers.bookings_handler import process_booking, take_order, pay_and_leave
+from handlers.clock import SimulatedClock
 from handlers.events import handle_hourly_events
 from handlers.on_shift import handle_on_shift
+from handlers.scheduler import Event, Scheduler
 from handlers.stack import PriorityQueue
-from helper import display, get_staff_needed
+from helper import display, event_happens, get_staff_needed
 from models import Bookings, Booking, StaffMember, StaffMembers, Actions, Bills, Customers, Roles
 
 # Connect to the database
@@ -28,11 +30,14 @@ class StartDay(NamedTuple):
 
 
 def start_day(staff_members: StaffMembers, customers: Customers, roles: Roles,
-              date: datetime = datetime.now()) -> StartDay:
+              date: datetime = None) -> StartDay:
     """
     Start the day
     :return: StartDay: an object for accessing the returned variables
     """
+    if date is None:
+        date = datetime.now()
+
     # Initiate the bookings table
     bookings = Bookings(cur, db)
 
@@ -40,13 +45,13 @@ def start_day(staff_members: StaffMembers, customers: Customers, roles: Roles,
     bookings_for_day = generate_bookings(date.strftime('%A'), date, bookings, customers)
 
     # Determine how many staff members are needed for lunch service
-    lunch_bookings = [booking for booking in bookings_for_day if booking.date.hour < 15]
+    lunch_bookings = [booking for booking in bookings_for_day if booking.date.hour < DINNER_HOUR]
 
     # Get the staff members to clock in
     lunch_staff = get_staff_needed(lunch_bookings, staff_members, roles)
 
     # Determine how many staff members are needed for dinner service
-    dinner_bookings = [booking for booking in bookings_for_day if booking.date.hour >= 15]
+    dinner_bookings = [booking for booking in bookings_for_day if booking.date.hour >= DINNER_HOUR]
 
     # Get the staff members to clock in
     dinner_staff = get_staff_needed(dinner_bookings, staff_members, roles)
@@ -55,111 +60,245 @@ def start_day(staff_members: StaffMembers, customers: Customers, roles: Roles,
     return StartDay(bookings, date, bookings_for_day, lunch_staff, dinner_staff)
 
 
-def simulate_hour(
-        bookings_for_day: list[Booking],
-        lunch_staff: list[StaffMember],
-        dinner_staff: list[StaffMember],
-        actions: Actions = Actions(cur, db),
-        bills: Bills = Bills(cur, db),
-        staff_members: StaffMembers = StaffMembers(cur, db),
-        uncompleted_bookings: list[Booking] = None
-) -> list[Booking]:
+class DaySimulation:
     """
-    Simulate an hour of the day at the bar
-    :param bookings_for_day: list[Booking]: the bookings for the day
-    :param lunch_staff: list[StaffMember]: the lunch staff
-    :param dinner_staff: list[StaffMember]: the dinner staff
-    :param actions: Actions: the actions table
-    :param bills: Bills: the bills table
-    :param staff_members: list[StaffMember]: the staff members table
-    :param uncompleted_bookings: list[Booking]: the uncomplete bookings
-    :return: list[Booking]: the uncomplete bookings
+    A day at the bar run as events, each event moves the simulated clock straight to its time so the day is simulated
+    as fast as the events can be handled
+
+    A booking arrives, is seated, orders, is checked on after each round and orders again or pays and leaves. Staff
+    clock in and out at the shift changes, and the bookings still in at closing pay and leave
+
+    Attributes
+    ----------
+    day : StartDay
+        The bookings and staff for the day
+    clock : SimulatedClock
+        The simulated time, read by the handlers instead of datetime.now()
+    scheduler : Scheduler
+        The events which have not happened yet
+    actions : Actions
+        The actions table
+    bills : Bills
+        The bills table
+    staff_members : StaffMembers
+        The staff members table
+    on_shift : list[StaffMember]
+        The staff members on shift
+    active_bookings : PriorityQueue
+        The bookings which have been seated and not left yet, VIPs first
+    closed : bool
+        True once the bar has closed
+
+    :returns None
     """
 
-    # If there are no uncomplete bookings, set it to an empty list
-    if uncompleted_bookings is None:
-        uncompleted_bookings = []
+    def __init__(self, day: StartDay, actions: Actions, bills: Bills, staff_members: StaffMembers,
+                 clock: SimulatedClock = None) -> None:
+        """
+        Initialise the DaySimulation class
+
+        :param day: StartDay The bookings and staff for the day
+        :param actions: Actions The actions table
+        :param bills: Bills The bills table
+        :param staff_members: StaffMembers The staff members table
+        :param clock: SimulatedClock The clock to run on, defaults to one at opening time on the day
+        """
+        self.day = day
+        self.clock = clock or SimulatedClock(self.at(OPENING_HOUR))
+        self.scheduler = Scheduler(self.clock)
+        self.actions = actions
+        self.bills = bills
+        self.staff_members = staff_members
+        self.on_shift: list[StaffMember] = []
+        self.active_bookings = PriorityQueue()
+        self.closed = False
+
+        self.scheduler.on('shift', self.handle_shift)
+        self.scheduler.on('hour', self.handle_hour)
+        self.scheduler.on('arrival', self.handle_arrival)
+        self.scheduler.on('order', self.handle_order)
+        self.scheduler.on('round', self.handle_round)
+        self.scheduler.on('payment', self.handle_payment)
+        self.scheduler.on('close', self.handle_close)
+
+    def at(self, hour: int) -> datetime:
+        """
+        Get a time on the day
+
+        :param hour: int The hour
+        :return datetime: the time on the hour
+        """
+        return self.day.date.replace(hour=hour, minute=0, second=0, microsecond=0)
+
+    def run(self) -> int:
+        """
+        Simulate the day from opening to closing
+
+        :return int: the number of events handled
+        """
+        # Shift changes are scheduled first so staff are clocked in before the bookings of the same hour arrive
+        self.scheduler.schedule('shift', self.at(OPENING_HOUR))
+        self.scheduler.schedule('shift', self.at(DINNER_HOUR))
+
+        # Each hour's events decide which of its bookings arrive
+        for hour in range(OPENING_HOUR, CLOSING_HOUR):
+            self.scheduler.schedule('hour', self.at(hour))
+
+        self.scheduler.schedule('close', self.at(CLOSING_HOUR))
+
+        # Rows written during the day are stamped with the simulated time
+        db = self.bills.db
+        clock = db.clock
+        db.clock = self.clock.now
+
+        try:
+            # Nothing happens after closing, the bookings still in are settled by the close event
+            return self.scheduler.run(until=self.at(CLOSING_HOUR))
+        finally:
+            db.clock = clock
+
+    def staff_for(self, booking: Booking) -> StaffMember | None:
+        """
+        Get the staff member serving a booking, assigning a new one if theirs is not on shift
+
+        :param booking: Booking The booking
+        :return StaffMember | None: the staff member, None if no one is available
+        """
+        assigned_staff_member = booking.assigned_staff_member
+
+        if assigned_staff_member not in self.on_shift:
+            assigned_staff_member = assign_staff_member_to_booking(self.on_shift, booking)
+
+        return assigned_staff_member
+
+    def handle_shift(self, event: Event) -> None:
+        """
+        Clock staff in and out
+        """
+        self.on_shift = handle_on_shift(self.day.dinner_staff, self.day.lunch_staff, self.on_shift, event.time)
+
+    def handle_hour(self, event: Event) -> None:
+        """
+        Handle the events of the hour and schedule the arrival of its bookings
+        """
+        bookings_for_hour = [booking for booking in self.day.bookings_for_day if booking.date.hour == event.time.hour]
+
+        self.on_shift, bookings_for_hour = handle_hourly_events(self.on_shift, bookings_for_hour, self.staff_members)
+
+        for booking in bookings_for_hour:
+            self.scheduler.schedule('arrival', booking.date, booking)
+
+    def handle_arrival(self, event: Event) -> None:
+        """
+        Seat a booking, if there is no staff member or seat for them they try again later
+        """
+        if self.closed:
+            return
+
+        booking = event.booking
+        self.active_bookings = process_booking(booking, self.on_shift, self.active_bookings, self.bills,
+                                               self.clock.time_string(), self.actions)
+
+        if booking in self.active_bookings:
+            self.scheduler.schedule('order', timedelta(minutes=BOOKING_MINUTES['order']), booking)
+        else:
+            self.scheduler.schedule('arrival', timedelta(minutes=BOOKING_MINUTES['retry']), booking)
+
+    def handle_order(self, event: Event) -> None:
+        """
+        Take the first order of a seated booking
+        """
+        booking = event.booking
+
+        # The booking may have been settled at closing
+        if booking not in self.active_bookings:
+            return
+
+        # If there is no one to take the order, wait for someone to come on shift
+        if not self.staff_for(booking):
+            self.scheduler.schedule('order', timedelta(minutes=BOOKING_MINUTES['retry']), booking)
+            return
 
-    # Get the bookings for this hour
-    bookings_for_hour = [booking for booking in bookings_for_day if
-                         booking.date.hour == datetime.now().hour]
+        take_order(booking, booking.bill.seat, self.clock.time_string())
 
-    # All the staff currently on shift
-    on_shift = []
+        self.scheduler.schedule('round', timedelta(minutes=BOOKING_MINUTES['round']), booking)
 
-    # Init active bookings queue
-    active_bookings = PriorityQueue()
+    def handle_round(self, event: Event) -> None:
+        """
+        Check on a booking, they either order another round or ask for the bill
+        """
+        booking = event.booking
 
-    # If there are any uncomplete bookings, add them to the active bookings queue with a priority of 1
-    for booking in uncompleted_bookings:
-        active_bookings.push(booking, 1)
+        if booking not in self.active_bookings:
+            return
 
-    # Clock in and out staff
-    on_shift = handle_on_shift(dinner_staff, lunch_staff, on_shift)
+        assigned_staff_member = self.staff_for(booking)
 
-    # If there is no one clocked in, return
-    if not on_shift:
-        display('Everyones gone home...')
-        return uncompleted_bookings
+        if not assigned_staff_member:
+            self.scheduler.schedule('round', timedelta(minutes=BOOKING_MINUTES['retry']), booking)
+            return
 
-    on_shift, bookings_for_hour = handle_hourly_events(on_shift, bookings_for_hour, staff_members)
+        seat = booking.bill.seat
+        seat.status = 'needs_checking'
 
-    # Split the bookings for the hour into 4 sub lists without numpy
-    bookings_for_hour = distribute_bookings(bookings_for_hour, 4)
+        if event_happens('customer_wants_another_round'):
+            take_order(booking, seat, self.clock.time_string())
+            self.scheduler.schedule('round', timedelta(minutes=BOOKING_MINUTES['round']), booking)
+        else:
+            self.scheduler.schedule('payment', timedelta(minutes=BOOKING_MINUTES['payment']), booking)
 
-    # Display the bookings for the hour
-    display("Whilst we've been looking at the back end, the following has happened:")
+    def handle_payment(self, event: Event) -> None:
+        """
+        Take a booking's payment, they leave and free their seat
+        """
+        booking = event.booking
 
-    # Loop through the bookings for the hour
-    for i, interval in enumerate(bookings_for_hour):
-        # Create a time string
-        time_string = f'{datetime.now().hour}:{i * 15} {datetime.now().strftime("%p")}'
+        if booking not in self.active_bookings:
+            return
 
-        # Progress 4 of the active bookings
-        active_bookings = progress_bookings(active_bookings, on_shift,
-                                            time_string, actions)
-        for booking in interval:
-            active_bookings = process_booking(booking, on_shift, active_bookings, bills, time_string, actions)
+        assigned_staff_member = self.staff_for(booking)
 
-    # Set uncomplete bookings to the remaining active bookings
-    uncompleted_bookings = [active_bookings.pop() for _ in range(len(active_bookings))]
+        if not assigned_staff_member:
+            self.scheduler.schedule('payment', timedelta(minutes=BOOKING_MINUTES['retry']), booking)
+            return
 
-    # If there is still hours left in the day, recursively rerun the simulation
-    if datetime.now().hour > 23:
-        # After the last hour, first process any uncomplete bookings
-        for booking in uncompleted_bookings:
-            time_string = f'{datetime.now().hour}:00 {datetime.now().strftime("%p")}'
-            active_bookings = process_booking(booking, on_shift, active_bookings, bills, time_string, actions)
+        self.active_bookings = pay_and_leave(self.active_bookings, assigned_staff_member, booking, booking.bill.seat,
+                                             self.clock.time_string(), self.actions)
 
-        # After all bookings are handled, clock out all staff
-        for staff in on_shift:
-            staff.end_shift()
-            display(f'{staff.name} has clocked out from their shift!')
+        # Display that the booking has been served
+        display(f'{self.clock.time_string()}:{booking.customer.name} has been served by {assigned_staff_member.name}')
 
-        display('The bar has now closed, time to go home!')
+    def handle_close(self, event: Event) -> None:
+        """
+        Settle the bookings still in and clock out the dinner staff
+        """
+        for booking, _ in self.active_bookings.queue:
+            # Whoever is left takes the payment
+            assigned_staff_member = self.staff_for(booking) or booking.assigned_staff_member
 
-        return uncompleted_bookings
+            self.active_bookings = pay_and_leave(self.active_bookings, assigned_staff_member, booking,
+                                                 booking.bill.seat, self.clock.time_string(), self.actions)
 
-    return uncompleted_bookings
+        self.on_shift = handle_on_shift(self.day.dinner_staff, self.day.lunch_staff, self.on_shift, event.time)
+        self.closed = True
 
 
 def simulate_day(staff_members: StaffMembers, customers: Customers, actions: Actions, bills: Bills, roles: Roles,
-                 date: datetime = datetime.now()):
+                 date: datetime = None) -> DaySimulation:
+    """
+    Simulate a day at the bar from 12:00PM to 11:00PM
+    :param staff_members: StaffMembers: the staff members table
+    :param customers: Customers: the customers table
+    :param actions: Actions: the actions table
+    :param bills: Bills: the bills table
+    :param roles: Roles: the roles table
+    :param date: datetime: the day to simulate, defaults to today
+    :return: DaySimulation: the simulated day
+    """
     # Determine chances for events
     day = start_day(staff_members, customers, roles, date)
 
-    # Init uncomplete bookings
-    uncompleted_bookings = []
-
-    # Loop through hours in the range [12:00pm, 11:00pm]
-    for hr in range(12, 24):
-        with freeze_time(day.date.replace(hour=hr, minute=0, second=0)):
-            uncompleted_bookings = simulate_hour(
-                day.bookings_for_day,
-                day.lunch_staff,
-                day.dinner_staff,
-                actions,
-                bills,
-                staff_members,
-                uncompleted_bookings
-            )
+    simulation = DaySimulation(day, actions, bills, staff_members)
+    simulation.run()
+
+    return simulation
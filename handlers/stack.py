@@ -1,59 +1,153 @@
-from typing import Any, TypedDict
+import heapq
+from itertools import count
+from typing import Any
 
 QueueItem = tuple[Any, int]
 
+# Placeholder for the item of a heap entry that has been removed or replaced
+REMOVED = object()
+
+
 class PriorityQueue:
-    def __init__(self, max_size: int = 1000):
-        self.max_size: int = max_size
-        self.queue: list[QueueItem] = []
+    """
+    Queue which pops the item with the lowest priority value first, items with the same priority are popped in the
+    order they were pushed
 
-    def push(self, item: Any, priority: int) -> list[QueueItem] | ValueError:
-        # If the queue is not full, add the item
-        if not self.full:
-            # Add the item and sort the queue
-            self.queue.append((item, priority))
+    Backed by a binary heap, push and pop are O(log n). Removing an item marks its entry as removed in O(1), the
+    entry is dropped when it reaches the top of the heap
 
-            # Sort the queue by priority
-            self.queue.sort(key=lambda x: x[1])
+    Items are looked up by identity, so the same object has to be passed to remove and decrease_key
 
-            return self.queue
+    Attributes
+    ----------
+    max_size : int
+        Most items held at once
+    """
 
-        raise ValueError('Queue is full')
+    def __init__(self, max_size: int = 1000):
+        self.max_size: int = max_size
+        # Entries are [priority, order pushed, item], the order breaks ties and stops items being compared
+        self.__heap: list[list] = []
+        # The live entry of each item, by id of the item
+        self.__entries: dict[int, list] = {}
+        # Breaks ties between equal priorities so they are popped first in first out
+        self.__counter = count()
+
+    def push(self, item: Any, priority: int) -> None | ValueError:
+        """
+        Add an item, if it is already in the queue it is moved to the new priority behind the items already there
+        :param item: Any: the item
+        :param priority: int: the priority, lower values are popped first
+        :return: None
+        """
+        # Replacing an item does not make the queue any longer
+        if id(item) in self.__entries:
+            self.__discard(item)
+        elif self.full:
+            raise ValueError('Queue is full')
+
+        entry = [priority, next(self.__counter), item]
+        self.__entries[id(item)] = entry
+        heapq.heappush(self.__heap, entry)
 
     def pop(self) -> Any | ValueError:
+        """
+        Remove and return the item with the lowest priority value
+        :return: Any: the item
+        """
+        self.__drop_removed()
+
         # If the queue is not empty, pop the item
         if not self.empty:
-            return self.queue.pop()[0]
+            priority, _, item = heapq.heappop(self.__heap)
+            del self.__entries[id(item)]
+
+            return item
 
         raise ValueError('Queue is empty')
 
-    def remove(self, item: Any) -> list[QueueItem] | ValueError:
+    def remove(self, item: Any) -> None | ValueError:
+        """
+        Remove an item from anywhere in the queue, raises ValueError if it is not in the queue
+        :param item: Any: the item
+        :return: None
+        """
         # If the queue is not empty, remove the item
         if not self.empty:
-            # Remove the item
-            self.queue.remove([x for x in self.queue if x[0] == item][0])
+            if id(item) not in self.__entries:
+                raise ValueError(f'{item} is not in the queue, items are looked up by identity')
 
-            return self.queue
+            return self.__discard(item)
 
         raise ValueError('Queue is empty')
 
-    def peek(self) -> Any | ValueError:
+    def decrease_key(self, item: Any, priority: int) -> None | ValueError:
+        """
+        Move an item to a lower priority value, so it is popped sooner, raises ValueError if it is not in the queue
+        :param item: Any: the item
+        :param priority: int: the new priority, must not be higher than the current one
+        :return: None
+        """
+        if id(item) not in self.__entries:
+            raise ValueError(f'{item} is not in the queue, items are looked up by identity')
+
+        current = self.__entries[id(item)][0]
+        if priority > current:
+            raise ValueError(f'Priority can only be decreased, not from {current} to {priority}')
+
+        self.push(item, priority)
+
+    def peek(self) -> QueueItem | ValueError:
+        """
+        Get the next item to be popped without removing it
+        :return: QueueItem: the item and its priority
+        """
+        self.__drop_removed()
+
         # If the queue is not empty, return the first item
         if not self.empty:
-            return self.queue[0]
+            priority, _, item = self.__heap[0]
+
+            return item, priority
 
         raise ValueError('Queue is empty')
 
+    @property
+    def queue(self) -> list[QueueItem]:
+        """
+        The items and their priorities, in the order they will be popped
+        :return: list[QueueItem]: the queue
+        """
+        return [(item, priority) for priority, _, item in sorted(self.__entries.values())]
+
     @property
     def empty(self) -> bool:
-        return not bool(self.queue)
+        return not bool(self.__entries)
 
     @property
     def full(self) -> bool:
-        return len(self.queue) == self.max_size
+        return len(self.__entries) == self.max_size
+
+    def __discard(self, item: Any) -> None:
+        # Mark the entry as removed, it is dropped from the heap when it reaches the top
+        entry = self.__entries.pop(id(item))
+        entry[-1] = REMOVED
+
+        # Rebuild the heap if it is mostly removed entries, so it does not grow without limit
+        if len(self.__heap) > 2 * len(self.__entries) + 32:
+            self.__heap = [entry for entry in self.__heap if entry[-1] is not REMOVED]
+            heapq.heapify(self.__heap)
+
+    def __drop_removed(self) -> None:
+        # Drop removed entries from the top of the heap
+        while self.__heap and self.__heap[0][-1] is REMOVED:
+            heapq.heappop(self.__heap)
+
+    def __contains__(self, item: Any) -> bool:
+        return id(item) in self.__entries
 
     def __len__(self):
-        return len(self.queue)
+        return len(self.__entries)
 
     def __str__(self):
         return str(self.queue)
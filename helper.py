@@ -1,30 +1,33 @@
 """
 This file contains helper functions for the project
 """
-import random
+from sqlite3 import Cursor
 
 import numpy as np
 
 from connector import connect
 from constants import EVENT_CHANCES, BOOKING_COMMENTS, BOOKING_WEIGHTS
 from models import Booking, StaffMembers, StaffMember, Roles
+from rng import streams
+from sampling import sampler
 
 # Connect to the database
 db = connect()
 cur = db.cursor()
 
 
-def table_exists(table_name: str) -> bool:
+def table_exists(table_name: str, cursor: Cursor = None) -> bool:
     """
     Check if a table exists in the database
 
     :param table_name: str Name of the table to check
+    :param cursor: Cursor Cursor to check with, pass the caller's cursor to see tables created in its open transaction
     :return bool : True if the table exists, False otherwise
     """
+    from models.schema import schema
 
-    cur.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}';")
-
-    return cur.fetchone() is not None
+    # The connection's schema is only read from sqlite_master when it is first used or a table is not found
+    return schema((cursor or cur).connection).table_exists(table_name)
 
 
 def row_exists(table_name: str, row_id: int) -> bool:
@@ -147,23 +150,18 @@ def display(msg):
     return print(msg)
 
 
-def get_weighted_random_number(low, high, weight, std_dev=1):
+def get_weighted_random_number(low, high, weight, std_dev=1, size=None):
     """
-    Get a weighted random number between low and high
+    Get a weighted random number between low and high, drawn from a normal distribution truncated to [low, high]
     :param low: int: the low number
     :param high: int: the high number
     :param weight: int: the weight
     :param std_dev: int: the standard deviation
-    :return: int: the weighted random number
+    :param size: int: the number of weighted random numbers to get, None for a single number
+    :return: float | np.ndarray: the weighted random number rounded to a whole number, or an array of them
     """
-    # Create a normal distribution with mean weight and standard deviation std_dev
-    normal_distribution = np.random.normal(weight, std_dev, 100)
-
-    # Truncate the normal distribution to be between low and high
-    truncated_normal_distribution = np.clip(normal_distribution, low, high)
-
-    # Get a random number from the truncated normal distribution
-    return random.choice(truncated_normal_distribution).round()
+    # Get a random number from the truncated normal distribution, drawn ahead by the shared sampler
+    return np.round(sampler.sample(low, high, weight, std_dev, size))
 
 
 def event_happens(event: str) -> bool:
@@ -175,7 +173,7 @@ def event_happens(event: str) -> bool:
     if event not in EVENT_CHANCES:
         raise ValueError(f'{event} is not a valid event')
 
-    return random.randint(1, 100) <= EVENT_CHANCES[event]
+    return streams.chance('events', EVENT_CHANCES[event])
 
 
 def choose_role():
@@ -205,7 +203,7 @@ def choose_role():
         roles.extend([role] * chances)
 
     # Choose a random role
-    return random.choice(roles)
+    return streams.pick('staff', roles)
 
 
 def get_staff_needed(lunch_bookings: list[Booking], staff_members: StaffMembers, roles: Roles) -> list[StaffMember]:
@@ -221,7 +219,7 @@ def get_staff_needed(lunch_bookings: list[Booking], staff_members: StaffMembers,
     staff_needed = []
 
     # Get a member of staff to supervise
-    supervising_staff = [staff_members.get(role_id=roles.get(name=role_name)[0].id) for role_name in
+    supervising_staff = [staff_members.get(role_id=roles.first(name=role_name).id) for role_name in
                          ['supervisor', 'manager', 'superuser']]
 
     # Add the supervising staff to the staff needed
@@ -247,4 +245,4 @@ def get_random_booking_comment():
     Get a random booking comment
     :return: str: the random booking comment
     """
-    return random.choices(BOOKING_COMMENTS, weights=BOOKING_WEIGHTS)[0]
+    return streams.pick('bookings', BOOKING_COMMENTS, weights=BOOKING_WEIGHTS)
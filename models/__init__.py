@@ -5,6 +5,7 @@ This file is used to initialize the models directory as a package
 from .action import *
 from .approval import *
 from .bill import *
+from .billitem import *
 from .customer import *
 from .item import *
 from .seat import *
@@ -12,4 +13,5 @@ from .staff import *
 from .role import *
 from .shift import *
 from .menu import *
+from .menuitem import *
 from .bookings import *
@@ -1,9 +1,8 @@
 from sqlite3 import Cursor, Connection
 
 from constants import ACTION_TYPES
-from .approval import Approvals
 from .base import RowBase, TableBase
-from .staff import StaffMembers
+from .registry import RelatedTable
 
 ACTION_PERMISSIONS = {
     'create': ['manager', 'bartender', 'server', 'supervisor', 'superuser'],
@@ -21,13 +20,17 @@ class Action(RowBase):
     attributes = ['bill_id', 'staff_id', 'approved', 'approval_id', 'type', 'reason']
     table_name = 'action'
 
-    def __init__(self, aid: int, cur: Cursor, db: Connection) -> None:
-        self.TYPES = ACTION_TYPES
+    # Related rows, see RowMeta
+    row_state = ('_staff_member', '_approval')
 
-        super().__init__(aid, cur, db)
+    TYPES = ACTION_TYPES
 
-        self.__staff_members = StaffMembers(self.cur, self.db)
-        self.__approvals = Approvals(self.cur, self.db)
+    # Related tables
+    __staff_members = RelatedTable('StaffMembers')
+    __approvals = RelatedTable('Approvals')
+
+    def __init__(self, aid: int, cur: Cursor, db: Connection, row: tuple = None) -> None:
+        super().__init__(aid, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -42,17 +45,22 @@ class Action(RowBase):
         self.set_attribute('bill_id', new_bill_id)
 
     @property
-    def staff_member(self) -> int | None:
+    def staff_member(self):
         # If there is no staff member, return None
         if not self._staff_id:
             return None
 
-        return self.__staff_members.get(sid=self._staff_id)
+        # Use the staff member prefetched by get if it is still the row's staff member
+        staff_member = self.attached('staff_member', self._staff_id)
+        if staff_member is not None:
+            return staff_member
+
+        return self.__staff_members.find(self._staff_id)
 
     @staff_member.setter
     def staff_member(self, new_staff_id: int) -> None:
         # If there is no staff member with the new_staff_id, raise ValueError
-        staff_member = self.__staff_members.get(sid=new_staff_id)[0]
+        staff_member = self.__staff_members.first(sid=new_staff_id)
         if not staff_member:
             raise ValueError(f'Staff<{new_staff_id}> does not exist')
 
@@ -81,12 +89,17 @@ class Action(RowBase):
         if not self._approval_id or self._approval_id == 'NULL':
             return None
 
-        return self.__approvals.get(aid=self._approval_id)[0]
+        # Use the approval prefetched by get if it is still the row's approval
+        approval = self.attached('approval', self._approval_id)
+        if approval is not None:
+            return approval
+
+        return self.__approvals.find(self._approval_id)
 
     @approval.setter
     def approval(self, new_approval_id: int) -> None:
         # If there is no approval with the new_approval_id, raise ValueError
-        approval = self.__approvals.get(aid=new_approval_id)[0]
+        approval = self.__approvals.first(aid=new_approval_id)
         if not approval:
             raise ValueError(f'Approval<{new_approval_id}> does not exist')
 
@@ -123,6 +136,14 @@ class Action(RowBase):
 
 
 class Actions(TableBase):
+    indexes = [('bill_id',), ('staff_id',)]
+    relations = {'staff_member': ('staff_id', 'StaffMembers'), 'approval': ('approval_id', 'Approvals')}
+
+    TYPES = ACTION_TYPES
+
+    # Related tables
+    __staff_members = RelatedTable('StaffMembers')
+
     def create_table(self) -> None:
         self.cur.execute('''
             CREATE TABLE IF NOT EXISTS action (
@@ -145,37 +166,41 @@ class Actions(TableBase):
         print('Actions table created')
 
     def __init__(self, cur: Cursor, db: Connection) -> None:
-        self.TYPES = ACTION_TYPES
-        self.__staff_members = StaffMembers(cur, db)
         super().__init__(cur, db, 'action', Action)
 
-    def add(self, bill_id: int, staff_id: int, approved: bool, approval_id: int, action_type: str,
+    def add(self, bill_id: int, staff_id: int, approved: bool, approval_id: int | None, action_type: str,
             reason: str) -> Action:
+        new_action = self.add_many([dict(bill_id=bill_id, staff_id=staff_id, approved=approved,
+                                         approval_id=approval_id, action_type=action_type, reason=reason)])[0]
+
+        print(f'Action added to Bill<{bill_id}>')
+
+        return new_action
+
+    def validate_record(self, bill_id: int, staff_id: int, approved: bool, approval_id: int | None,
+                        action_type: str, reason: str) -> dict:
         # Validate types
         self.validate_types([(bill_id, int, 'bill_id'), (staff_id, int, 'staff_id'), (approved, bool, 'approved'),
-                        (approval_id, int, 'approval_id'), (action_type, str, 'type'), (reason, str, 'reason')])
+                        (action_type, str, 'type'), (reason, str, 'reason')])
+
+        # Actions which have not been approved have no approval, stored as NULL
+        if approval_id is not None:
+            self.validate_types([(approval_id, int, 'approval_id')])
 
         # If the type is not a valid type, raise ValueError
         if action_type not in self.TYPES:
             raise ValueError(f'Action type must be one of {self.TYPES}, not {action_type}')
 
         # Get the staff member
-        staff_member = self.__staff_members.get(sid=staff_id)[0]
+        staff_member = self.__staff_members.find(staff_id)
         if not staff_member:
             raise ValueError(f'Staff<{staff_id}> does not exist')
 
         if staff_member.role.name not in ACTION_PERMISSIONS[action_type]:
             raise ValueError(f'Staff<{staff_id}> does not have permission to perform action<{action_type}>')
 
-        self.cur.execute('''
-            INSERT INTO action (bill_id, staff_id, approved, approval_id, type, reason)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (bill_id, staff_id, approved, approval_id, action_type, reason))
-
-        self.db.commit()
-        print(f'Action added to Bill<{bill_id}>')
-
-        return self.get(bill_id=bill_id, staff_id=staff_id, type=action_type, reason=reason)[0]
+        return dict(bill_id=bill_id, staff_id=staff_id, approved=approved, approval_id=approval_id, type=action_type,
+                    reason=reason)
 
     @classmethod
     def add_action(cls, cur, db, bill_id, staff_id, approved, approval_id, action_type, reason):
@@ -10,8 +10,8 @@ class Approval(RowBase):
 
     attributes = ['staff_id', 'shift_id', 'action_id']
     table_name = 'approval'
-    def __init__(self, aid: int, cur, db) -> None:
-        super().__init__(aid, cur, db)
+    def __init__(self, aid: int, cur, db, row: tuple = None) -> None:
+        super().__init__(aid, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -64,6 +64,8 @@ class Approval(RowBase):
 
 
 class Approvals(TableBase):
+    aliases = {'aid': 'id'}
+
     def create_table(self):
         self.cur.execute('''
             CREATE TABLE IF NOT EXISTS approval (
@@ -85,6 +87,9 @@ class Approvals(TableBase):
         super().__init__(cur, db, 'approval', Approval)
 
     def add(self, staff_id: int, shift_id: int = 'NULL', action_id: int = 'NULL') -> Approval:
+        return self.add_many([dict(staff_id=staff_id, shift_id=shift_id, action_id=action_id)])[0]
+
+    def validate_record(self, staff_id: int, shift_id: int = 'NULL', action_id: int = 'NULL') -> dict:
         # Validate inputs
         self.validate_types([(staff_id, int, 'staff_id')])
 
@@ -100,14 +105,9 @@ class Approvals(TableBase):
         if action_id != 'NULL' and not self.row_exists('action', action_id):
             raise ValueError(f'Action<{action_id}> does not exist')
 
-        new_approval_id = self.cur.execute('''
-            INSERT INTO approval (staff_id, action_id)
-            VALUES (?, ?)
-        ''', (staff_id, action_id)).lastrowid
-
-        self.db.commit()
-
-        return Approval(new_approval_id, self.cur, self.db)
+        # Store the missing ids as NULL rather than the string 'NULL'
+        return dict(staff_id=staff_id, shift_id=None if shift_id == 'NULL' else shift_id,
+                    action_id=None if action_id == 'NULL' else action_id)
 
     def __repr__(self):
         return f'<Approvals rows={self.rows[0:3]}...>'
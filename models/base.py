@@ -1,8 +1,37 @@
 from abc import abstractmethod, ABC
 from datetime import datetime
-from sqlite3 import Cursor, Connection
+from sqlite3 import Cursor, Connection, IntegrityError
 
-class RowBase:
+from connector import Session, current_time, transaction
+from constants import MAX_QUERY_PARAMETERS, ROW_PAGE_SIZE
+from models.cache import query_cache
+from models.identity import identity_map
+from models.registry import TABLE_CLASSES, table_registry
+from models.schema import schema
+
+
+class RowMeta(type):
+    """
+    Metaclass for rows which gives each row class __slots__ for its columns, so rows are stored without a __dict__
+
+    A slot named _<column> is generated for each column in attributes, along with any names in row_state for other
+    values the class keeps on its rows, e.g. row_state = ('_total',)
+    """
+
+    def __new__(mcs, name: str, bases: tuple, namespace: dict):
+        if '__slots__' not in namespace:
+            # Slots already given to the row by its base classes
+            inherited = {slot for base in bases for cls in base.__mro__ for slot in getattr(cls, '__slots__', ())}
+
+            columns = [f'_{attribute}' for attribute in namespace.get('attributes', [])]
+            wanted = [*columns, *namespace.get('row_state', ())]
+
+            namespace['__slots__'] = tuple(dict.fromkeys(slot for slot in wanted if slot not in inherited))
+
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class RowBase(metaclass=RowMeta):
     """
     Base class for all rows in the database
 
@@ -12,12 +41,12 @@ class RowBase:
         Cursor to the database
     db : Connection
         Connection to the database
-    __table_name : str
+    table_name : str
         Name of the table in the database
     _id : int
         ID of the row in the table
-    _attributes : list
-        List of columns in the table
+    attributes : list
+        List of columns in the table, shared by every row of the class
 
     Methods
     -------
@@ -27,17 +56,28 @@ class RowBase:
     :returns None
     """
 
-    def __init__(self, row_id: int, cur: Cursor, db: Connection) -> None:
+    # _dirty holds the changes which have not been saved yet, by attribute, and _saved the values of the changed slots
+    # before them, until the changes are committed
+    __slots__ = ('cur', 'db', '_id', '_created_at', '_updated_at', '_dirty', '_saved')
+
+    # Columns of the table other than id, created_at and updated_at
+    attributes: list[str] = []
+
+    # Names of other values kept on the rows of a class, see RowMeta
+    row_state: tuple[str, ...] = ()
+
+    def __init__(self, row_id: int, cur: Cursor, db: Connection, row: tuple | None = None) -> None:
         """
         Initialise the RowBase class, setting the cursor and db, and setting the attributes of the row
 
         :param row_id: int ID of the row in the table
         :param cur: Cursor Cursor to the database
         :param db: Connection Connection to the database
+        :param row: tuple | None Values already fetched in the order of columns(), skips the SELECT if given
 
         :returns None
         """
-        from helper import table_exists, row_exists
+        from helper import row_exists
 
         # Validate types
         self.validate_types(
@@ -45,14 +85,10 @@ class RowBase:
              (self.table_name, str, 'table_name'),
              (self.attributes, list, 'attributes')])
 
-        # Check if the table exists
-        if not table_exists(self.table_name):
+        # Check if the table exists, from the schema the connection has already read
+        if not schema(db).table_exists(self.table_name):
             raise ValueError(f'Table {self.table_name} does not exist')
 
-        # Remove id, created_at, updated_at from attributes if they are present
-        check = ['id', 'created_at', 'updated_at']
-        self.attributes = [attribute for attribute in self.attributes if attribute not in check]
-
         # Check if the cursor is connected to the db
         if cur.connection is not db:
             raise ValueError('Cursor is not connected to the database')
@@ -61,31 +97,53 @@ class RowBase:
         self.cur = cur
         self.db = db
 
+        # Nothing has been changed yet, the dicts are only made once something is
+        self._dirty = None
+        self._saved = None
+
         # Check if the row exists
         if not row_exists(self.table_name, row_id):
             raise ValueError(f'{self.__class__.__name__}<{row_id}> does not exist')
 
-        # Set the table name and attributes
-        self.attributes = ['id', *self.attributes, 'created_at', 'updated_at']
-
-        # Set up attributes
-        query = f'SELECT {", ".join(self.attributes)} FROM {self.table_name} WHERE id = ?'
+        # If the row has not already been fetched by the table, fetch it
+        if row is None:
+            query = f'SELECT {", ".join(self.columns())} FROM {self.table_name} WHERE id = ?'
+            row = self.cur.execute(query, (row_id,)).fetchone()
 
-        try:
-            self._id, *self._attributes = self.cur.execute(query, (row_id,)).fetchone()
-        except TypeError:
+        if row is None:
             raise ValueError(f'{self.__class__.__name__}<{row_id}> does not exist')
 
+        self.load(row)
+
+    def load(self, row: tuple) -> None:
+        """
+        Set the attributes from values fetched for the row, e.g. to refresh a loaded row with newer values
+
+        :param row: tuple Values in the order of columns()
+        """
+        self._id, *values = row
+
         # set attributes
-        for i, attribute in enumerate(self.attributes[1:]):
+        for i, attribute in enumerate(self.columns()[1:]):
             try:
-                setattr(self, f'_{attribute}', self._attributes[i])
+                setattr(self, f'_{attribute}', values[i])
             except AttributeError as e:
                 if 'has no setter' in str(e):
                     print(f'{attribute} has no setter')
                     continue
                 raise e
 
+    @classmethod
+    def columns(cls) -> list[str]:
+        """
+        Get the columns fetched for a row, in the order the constructor expects them
+
+        :return list[str]: id, the attributes of the row, created_at and updated_at
+        """
+        check = ['id', 'created_at', 'updated_at']
+        return ['id', *[attribute for attribute in cls.attributes if attribute not in check], 'created_at',
+                'updated_at']
+
     def validate_types(self, types):
         from helper import validate_types
         validate_types(types)
@@ -94,6 +152,27 @@ class RowBase:
         from helper import row_exists
         return row_exists(table_name, row_id)
 
+    def attach(self, name: str, row: 'RowBase | None') -> None:
+        """
+        Attach a related row, e.g. one loaded by TableBase.prefetch, kept in the _<name> slot of the row
+
+        :param name: str Name of the relationship, e.g. customer
+        :param row: RowBase | None The related row, or None if there is none
+        """
+        setattr(self, f'_{name}', row)
+
+    def attached(self, name: str, row_id: int | None) -> 'RowBase | None':
+        """
+        Get a related row that has been attached, as long as it is still the row the foreign key refers to
+
+        :param name: str Name of the relationship, e.g. customer
+        :param row_id: int | None The foreign key, e.g. self.customer_id
+        :return RowBase | None: the related row, or None if it has not been attached
+        """
+        row = getattr(self, f'_{name}', None)
+
+        return row if row is not None and row.id == row_id else None
+
     def set_attribute(self, attribute: str, new_value: any) -> None:
         """
         Set the value of an attribute in the row
@@ -113,76 +192,123 @@ class RowBase:
             print(f'{self.__class__.__name__}<{self._id}> {attribute} is already {new_value}')
             return
 
-        # Update the attribute
-        query = f'''
-            UPDATE {self.__table_name}
-            SET 
-                {attribute} = ?,
-                updated_at = ?
-            WHERE id = ?
-        '''
-        self.cur.execute(query, (new_value, datetime.now(), self._id))
-        self.db.commit()
+        # Keep the value from before the first change, so it can be put back if the change is not saved
+        if hasattr(self, f'_{attribute}'):
+            if self._saved is None:
+                self._saved = {}
+            self._saved.setdefault(f'_{attribute}', getattr(self, f'_{attribute}'))
 
         # Update the attribute in the object
         setattr(self, f'_{attribute}', new_value if new_value is not None else None) \
             if hasattr(self, f'_{attribute}') else setattr(self, attribute, new_value)
 
-        # Update the updated_at attribute
-        self._updated_at = datetime.now()
+        # Record the change, changing the same attribute again before saving only writes the last value
+        if self._dirty is None:
+            self._dirty = {}
+        self._dirty[attribute] = new_value
+
+        # Make this object the one loaded for the row, so no other object for it can hold the old value
+        identity_map(self.db).add(self)
+
+        # Cached results of the table may no longer match the row
+        query_cache(self.db).invalidate(self.table_name)
+
+        # Inside a unit of work the row is saved when the transaction ends, otherwise it is saved straight away
+        if not (isinstance(self.db, Session) and self.db.defer_save(self)):
+            self.save()
 
         print(f'{self.__class__.__name__}<{self._id}> {attribute} updated')
 
         return new_value
 
     @property
-    def created_at(self) -> datetime:
+    def dirty(self) -> dict:
         """
-        Property initiation for the created_at datetime
+        The changes which have not been saved yet
+
+        :return dict: the new values by attribute
         """
-        return datetime.strptime(self._created_at, '%Y-%m-%d %H:%M:%S') if type(
-            self._created_at) is str else self._created_at
+        return dict(self._dirty or {})
 
-    @created_at.setter
-    def created_at(self, new_created_at: datetime | str) -> None:
+    def discard_changes(self) -> None:
         """
-        Updates the created_at of the Bill by ID
+        Forget the changes and put back the values from before them, e.g. after the transaction they were made in has
+        been rolled back
         """
-        new_created_at = new_created_at[0: new_created_at.rfind('.')]
-        if type(new_created_at) is str:
-            new_created_at = datetime.strptime(new_created_at, '%Y-%m-%d %H:%M:%S')
-        # Validate types
-        self.validate_types([(new_created_at, datetime, 'new_created_at')])
+        for slot, value in (self._saved or {}).items():
+            setattr(self, slot, value)
+
+        self._dirty = None
+        self._saved = None
 
-        # If new_created_at is in the future, raise a ValueError
-        if new_created_at > datetime.now():
-            raise ValueError(f'Created at must be in the past, not {new_created_at}')
+    def mark_committed(self) -> None:
+        """
+        Forget the values from before the changes, once the changes have been committed
+        """
+        self._saved = None
+
+    def save(self) -> None:
+        """
+        Write every unsaved change to the row in one UPDATE, if the write fails the changes are discarded
+        """
+        # If nothing has changed, there is nothing to write
+        if not self._dirty:
+            return
+
+        # The row is always marked as updated now, unless updated_at itself was changed
+        updated_at = self._dirty.get('updated_at', current_time(self.db))
+        changes = {attribute: value for attribute, value in self._dirty.items() if attribute != 'updated_at'}
+
+        try:
+            assignments = ''.join(f'{attribute} = ?, ' for attribute in changes)
+            self.cur.execute(f'UPDATE {self.table_name} SET {assignments}updated_at = ? WHERE id = ?',
+                             (*changes.values(), updated_at, self._id))
+            self.db.commit()
+        except BaseException:
+            self.discard_changes()
+            raise
 
-        self.set_attribute('created_at', new_created_at)
+        self._dirty = None
+
+        # Update the updated_at attribute
+        if self._saved is None:
+            self._saved = {}
+        self._saved.setdefault('_updated_at', self._updated_at)
+        self._updated_at = updated_at
+
+        # Inside a unit of work the old values are kept until it commits, so they can be put back if it rolls back
+        if not (isinstance(self.db, Session) and self.db.defer_save(self)):
+            self.mark_committed()
+
+        # Forget the results read before the row was written
+        query_cache(self.db).invalidate(self.table_name)
+
+    @property
+    def created_at(self) -> datetime:
+        """
+        Property initiation for the created_at datetime, parsed when the row was fetched. Set by the database when the
+        row is added, so it can not be changed
+        """
+        return self._created_at
 
     @property
     def updated_at(self) -> datetime:
         """
-        Property initiation for the updated_at datetime
+        Property initiation for the updated_at datetime, parsed when the row was fetched
         """
-        return self._updated_at if type(
-            self._updated_at
-        ) is not str else datetime.strptime(self._updated_at, '%Y-%m-%d %H:%M:%S')
+        return self._updated_at
 
     # I dont think this is needed because it is always updated anyway
     @updated_at.setter
-    def updated_at(self, new_updated_at: datetime | str) -> None:
+    def updated_at(self, new_updated_at: datetime) -> None:
         """
         Updates the updated_at of the Bill by ID
         """
-        new_updated_at = new_updated_at[0: new_updated_at.rfind('.')]
-        if type(new_updated_at) is str:
-            new_updated_at = datetime.strptime(new_updated_at, '%Y-%m-%d %H:%M:%S')
-        # Validate types
+        # Validate types, timestamps are parsed when rows are fetched so strings are not accepted
         self.validate_types([(new_updated_at, datetime, 'new_updated_at')])
 
         # If new_updated_at is in the future, raise a ValueError
-        if new_updated_at > datetime.now():
+        if new_updated_at > current_time(self.db):
             raise ValueError(f'Updated at must be in the past, not {new_updated_at}')
 
         self.set_attribute('updated_at', new_updated_at)
@@ -190,14 +316,114 @@ class RowBase:
     def __hash__(self):
         return hash(self._id)
 
-    def __del__(self):
-        self.cur.execute(f"DELETE FROM {self.table_name} WHERE id = {self._id}")
+
+class LazyRows:
+    """
+    Lazy collection of the rows in a table, rows are only fetched when they are iterated over or indexed
+
+    Attributes
+    ----------
+    table : TableBase
+        Table the rows belong to
+    page_size : int
+        Number of rows fetched with each query when iterating
+
+    :returns None
+    """
+
+    def __init__(self, table: 'TableBase', page_size: int = ROW_PAGE_SIZE) -> None:
+        """
+        Initialise the LazyRows class, no queries are run until the rows are used
+
+        :param table: TableBase Table the rows belong to
+        :param page_size: int Number of rows fetched with each query when iterating
+        """
+        self.table = table
+        self.page_size = page_size
+
+    def __iter__(self):
+        # Stream the table a page at a time
+        return self.table.iter_rows(batch_size=self.page_size)
+
+    def __len__(self) -> int:
+        return self.table.count()
+
+    def __bool__(self) -> bool:
+        return self.table.exists()
+
+    def __getitem__(self, index: int | slice) -> RowBase | list[RowBase]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+
+            # Only contiguous slices can be pushed down to LIMIT and OFFSET
+            if step != 1:
+                return list(self)[index]
+
+            return self.table.fetch('ORDER BY id LIMIT ? OFFSET ?', (max(stop - start, 0), start))
+
+        self.validate_types([(index, int, 'index')])
+
+        # Support negative indexes like a list
+        if index < 0:
+            index += len(self)
+
+        rows = self.table.fetch('ORDER BY id LIMIT 1 OFFSET ?', (index,)) if index >= 0 else []
+
+        if not rows:
+            raise IndexError(f'{self.table.table_name} index out of range')
+
+        return rows[0]
+
+    def __contains__(self, row) -> bool:
+        # Only rows of this table can be in the collection
+        if not isinstance(row, self.table.RowClass):
+            return False
+
+        rows = self.table.fetch('WHERE id = ?', (row.id,))
+
+        return bool(rows) and rows[0] == row
+
+    def clear(self) -> None:
+        """
+        The rows are a view of the table so they can not be cleared on their own, TableBase.clear deletes them
+        """
+        raise TypeError(f'The rows of {self.table.table_name} can not be cleared, use '
+                        f'{self.table.__class__.__name__}.clear() to delete them')
+
+    def validate_types(self, types):
+        from helper import validate_types
+        validate_types(types)
+
+    def __repr__(self) -> str:
+        return f'<LazyRows table={self.table.table_name} page_size={self.page_size}>'
 
 
 class TableBase(ABC):
+    # Short names that can be used for columns in get(), e.g. {'bid': 'id'}
+    aliases: dict[str, str] = {}
+
+    # Columns to index, one tuple of columns per index, e.g. [('bill_id',)]. Created with the table
+    indexes: list[tuple[str, ...]] = []
+
+    # Natural keys, one tuple of columns per key, e.g. [('name',)]. Created with the table as unique indexes, the
+    # first key is the one upsert_many matches rows on
+    unique: list[tuple[str, ...]] = []
+
+    # Whether the results of get() and count() are kept in the connection's query cache, see models.cache
+    cache_results: bool = False
+
+    # Related rows get() can prefetch, by name of the relationship, as (foreign key, table class name)
+    # e.g. {'customer': ('customer_id', 'Customers')}, attached to the _<name> slot of each row
+    relations: dict[str, tuple[str, str]] = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # Register the table so rows can reach it through models.registry.RelatedTable
+        TABLE_CLASSES[cls.__name__] = cls
+
     def __init__(self, cur: Cursor, db: Connection, table_name: str, RowClass: any, rid_attr_name: str = 'id') -> None:
         # Validate types of cur and db
-        from helper import table_exists
         self.validate_types([(cur, Cursor, 'cur'), (db, Connection, 'db'), (table_name, str, 'table_name'),
                         (rid_attr_name, str, 'rid_attr_name')])
 
@@ -207,14 +433,6 @@ class TableBase(ABC):
 
         self.RowClass = RowClass
 
-        # Check if the rid_attr_name is a valid attribute
-        if rid_attr_name not in [attr for attr in dir(self.RowClass) if
-                                 not callable(getattr(self.RowClass, attr))]:
-            raise ValueError(f'{rid_attr_name} is not a valid attribute of {self.RowClass.__class__.__name__}')
-
-        # Set the rid_attr_name
-        self.__rid_attr_name = rid_attr_name
-
         # Check the cursor is connected to the database
         if not cur.connection:
             raise ConnectionError('Cursor is not connected to the database')
@@ -227,11 +445,119 @@ class TableBase(ABC):
         self.table_name = table_name
 
         # Check if the table exists
-        if not table_exists(table_name):
+        if not schema(db).table_exists(table_name):
             self.create_table()
 
-        self._rows = [RowClass(x[0], self.cur, self.db) for x in
-                      self.cur.execute(f'SELECT id FROM {table_name}').fetchall()]
+            # Read the schema again now the table has been created
+            schema(db).refresh()
+
+        # Check if the rid_attr_name is a column of the table
+        if rid_attr_name not in self.columns:
+            raise ValueError(f'{rid_attr_name} is not a column of {table_name}')
+
+        # Set the rid_attr_name
+        self.__rid_attr_name = rid_attr_name
+
+        # Create any indexes missing from the table, e.g. ones declared after the table was created
+        self.create_indexes()
+
+    @property
+    def columns(self) -> list[str]:
+        """
+        Get the columns of the table in the database, from the schema the connection has already read
+        :return list[str]: the columns
+        """
+        return schema(self.db).columns(self.table_name)
+
+    def validate_filters(self, filters: dict) -> None:
+        """
+        Check that every filter of get() is a column of the table or a property of its rows
+        :param filters: dict: the filters passed to get()
+        :return: None
+        """
+        from models.query import resolve_column
+
+        for key in filters:
+            column = resolve_column(key, self.RowClass.columns(), self.aliases)
+
+            # Columns are filtered on in SQL, so they have to be in the table
+            if column is not None:
+                if column not in self.columns:
+                    raise ValueError(f'{column} is not a column of {self.table_name}')
+                continue
+
+            # Anything else is checked on the rows, e.g. created_between on created_at
+            base = key[:-len('_between')] if key.endswith('_between') else key
+            if not any(hasattr(self.RowClass, name) for name in [base, f'{base}_at']):
+                raise ValueError(f'{key} is not a column of {self.table_name} or a property of '
+                                 f'{self.RowClass.__name__}')
+
+    def create_indexes(self) -> None:
+        """
+        Create the indexes declared in indexes and unique, indexes which already exist are left as they are
+        :return: None
+        """
+        for columns in self.indexes:
+            self.cur.execute(f'''
+                CREATE INDEX IF NOT EXISTS {self.table_name}_{"_".join(columns)}_index
+                ON {self.table_name} ({", ".join(columns)})
+            ''')
+
+        for columns in self.unique:
+            try:
+                self.cur.execute(f'''
+                    CREATE UNIQUE INDEX IF NOT EXISTS {self.table_name}_{"_".join(columns)}_unique
+                    ON {self.table_name} ({", ".join(columns)})
+                ''')
+            except IntegrityError:
+                # Rows added before the key was declared may share it, they are kept as other rows may refer to them,
+                # upsert_many matches them without the index instead
+                print(f'Table {self.table_name} has rows with the same {", ".join(columns)}, they have to be merged '
+                      f'by hand before the unique index can be created')
+
+    def has_unique_index(self, columns: tuple[str, ...]) -> bool:
+        """
+        Check if the table has a unique index on exactly these columns, which ON CONFLICT needs to match rows
+        :param columns: tuple[str, ...]: the columns of the key
+        :return bool: True if the index exists, False otherwise
+        """
+        # Each index is (seq, name, unique, origin, partial) and each of its columns (seqno, cid, name)
+        return any(index[2] and [column[2] for column in self.cur.execute(f"PRAGMA index_info('{index[1]}')")]
+                   == list(columns) for index in self.cur.execute(f'PRAGMA index_list({self.table_name})').fetchall())
+
+    def query_plan(self, match_all: bool = False, **kwargs) -> list[str]:
+        """
+        Get how SQLite would run the query get() makes for the same filters
+        :param match_all: bool, whether to find the intersection (True) or union (False: default)
+        :param kwargs: the filters, as for get()
+        :return list[str]: the steps of the query plan, e.g. ['SEARCH bill_item USING INDEX ... (bill_id=?)']
+        """
+        from models.query import compile_filters
+
+        query = compile_filters(self.RowClass.columns(), self.aliases, match_all, kwargs)
+        where = f'WHERE {query.where}' if query.where else ''
+        columns = ', '.join(self.RowClass.columns())
+
+        plan = self.cur.execute(f'EXPLAIN QUERY PLAN SELECT {columns} FROM {self.table_name} {where} ORDER BY id',
+                                query.params).fetchall()
+
+        # Each step is (id, parent, unused, detail)
+        return [step[3] for step in plan]
+
+    def missing_indexes(self) -> list[str]:
+        """
+        Get the columns that get() can only filter on by scanning the whole table, checked for the foreign keys and
+        the columns in indexes
+        :return list[str]: the columns without a usable index
+        """
+        # The columns that rows are looked up by, foreign keys the rows do not load can not be filtered on by get()
+        columns = [key[3] for key in self.cur.execute(f'PRAGMA foreign_key_list({self.table_name})').fetchall()
+                   if key[3] in self.RowClass.columns()]
+        columns += [index[0] for index in self.indexes if index[0] not in columns]
+
+        # A column is missing an index if filtering on it scans the table
+        return [column for column in columns if
+                any(step.startswith('SCAN') for step in self.query_plan(**{column: 0}))]
 
     def validate_types(self, types):
         from helper import validate_types
@@ -243,99 +569,366 @@ class TableBase(ABC):
         return row_exists(table_name, row_id)
 
     @property
-    def rows(self) -> list[RowBase]:
-        return self._rows
+    def rows(self) -> LazyRows:
+        """
+        Get the rows of the table, they are fetched a page at a time when they are used
+
+        :return LazyRows: the rows of the table
+        """
+        return LazyRows(self)
+
+    def hydrate(self, row: tuple) -> RowBase:
+        """
+        Get the RowClass object for values that have already been fetched
 
-    @rows.getter
-    def rows(self) -> list[RowBase]:
-        return [self.RowClass(x[0], self.cur, self.db) for x in
-                self.cur.execute(f'SELECT id FROM {self.table_name}').fetchall()]
+        If the row has already been loaded through this connection, that object is returned instead of a new one, with
+        the values just fetched unless it has changes which have not been saved yet
 
-    @rows.setter
-    def rows(self, new_items: list) -> None:
-        self._rows = new_items
+        :param row: tuple Values in the order of RowClass.columns()
+        :return RowBase: the row object
+        """
+        identity = identity_map(self.db)
 
-    def __handle_between_dates(self, key, value):
-        start, end = value
-        self.validate_types([(start, datetime, 'start'), (end, datetime, 'end')])
+        # Check if the row has already been loaded, another connection may have changed it since
+        loaded = identity.get(self.table_name, row[0])
+        if loaded is not None:
+            if not loaded.dirty:
+                loaded.load(row)
 
-        # If the end is before the start, raise a ValueError
-        if start > end:
-            raise ValueError('Start date must be before end date')
+            return loaded
 
-        return [row for row in self.rows if start <= getattr(row, f'{key.split('_')[0]}') <= end]
+        new_row = self.RowClass(row[0], self.cur, self.db, row=row)
+        identity.add(new_row)
 
+        return new_row
 
+    def find(self, rid: int) -> RowBase | None:
+        """
+        Get a row by its id, without querying the database if it has already been loaded
+
+        A row which has already been loaded is returned as it is, so it may not have changes other connections have
+        committed since. Use get() or fetch() to read the row again
+        :param rid: int: id of the row
+        :return RowClass | None: the row, or None if it does not exist
+        """
+        # If the id is NULL, there is no row
+        if rid is None or rid == 'NULL':
+            return None
 
-    def get(self, match_all: bool = False, **kwargs):
+        loaded = identity_map(self.db).get(self.table_name, rid)
+        if loaded is not None:
+            return loaded
+
+        rows = self.fetch('WHERE id = ?', (rid,))
+
+        return rows[0] if rows else None
+
+    def find_many(self, rids) -> dict[int, RowBase]:
+        """
+        Get rows by their ids, rows which have already been loaded are not queried again, as in find()
+        :param rids: Iterable[int]: ids of the rows
+        :return dict[int, RowClass]: the rows that exist, by id
+        """
+        identity = identity_map(self.db)
+
+        found = {}
+        missing = []
+        for rid in set(rids) - {None, 'NULL'}:
+            loaded = identity.get(self.table_name, rid)
+            if loaded is not None:
+                found[rid] = loaded
+            else:
+                missing.append(rid)
+
+        # Fetch the rest in batches, SQLite limits how many parameters a query can have
+        for start in range(0, len(missing), ROW_PAGE_SIZE):
+            batch = missing[start:start + ROW_PAGE_SIZE]
+            for row in self.fetch(f'WHERE id IN ({", ".join("?" * len(batch))})', tuple(batch)):
+                found[row.id] = row
+
+        return found
+
+    def prefetch(self, rows: list[RowBase], relations: list[str]) -> list[RowBase]:
+        """
+        Load the related rows of rows with one query per relationship and attach them, so using them does not query
+        the database for each row
+        :param rows: list[RowClass]: the rows
+        :param relations: list[str]: names of the relationships in relations, e.g. ['customer', 'seat']
+        :return list[RowClass]: the rows
+        """
+        for name in relations:
+            # If the relationship is not declared, raise ValueError
+            if name not in self.relations:
+                raise ValueError(f'{self.__class__.__name__} can not prefetch {name}, expected one of '
+                                 f'{", ".join(self.relations)}')
+
+            column, table = self.relations[name]
+            related = table_registry(self.cur, self.db)[table].find_many(getattr(row, f'_{column}') for row in rows)
+
+            for row in rows:
+                row.attach(name, related.get(getattr(row, f'_{column}')))
+
+        return rows
+
+    def fetch(self, clause: str = '', params: tuple = ()) -> list[RowBase]:
+        """
+        Fetch and hydrate the rows matching an SQL clause in one query
+        :param clause: str: SQL appended after the FROM clause, e.g. 'WHERE id > ? ORDER BY id'
+        :param params: tuple: parameters for the clause
+        :return list[RowClass]: the hydrated rows
+        """
+        columns = ', '.join(self.RowClass.columns())
+        query = f'SELECT {columns} FROM {self.table_name} {clause}'
+
+        return [self.hydrate(row) for row in self.cur.execute(query, params).fetchall()]
+
+    def get(self, match_all: bool = False, prefetch: list[str] = None, **kwargs):
         """
         Get a row from the table by the attributes
         :param match_all: bool, whether to find the intersection (True) or union (False: default)
+        :param prefetch: list[str], related rows to load with the rows, e.g. ['customer', 'seat'], see relations
         :param kwargs: the value to search for (name='John') for example
                 If kwargs contains a key that ends with '_between', the value should be a tuple of two values,
                 it will check if the value is between the two values in format (start, end)
+                Keys can also be one of the table's aliases (bid='id' for example)
         :return list[RowClass]: list of rows that match the search
         """
-        from helper import walking_binary_search
+        from models.query import matches_python_filter
+
+        # Load the related rows of the results in one query per relationship
+        if prefetch:
+            return self.prefetch(list(self.get(match_all, **kwargs)), prefetch)
 
         # If there are no kwargs, return all the rows
         if not kwargs:
+            self.flush()
+
+            # Cached tables keep every row in memory, otherwise they are fetched a page at a time when used
+            if self.cache_results:
+                return list(self.cached(('rows',), lambda: list(self.rows)))
+
             return self.rows
 
-        # Initialise the final matches set
-        final_matches = set()
+        query = self.compile_get(match_all, kwargs)
 
-        # Set ran through to default as False
-        ran_through = False
+        # If every filter is a column, the database does all the work
+        if not query.python_filters:
+            return list(self.cached(('get', query.where, query.params),
+                                    lambda: self.fetch(f'WHERE {query.where} ORDER BY id', query.params)))
 
-        # Set up a fake rows variable for sorting
-        temp_rows = self.rows
+        # Filters on computed properties (Bill.total for example) have to be checked on the rows themselves
+        if match_all:
+            # Only check the rows that matched the column filters
+            candidates = self.fetch(f'WHERE {query.where} ORDER BY id', query.params) if query.where else self.rows
 
-        # Loop through items in kwargs
-        for key, value in kwargs.items():
-            # Check if the key is 'created_between' etc
-            between_dates = key.endswith('_between')
+            return [row for row in candidates if
+                    all(matches_python_filter(row, key, value) for key, value in query.python_filters)]
 
-            # Sort by the key
-            temp_rows.sort(key=lambda x: getattr(x, key))
+        # Set notation: final_matches = column_matches ∪ property_matches
+        final_matches = {row.id: row for row in self.fetch(f'WHERE {query.where}', query.params)} \
+            if query.where else {}
 
-            # If between_dates is True, handle the between dates
-            if between_dates:
-                new_matches = self.__handle_between_dates(key, value)
-            else:
-                # Get all matching values using a walking binary search. See document for flowchart
-                new_matches = walking_binary_search(temp_rows, key, value)
+        for row in self.rows:
+            if row.id not in final_matches and any(
+                    matches_python_filter(row, key, value) for key, value in query.python_filters):
+                final_matches[row.id] = row
+
+        # Return the final matches as a list in id order
+        return [final_matches[rid] for rid in sorted(final_matches)]
+
+    def compile_get(self, match_all: bool, filters: dict):
+        """
+        Compile the filters of get(), first() or exists() into one WHERE clause, the same filters always compile to
+        the same query
+        :param match_all: bool: whether to find the intersection (True) or union (False) of the filters
+        :param filters: dict: the filters, as for get()
+        :return CompiledQuery: the WHERE clause, its parameters and the filters that are not columns
+        """
+        from models.query import compile_filters, normalise_filters
+
+        # If a filter is not a column or a property, raise ValueError
+        self.validate_filters(filters)
+
+        # The query has to see the changes still waiting for the transaction to end
+        self.flush()
+
+        columns = self.RowClass.columns()
+
+        return compile_filters(columns, self.aliases, match_all, normalise_filters(filters, columns, self.aliases))
+
+    def first(self, match_all: bool = True, **kwargs) -> RowBase | None:
+        """
+        Get the first row, by id, that matches the filters, only that row is fetched
+        :param match_all: bool, whether to find the intersection (True: default) or union (False)
+        :param kwargs: the filters, as for get()
+        :return RowClass | None: the row, or None if no row matches
+        """
+        query = self.compile_get(match_all, kwargs)
+
+        # Filters on computed properties have to be checked on the rows themselves
+        if query.python_filters:
+            return next(iter(self.get(match_all, **kwargs)), None)
+
+        where = f'WHERE {query.where}' if query.where else ''
+        rows = self.cached(('first', query.where, query.params),
+                           lambda: self.fetch(f'{where} ORDER BY id LIMIT 1', query.params))
+
+        return rows[0] if rows else None
+
+    def exists(self, match_all: bool = True, **kwargs) -> bool:
+        """
+        Check if any row matches the filters, without fetching the rows
+        :param match_all: bool, whether to find the intersection (True: default) or union (False)
+        :param kwargs: the filters, as for get(), no filters checks if the table has any rows
+        :return bool: True if a row matches, False otherwise
+        """
+        query = self.compile_get(match_all, kwargs)
+
+        # Filters on computed properties have to be checked on the rows themselves
+        if query.python_filters:
+            return self.first(match_all, **kwargs) is not None
+
+        where = f'WHERE {query.where}' if query.where else ''
+
+        return self.cached(('exists', query.where, query.params),
+                           lambda: self.cur.execute(f'SELECT 1 FROM {self.table_name} {where} LIMIT 1',
+                                                    query.params).fetchone() is not None)
+
+    def cached(self, query: tuple, load):
+        """
+        Get the result of a query from the connection's query cache if the table caches its results
+        :param query: tuple: the normalised query, e.g. ('get', 'name = ?', ('John',))
+        :param load: Callable: runs the query
+        :return: the result
+        """
+        if not self.cache_results:
+            return load()
+
+        return query_cache(self.db).get_or_load(self.table_name, query, load)
+
+    def flush(self) -> None:
+        """
+        Save the rows of the table changed in the open transactions, before a query reads the table
+        """
+        if isinstance(self.db, Session):
+            self.db.flush(self.table_name)
+
+    def compile_where(self, where: dict | str | None, params: tuple = ()) -> tuple[str, tuple]:
+        """
+        Compile the where of select or iter_rows into a WHERE clause
+        :param where: dict | str | None: filters on columns as for get(match_all=True), or an SQL condition using ?
+                placeholders for params
+        :param params: tuple: the parameters for an SQL where
+        :return tuple[str, tuple]: the WHERE clause, or an empty string if there is no where, and its parameters
+        """
+        from models.query import compile_filters
+
+        # Validate types
+        self.validate_types([(params, tuple, 'params')])
+
+        # The query has to see the changes still waiting for the transaction to end
+        self.flush()
+
+        # Filters given as a dict are compiled like get()
+        if isinstance(where, dict):
+            query = compile_filters(self.RowClass.columns(), self.aliases, True, where)
+
+            # Computed properties need the RowClass objects, which the query can not check
+            if query.python_filters:
+                raise ValueError(f'{", ".join(key for key, _ in query.python_filters)} can not be filtered on in '
+                                 f'SQL, only columns can')
+
+            where, params = query.where, query.params
+
+        return (f'WHERE {where}', params) if where else ('', params)
+
+    def iter_rows(self, batch_size: int = ROW_PAGE_SIZE, where: dict | str = None, params: tuple = ()):
+        """
+        Stream the rows in id order, fetching batch_size rows at a time so only one batch is held in memory
+        :param batch_size: int: the number of rows fetched at a time
+        :param where: dict | str: filters on columns as for get(match_all=True), e.g. {'bid': 1}, or an SQL condition
+                using ? placeholders for params
+        :param params: tuple: the parameters for an SQL where
+        :return Iterator[RowClass]: the rows
+        """
+        self.validate_types([(batch_size, int, 'batch_size')])
+
+        # If batch_size is less than 1, raise ValueError
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be at least 1, not {batch_size}')
+
+        where, params = self.compile_where(where, params)
+        columns = ', '.join(self.RowClass.columns())
 
-                if match_all:
-                    # If you have searched temp_rows and found nothing on the first iteration, return an empty list
-                    if not final_matches and ran_through:
-                        return []
+        # Use a cursor of its own so queries run while streaming do not replace the results
+        cursor = self.db.cursor()
+        cursor.arraysize = batch_size
+
+        try:
+            cursor.execute(f'SELECT {columns} FROM {self.table_name} {where} ORDER BY id', params)
+
+            while batch := cursor.fetchmany():
+                for row in batch:
+                    yield self.hydrate(row)
+        finally:
+            cursor.close()
+
+    def select(self, fields: list[str] = None, where: dict | str = None, params: tuple = (),
+               order_by: str | list[str] = 'id', limit: int = None, row_type: str = 'tuple') -> list:
+        """
+        Get only some columns of the rows, straight from the cursor without building RowClass objects
+        :param fields: list[str]: the columns (or aliases) to get, e.g. ['id', 'name'], defaults to every column
+        :param where: dict | str: filters on columns as for get(match_all=True), e.g. {'bid': 1}, or an SQL condition
+                using ? placeholders for params, e.g. 'quantity > ?'
+        :param params: tuple: the parameters for an SQL where
+        :param order_by: str | list[str]: the columns to sort by, start a column with - to sort it descending
+        :param limit: int: the most records to get
+        :param row_type: str: 'tuple', 'namedtuple' or 'dict'
+        :return list: the records
+        """
+        from models.query import compile_fields, compile_order_by, record_type
 
-                    # If you have not ran through the loop, set the final matches to the new matches
-                    # Otherwise, set the final matches to the intersection of the final matches and the new matches
-                    # Set notation: final_matches = final_matches ∩ new_matches
-                    final_matches = final_matches & set(new_matches) if ran_through else set(new_matches)
+        columns = self.RowClass.columns()
+        fields = compile_fields(fields or columns, columns, self.aliases)
 
-                    # Set the temp_rows to the final_matches to limit the search space
-                    temp_rows = list(final_matches)
+        if limit is not None:
+            self.validate_types([(limit, int, 'limit')])
 
-                    # Set ran_through to True
-                    ran_through = True
-                else:
-                    # Set final_matches to the union of the final matches and the new matches
-                    # Set notation: final_matches = final_matches ∪ new_matches
-                    final_matches |= set(new_matches)
+        if row_type not in ['tuple', 'namedtuple', 'dict']:
+            raise ValueError(f"row_type must be one of tuple, namedtuple, dict, not {row_type}")
 
-        # Return the final matches as a list
-        return list(final_matches)
+        where, params = self.compile_where(where, params)
+
+        clauses = [where, compile_order_by(order_by, columns, self.aliases)]
+        if limit is not None:
+            clauses.append('LIMIT ?')
+            params = (*params, limit)
+
+        records = self.cur.execute(f'SELECT {", ".join(fields)} FROM {self.table_name} {" ".join(clauses)}',
+                                   params).fetchall()
+
+        if row_type == 'namedtuple':
+            Record = record_type(self.table_name, tuple(fields))
+            return [Record._make(record) for record in records]
+
+        if row_type == 'dict':
+            return [dict(zip(fields, record)) for record in records]
+
+        return records
 
     def clear(self):
         self.cur.execute(f"DELETE FROM {self.table_name}")
         self.db.commit()
-        self._rows = []
+
+        # Forget the deleted rows
+        identity_map(self.db).discard_table(self.table_name)
+        query_cache(self.db).invalidate(self.table_name)
 
     def count(self):
-        return self.cur.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()[0]
+        self.flush()
+
+        return self.cached(('count',),
+                           lambda: self.cur.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()[0])
 
     def delete(self, rid) -> None:
         """
@@ -353,13 +946,194 @@ class TableBase(ABC):
         self.cur.execute(f"DELETE FROM {self.table_name} WHERE id = {rid}")
         self.db.commit()
 
-        # Update the rows
-        self.rows = [row for row in self.rows if getattr(row, self.__rid_attr_name) != rid]
+        # Forget the deleted row
+        identity_map(self.db).discard(self.table_name, rid)
+        query_cache(self.db).invalidate(self.table_name)
 
     def drop_table(self):
         self.cur.execute(f"DROP TABLE IF EXISTS {self.table_name}")
         self.db.commit()
-        self._rows = []
+
+        # Read the schema again now the table has gone
+        schema(self.db).refresh()
+
+        # Forget the dropped rows
+        identity_map(self.db).discard_table(self.table_name)
+        query_cache(self.db).invalidate(self.table_name)
+
+    def validate_record(self, **kwargs) -> dict:
+        """
+        Validate the arguments of add() for one row, tables override this to check the values themselves
+        :param kwargs: the arguments of add()
+        :return dict: the values to insert by column
+        """
+        # If an argument is not a column of the rows, raise ValueError
+        unknown = [key for key in kwargs if key not in self.RowClass.attributes]
+        if unknown:
+            raise ValueError(f'{", ".join(unknown)} is not a column of {self.table_name}')
+
+        return dict(kwargs)
+
+    def validate_records(self, records: list[dict]) -> None:
+        """
+        Validate rows that can only be checked together, e.g. unique names, before any are added
+        :param records: list[dict]: the values to insert by column, from validate_record
+        :return: None
+        """
+        pass
+
+    def add_many(self, records: list[dict]) -> list[RowBase]:
+        """
+        Add many rows in one transaction
+        :param records: list[dict]: the arguments of add() for each row
+        :return list[RowClass]: the new rows, in the same order as records
+        """
+        # If there are no records, there is nothing to add
+        if not records:
+            return []
+
+        # Validate every record before anything is written
+        values = [self.validate_record(**record) for record in records]
+        self.validate_records(values)
+
+        # Stamp the rows with the connection's clock, rather than the time the database writes them at
+        stamp = current_time(self.db)
+        values = [{'created_at': stamp, 'updated_at': stamp, **value} for value in values]
+
+        # Records may leave out optional columns, which are added as NULL
+        columns = list(dict.fromkeys(column for value in values for column in value))
+        placeholders = f'({", ".join("?" * len(columns))})'
+
+        # Each INSERT adds as many rows as it can have parameters for
+        batch_size = max(MAX_QUERY_PARAMETERS // len(columns), 1)
+
+        ids = []
+        with transaction(self.db):
+            for start in range(0, len(values), batch_size):
+                batch = values[start:start + batch_size]
+                added = self.cur.execute(f'''
+                    INSERT INTO {self.table_name} ({", ".join(columns)}) VALUES {", ".join([placeholders] * len(batch))}
+                    RETURNING id
+                ''', tuple(value.get(column) for value in batch for column in columns)).fetchall()
+
+                # RETURNING does not keep the order of the rows, but one INSERT gives its rows increasing ids, so the
+                # ids in order are the rows in the order of the records
+                ids += sorted(rid for rid, in added)
+
+        # Forget the results read before the rows were added
+        query_cache(self.db).invalidate(self.table_name)
+
+        rows = self.find_many(ids)
+
+        return [rows[rid] for rid in ids]
+
+    def upsert_many(self, records: list[dict], update: list[str] = None) -> int:
+        """
+        Add many rows in one statement, rows whose natural key (the first of unique) already exists are updated
+        instead of added again, so the same records can be upserted any number of times
+
+        validate_records is not run, as the records are expected to already exist
+        :param records: list[dict]: the arguments of add() for each row, later records with the same key replace
+                earlier ones
+        :param update: list[str]: the columns to update on rows that already exist, the rest are left as they are.
+                None to leave existing rows as they are
+        :return int: the number of rows added or changed
+        """
+        # If the table has no natural key, rows can not be matched
+        if not self.unique:
+            raise ValueError(f'{self.__class__.__name__} has no unique key to upsert on')
+
+        # If there are no records, there is nothing to add
+        if not records:
+            return 0
+
+        key = self.unique[0]
+
+        # Validate every record, keeping the last one for each key
+        values = {}
+        for record in records:
+            value = self.validate_record(**record)
+            values[tuple(value[column] for column in key)] = value
+        # Stamp the rows with the connection's clock, rather than the time the database writes them at
+        stamp = current_time(self.db)
+        values = [{'created_at': stamp, 'updated_at': stamp, **value} for value in values.values()]
+
+        # Records may leave out optional columns, which are added as NULL
+        columns = list(dict.fromkeys(column for value in values for column in value))
+        update = [column for column in update or [] if column not in key]
+
+        # If a column of the key or to update is not being upserted, raise ValueError
+        missing = [column for column in [*key, *update] if column not in columns]
+        if missing:
+            raise ValueError(f'{", ".join(missing)} must be in the records to upsert {self.table_name}')
+
+        # Without the unique index, e.g. if rows already shared the key when it was declared, ON CONFLICT can not
+        # match the rows so they are matched by the key instead
+        if not self.has_unique_index(key):
+            return self.upsert_unindexed(key, columns, values, update)
+
+        if update:
+            # Only rows which have changed are written, so upserting the same records again writes nothing
+            assignments = ', '.join(f'{column} = excluded.{column}' for column in update)
+            changed = ' OR '.join(f'{column} IS NOT excluded.{column}' for column in update)
+            conflict = f'DO UPDATE SET {assignments}, updated_at = excluded.updated_at WHERE {changed}'
+        else:
+            conflict = 'DO NOTHING'
+
+        query = f'''
+            INSERT INTO {self.table_name} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})
+            ON CONFLICT ({", ".join(key)}) {conflict}
+        '''
+
+        with transaction(self.db):
+            self.cur.executemany(query, [tuple(value.get(column) for column in columns) for value in values])
+            written = self.cur.rowcount
+
+        # Forget the results read before the rows were written, and any rows that were updated
+        query_cache(self.db).invalidate(self.table_name)
+        if update:
+            identity_map(self.db).discard_table(self.table_name)
+
+        return written
+
+    def upsert_unindexed(self, key: tuple[str, ...], columns: list[str], values: list[dict],
+                         update: list[str]) -> int:
+        """
+        Upsert validated records on a table without a unique index on the key, rows with the key are updated and
+        records without one are added
+        :param key: tuple[str, ...]: the columns of the natural key
+        :param columns: list[str]: the columns of the records
+        :param values: list[dict]: the validated records, one for each key
+        :param update: list[str]: the columns to update on rows that already exist
+        :return int: the number of rows added or changed
+        """
+        match = ' AND '.join(f'{column} = ?' for column in key)
+        written = 0
+
+        with transaction(self.db):
+            if update:
+                # Only rows which have changed are written, every row sharing the key is updated
+                assignments = ', '.join(f'{column} = ?' for column in update)
+                changed = ' OR '.join(f'{column} IS NOT ?' for column in update)
+                self.cur.executemany(f'''
+                    UPDATE {self.table_name} SET {assignments}, updated_at = ?
+                    WHERE {match} AND ({changed})
+                ''', [(*(value[column] for column in update), value['updated_at'],
+                       *(value[column] for column in key), *(value[column] for column in update)) for value in values])
+                written += max(self.cur.rowcount, 0)
+
+            self.cur.executemany(f'''
+                INSERT INTO {self.table_name} ({", ".join(columns)}) SELECT {", ".join("?" * len(columns))}
+                WHERE NOT EXISTS (SELECT 1 FROM {self.table_name} WHERE {match})
+            ''', [(*(value.get(column) for column in columns), *(value[column] for column in key)) for value in values])
+            written += max(self.cur.rowcount, 0)
+
+        # Forget the results read before the rows were written, and any rows that were updated
+        query_cache(self.db).invalidate(self.table_name)
+        if update:
+            identity_map(self.db).discard_table(self.table_name)
+
+        return written
 
     @abstractmethod
     def add(self, **kwargs) -> None:
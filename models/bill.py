@@ -1,11 +1,12 @@
 from sqlite3 import Cursor, Connection
 from typing import Union, Tuple, List, TYPE_CHECKING
 
+from connector import transaction
 from facades.action_only import add_action
 from facades.customer_only import get_customer
 from facades.seat_only import get_seat
 from models.base import RowBase, TableBase
-from models.billitem import BillItems
+from models.registry import RelatedTable
 
 if TYPE_CHECKING:
     from models import Item
@@ -16,35 +17,51 @@ class Bill(RowBase):
     Bill class for rows in the Bills table
     """
 
-    attributes = ['customer_id', 'seating_id', 'total', 'covers', 'created_by_staff_id']
+    attributes = ['customer_id', 'seating_id', 'covers', 'created_by_staff_id']
     table_name = 'bill'
 
-    def __init__(self, bid: int, cur: Cursor, db: Connection) -> None:
+    # Related rows and the running total, see RowMeta
+    row_state = ('_customer', '_seat', '_created_by_staff', '_total')
+
+    # Related tables
+    __bill_items = RelatedTable('BillItems')
+    __items = RelatedTable('Items')
+    __staff_members = RelatedTable('StaffMembers')
+
+    def __init__(self, bid: int, cur: Cursor, db: Connection, row: tuple = None) -> None:
         """
         Constructor for the Bill class
         
         Only for use in the Bills class
         """
-        self.__bill_items = BillItems(self.cur, self.db)
-
         self.validate_types([(bid, int, 'bid'), (cur, Cursor, 'cur'), (db, Connection, 'db')])
 
         # Initiate relationship variables
         self._customer = None
-        self._seating = None
+        self._seat = None
         self._seating_id = None
         self._created_by_staff = None
 
-        super().__init__(bid, cur, db)
+        # Running total, calculated the first time it is used and then kept up to date by add_items and remove_items
+        self._total = None
+
+        super().__init__(bid, cur, db, row)
 
-    def set_attribute(self, attribute: str, new_value: any) -> None:
+    def save(self) -> None:
         """
-        Set the attribute of the Bill by ID
+        Write the changes to the Bill, with one update action for all of them
         """
-        super().set_attribute(attribute, new_value)
+        # If nothing has changed, there is nothing to write
+        if not self._dirty:
+            return
 
-        # Create a new action
-        add_action(self.cur, self.db, bill_id=self.id, staff_id=self.created_by_staff_id, action_type=f'update')
+        with transaction(self.db):
+            super().save()
+
+            # Create a new action, actions need a member of staff so bills without one are not logged
+            if self.created_by_staff_id is not None:
+                add_action(self.cur, self.db, bill_id=self.id, staff_id=self.created_by_staff_id, approved=True,
+                           action_type='update')
 
     @property
     def id(self) -> int:
@@ -89,6 +106,11 @@ class Bill(RowBase):
         """
         Getter for the customer
         """
+        # Use the customer prefetched by Bills.get if it is still the bill's customer
+        customer = self.attached('customer', self.customer_id)
+        if customer is not None:
+            return customer
+
         try:
             return get_customer(cid=self.customer_id, cur=self.cur, db=self.db)
         except ValueError:
@@ -135,10 +157,15 @@ class Bill(RowBase):
 
     @property
     def seat(self):
-        return self._seating
+        return self._seat
 
     @seat.getter
     def seat(self):
+        # Use the seat prefetched by Bills.get if it is still the bill's seat
+        seat = self.attached('seat', self._seating_id)
+        if seat is not None:
+            return seat
+
         try:
             return get_seat(sid=self._seating_id, cur=self.cur, db=self.db)
         except ValueError:
@@ -148,26 +175,72 @@ class Bill(RowBase):
     def seat(self, new_seat):
         if new_seat is None:
             self.seating_id = None
-            self._seating = None
+            self._seat = None
 
         # Try to get the seat, if it does not exist, set the seating_id to None
         try:
             get_seat(sid=new_seat.sid, cur=self.cur, db=self.db)
             self.seating_id = new_seat.sid
-            self._seating = new_seat
+            self._seat = new_seat
         except ValueError:
             self.seating_id = None
-            self._seating = None
+            self._seat = None
 
     @property
     def total(self) -> float:
         """
         Property initiation for the total
         """
-        # Get all the bill items for the bill and sum the total if complimentary is not in the staff_note
+        if self._total is None:
+            self._total = self.calculate_total()
 
-        return sum(
-            [item.price for item in self.__bill_items.get(bid=self.id) if 'complimentary' not in item.staff_note])
+        return self._total
+
+    @total.setter
+    def total(self, new_total: float) -> None:
+        """
+        Set the running total, e.g. for a manual adjustment. The bill has no total column, so refresh_total goes back
+        to the total of the items
+        """
+        # Whole number totals are stored as floats
+        if type(new_total) is int:
+            new_total = float(new_total)
+
+        # Validate inputs
+        self.validate_types([(new_total, float, 'new_total')])
+
+        # If total is negative, raise a ValueError
+        if new_total < 0:
+            raise ValueError(f'Total must be positive, not {new_total}')
+
+        self._total = round(new_total, 2)
+
+    def calculate_total(self) -> float:
+        """
+        Sum the price of every item on the bill in the database, leaving out complimentary lines and note only lines
+        :return: float: the total
+        """
+        # Using the tables makes sure they have been created
+        bill_item, item = self.__bill_items.table_name, self.__items.table_name
+
+        total = self.cur.execute(f'''
+            SELECT COALESCE(SUM(item.price * bill_item.quantity), 0.0)
+            FROM {bill_item} AS bill_item
+            JOIN {item} AS item ON item.id = bill_item.item_id
+            WHERE bill_item.bill_id = ?
+                AND (bill_item.staff_note IS NULL OR bill_item.staff_note NOT LIKE '%complimentary%')
+        ''', (self.id,)).fetchone()[0]
+
+        return round(total, 2)
+
+    def refresh_total(self) -> float:
+        """
+        Recalculate the running total, e.g. after bill items were changed without going through the bill
+        :return: float: the total
+        """
+        self._total = None
+
+        return self.total
 
     @property
     def covers(self) -> int:
@@ -229,7 +302,12 @@ class Bill(RowBase):
         """
         Getter for the created_by_staff
         """
-        pass
+        # Use the staff member prefetched by Bills.get if it is still the one who created the bill
+        staff_member = self.attached('created_by_staff', self.created_by_staff_id)
+        if staff_member is not None:
+            return staff_member
+
+        return self.__staff_members.find(self.created_by_staff_id)
 
     @created_by_staff.setter
     def created_by_staff(self, new_sid) -> None:
@@ -238,46 +316,73 @@ class Bill(RowBase):
         """
         pass
 
-    def add_items(self, items: Union['Item', Tuple['Item', str], List[Tuple['Item', str]]] | 'Item', staff_id):
-        staff_note = 'NULL'
-
-        if type(items) is 'Item' or tuple['Item', str]:
+    def add_items(self, items: Union['Item', Tuple['Item', str], List[Union['Item', Tuple['Item', str]]]], staff_id):
+        """
+        Adds items to the bill in one insert
+        :param items: an item, an (item, staff_note) tuple or a list of either, the item is None for a note on its own
+        :param staff_id: int: the id of the staff member adding the items
+        """
+        if not isinstance(items, list):
             items = [items]
 
+        records = []
+        added_items = []
         for item in items:
-            if type(item) is list[tuple[self.Item, str]]:
+            staff_note = 'NULL'
+            if isinstance(item, tuple):
                 item, staff_note = item
-            self.__add_item(item, staff_id, staff_note)
 
-        # Create a new action
-        add_action(self.cur, self.db, bill_id=self.id, staff_id=staff_id, action_type='update_bill_items',
-                   approved=True, approval_id=None, approved_at=None)
+            added_items.append(item)
+            records.append(dict(bill_id=self.id, item_id=item.id if item is not None else None, staff_id=staff_id,
+                                staff_note=staff_note))
 
-    def __add_item(self, item: 'Item', staff_id: int, staff_note: str = 'NULL'):
-        self.__bill_items.add(self.id, item.id, staff_id, staff_note=staff_note)
+        with transaction(self.db):
+            new_lines = self.__bill_items.add_many(records)
+
+            # Create a new action
+            add_action(self.cur, self.db, bill_id=self.id, staff_id=staff_id, action_type='update_bill_items',
+                       approved=True, approval_id=None, approved_at=None)
+
+        # Add the new lines to the running total, if it has been calculated
+        if self._total is not None:
+            self._total = round(self._total + sum(item.price for item, line in zip(added_items, new_lines)
+                                                  if item is not None and not line.complimentary), 2)
 
     def remove_items(self, items: list | tuple, staff_id):
-        for item in items:
-            # Get the rows from the bill_items table
-            rows = self.__bill_items.get(bid=self.id, iid=item.id)[0]
+        # Price of the items removed, taken off the running total once they are removed
+        removed = 0.0
 
-            # If the item is not in the bill, raise a ValueError
-            if not rows:
-                print(f'Item<{item.id}> is not in the bill')
-                continue
+        # Remove the items and record the action as one unit of work
+        with transaction(self.db):
+            for item in items:
+                # Get the first line of the item from the bill_items table
+                rows = self.__bill_items.first(bid=self.id, iid=item.id)
 
-            # If the quantity is greater than one and the item is in the bill, remove one from the quantity
-            if rows and rows.quantity > 1:
-                rows.quantity -= 1
-                continue
+                # If the item is not in the bill, raise a ValueError
+                if not rows:
+                    print(f'Item<{item.id}> is not in the bill')
+                    continue
 
-            # If the quantity is one, remove the item from the bill
-            if rows and rows.quantity == 1:
-                self.__bill_items.delete(rows.id)
+                # Complimentary lines were never part of the total
+                if not rows.complimentary:
+                    removed += item.price
 
-        # Create a new action
-        add_action(self.cur, self.db, bill_id=self.id, staff_id=staff_id, action_type='update_bill_items',
-                   approved=True, approval_id=None, approved_at=None)
+                # If the quantity is greater than one and the item is in the bill, remove one from the quantity
+                if rows and rows.quantity > 1:
+                    rows.quantity -= 1
+                    continue
+
+                # If the quantity is one, remove the item from the bill
+                if rows and rows.quantity == 1:
+                    self.__bill_items.delete(rows.id)
+
+            # Create a new action
+            add_action(self.cur, self.db, bill_id=self.id, staff_id=staff_id, action_type='update_bill_items',
+                       approved=True, approval_id=None, approved_at=None)
+
+        # Take the removed items off the running total, if it has been calculated
+        if self._total is not None:
+            self._total = round(self._total - removed, 2)
 
     def __repr__(self) -> str:
         """
@@ -306,6 +411,11 @@ class Bills(TableBase):
     Bills class for the bills table
     """
 
+    aliases = {'bid': 'id'}
+    indexes = [('customer_id',), ('seating_id',)]
+    relations = {'customer': ('customer_id', 'Customers'), 'seat': ('seating_id', 'Seats'),
+                 'created_by_staff': ('created_by_staff_id', 'StaffMembers')}
+
     def __init__(self, cur: Cursor, db: Connection) -> None:
         """
         Constructor for the Bills class
@@ -340,15 +450,36 @@ class Bills(TableBase):
         Adds a bill to the bills table
         :return:
         """
+        return self.add_many([dict(customer_id=customer_id, seating_id=seating_id,
+                                   created_by_staff_id=created_by_staff_id, total=total, covers=covers)])[0]
+
+    def add_many(self, records: list[dict]) -> list[Bill]:
+        """
+        Adds several bills in one transaction, with an action for the creation of each bill made by a staff member
+        :param records: list[dict]: the arguments of add for each bill
+        :return: list[Bill]: the new bills
+        """
+        with transaction(self.db):
+            new_bills = super().add_many(records)
+
+            for new_bill in new_bills:
+                if new_bill.created_by_staff_id is not None:
+                    # Create an action for the bill creation
+                    add_action(self.cur, self.db, bill_id=new_bill.id, staff_id=new_bill.created_by_staff_id,
+                               approved=True, action_type='create')
+
+        return new_bills
 
+    def validate_record(self, customer_id: int = None, seating_id: int = None, created_by_staff_id: int = None,
+                        total: float = 0.0, covers: int = 0) -> dict:
         if created_by_staff_id is not None and not self.row_exists('staff', created_by_staff_id):
             raise ValueError(f'Staff<{created_by_staff_id}> does not exist')
 
         types_to_valid = []
 
-        # Change None values to NULL for SQL
+        # Missing ids are stored as NULL
         if customer_id is None or customer_id == 'NULL':
-            customer_id = 'NULL'
+            customer_id = None
         else:
             if not get_customer(cid=customer_id, cur=self.cur, db=self.db):
                 raise ValueError(f'Customer<{customer_id}> does not exist')
@@ -356,14 +487,10 @@ class Bills(TableBase):
             # Add the customer_id to the types_to_valid list
             types_to_valid.append((customer_id, int, 'customer_id'))
 
-        if seating_id is None:
-            seating_id = 'NULL'
-        else:
+        if seating_id is not None:
             types_to_valid.append((seating_id, int, 'seating_id'))
 
-        if created_by_staff_id is None:
-            created_by_staff_id = 'NULL'
-        else:
+        if created_by_staff_id is not None:
             types_to_valid.append((created_by_staff_id, int, 'created_by_staff_id'))
 
         # Valid all inputs
@@ -377,27 +504,8 @@ class Bills(TableBase):
         if covers > 999 or covers < 0:
             raise ValueError(f'Covers must be between 0 and 999, not {covers}')
 
-        # if not self.seatings.get(sid=seating_id):
-        #     raise ValueError(f'Seating<{seating_id}> does not exist')
-        # if not self.staff.get(sid=created_by_staff_id):
-        #     raise ValueError(f'Staff<{created_by_staff_id}> does not exist')
-
-        # Add the bill to the bills table
-        new_bill_id = self.cur.execute(f"""
-                INSERT INTO bill (customer_id, seating_id, covers, created_by_staff_id) VALUES (?, ?, ?, ?)
-            """, (customer_id, seating_id, covers, created_by_staff_id)).lastrowid
-        self.db.commit()
-        new_bill = Bill(
-            new_bill_id,
-            self.cur,
-            self.db
-        )
-
-        if created_by_staff_id is not None:
-            # Create an action for the bill creation
-            add_action(self.cur, self.db, bill_id=new_bill_id, staff_id=created_by_staff_id, action_type='create')
-
-        return new_bill
+        return dict(customer_id=customer_id, seating_id=seating_id, covers=covers,
+                    created_by_staff_id=created_by_staff_id)
 
     def __repr__(self):
         return f'<Bills {self.rows[0:5]}...>'
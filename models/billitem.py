@@ -6,8 +6,8 @@ from models.base import TableBase, RowBase
 class BillItem(RowBase):
     attributes = ['bill_id', 'item_id', 'quantity', 'created_by_staff_id', 'staff_note']
     table_name = 'bill_item'
-    def __init__(self, bid: int, cur: Cursor, db: Connection):
-        super().__init__(bid, cur, db)
+    def __init__(self, bid: int, cur: Cursor, db: Connection, row: tuple = None):
+        super().__init__(bid, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -45,8 +45,38 @@ class BillItem(RowBase):
 
         self.set_attribute('item_id', new_item_id)
 
+    @property
+    def quantity(self) -> int:
+        return self._quantity
+
+    @quantity.setter
+    def quantity(self, new_quantity: int) -> None:
+
+        # Validate inputs
+        self.validate_types([(new_quantity, int, 'new_quantity')])
+
+        # If the quantity is less than 1, raise ValueError
+        if new_quantity < 1:
+            raise ValueError(f'quantity must be at least 1, not {new_quantity}')
+
+        self.set_attribute('quantity', new_quantity)
+
+    @property
+    def staff_note(self) -> str | None:
+        return self._staff_note
+
+    @property
+    def complimentary(self) -> bool:
+        """
+        Whether the line is free, complimentary lines are left out of the bill's total
+        """
+        return self._staff_note is not None and 'complimentary' in self._staff_note.lower()
+
 
 class BillItems(TableBase):
+    aliases = {'bid': 'bill_id', 'iid': 'item_id'}
+    indexes = [('bill_id',), ('item_id',)]
+
     def create_table(self):
         self.cur.execute('''
             CREATE TABLE IF NOT EXISTS bill_item (
@@ -68,12 +98,25 @@ class BillItems(TableBase):
         super().__init__(cur, db, 'bill_item', BillItem)
 
     def add(self, bill_id: int, item_id: int, staff_id: int, quantity: int = 1, staff_note: str = 'NULL'):
-        self.cur.execute('''
-            INSERT INTO bill_item (bill_id, item_id, quantity, created_by_staff_id, staff_note)
-            VALUES (?, ?, ?)
-        ''', (bill_id, item_id, quantity, staff_id, staff_note))
-        self.db.commit()
-
-        new_bill_item = BillItem(self.cur.lastrowid, self.cur, self.db)
+        new_bill_item = self.add_many([dict(bill_id=bill_id, item_id=item_id, staff_id=staff_id, quantity=quantity,
+                                            staff_note=staff_note)])[0]
 
         return new_bill_item
+
+    def validate_record(self, bill_id: int, item_id: int | None, staff_id: int, quantity: int = 1,
+                        staff_note: str = 'NULL') -> dict:
+        # Validate inputs, item_id is None for lines which are only a note
+        self.validate_types([(bill_id, int, 'bill_id'), (staff_id, int, 'staff_id'), (quantity, int, 'quantity')])
+        if item_id is not None:
+            self.validate_types([(item_id, int, 'item_id')])
+
+        # If the quantity is less than 1, raise ValueError
+        if quantity < 1:
+            raise ValueError(f'quantity must be at least 1, not {quantity}')
+
+        # Store a missing note as NULL rather than the string 'NULL'
+        if staff_note == 'NULL':
+            staff_note = None
+
+        return dict(bill_id=bill_id, item_id=item_id, quantity=quantity, created_by_staff_id=staff_id,
+                    staff_note=staff_note)
@@ -0,0 +1,228 @@
+from datetime import datetime
+from sqlite3 import Cursor, Connection
+from typing import TYPE_CHECKING
+
+from models.base import RowBase, TableBase
+from models.customer import Customer
+from models.registry import RelatedTable
+
+if TYPE_CHECKING:
+    from models import Bill, StaffMember
+
+
+class Booking(RowBase):
+    """
+    Booking class for rows in the Bookings table
+
+    The bill, the staff member serving the booking and whether it is still in the bar are only kept while the day is
+    simulated, they are not columns of the table
+    """
+    attributes = ['date', 'covers', 'customer_id', 'comment']
+    table_name = 'booking'
+
+    # Related rows and the state of the booking during the simulation, see RowMeta
+    row_state = ('_customer', '_bill', '_assigned_staff_member', '_active')
+
+    # Related tables
+    __customers = RelatedTable('Customers')
+
+    def __init__(self, booking_id: int, cur: Cursor, db: Connection, row: tuple = None) -> None:
+        """
+        Constructor for the Booking class
+
+        Only for use in the Bookings class
+        """
+        # Initiate relationship variables
+        self._customer = None
+        self._bill = None
+        self._assigned_staff_member = None
+        self._active = True
+
+        # Call the super constructor
+        super().__init__(booking_id, cur, db, row)
+
+    @property
+    def id(self) -> int:
+        """
+        Property initiation for the id
+        """
+        return self._id
+
+    @property
+    def date(self) -> datetime:
+        """
+        Property initiation for the date and time of the booking
+        """
+        return self._date
+
+    @date.setter
+    def date(self, new_date: datetime) -> None:
+        """
+        Updates the date of the Booking by ID
+        """
+        # Validate types
+        self.validate_types([(new_date, datetime, 'new_date')])
+
+        self.set_attribute('date', new_date)
+
+    @property
+    def covers(self) -> int:
+        """
+        Property initiation for the number of covers
+        """
+        return self._covers
+
+    @covers.setter
+    def covers(self, new_covers: int) -> None:
+        """
+        Updates the covers of the Booking by ID
+        """
+        # Validate types
+        self.validate_types([(new_covers, int, 'new_covers')])
+
+        # If the covers are not between 0 and 15, raise a ValueError
+        if not 0 <= new_covers <= 15:
+            raise ValueError(f'Covers must be between 0 and 15, not {new_covers}')
+
+        self.set_attribute('covers', new_covers)
+
+    @property
+    def customer_id(self) -> int:
+        """
+        Property initiation for the customer_id
+        """
+        return self._customer_id
+
+    @property
+    def customer(self) -> Customer | None:
+        """
+        Property initiation for the customer who made the booking
+        """
+        # Use the customer prefetched by Bookings.get if it is still the booking's customer
+        customer = self.attached('customer', self.customer_id)
+        if customer is not None:
+            return customer
+
+        return self.__customers.find(self.customer_id)
+
+    @property
+    def comment(self) -> str:
+        """
+        Property initiation for the comment, empty if there is none
+        """
+        return self._comment
+
+    @comment.setter
+    def comment(self, new_comment: str) -> None:
+        """
+        Updates the comment of the Booking by ID
+        """
+        # Validate types
+        self.validate_types([(new_comment, str, 'new_comment')])
+
+        self.set_attribute('comment', new_comment)
+
+    @property
+    def bill(self) -> 'Bill | None':
+        """
+        Property initiation for the bill of the booking, None until the booking is seated
+        """
+        return self._bill
+
+    @bill.setter
+    def bill(self, new_bill: 'Bill | None') -> None:
+        self._bill = new_bill
+
+    @property
+    def assigned_staff_member(self) -> 'StaffMember | None':
+        """
+        Property initiation for the staff member serving the booking
+        """
+        return self._assigned_staff_member
+
+    @assigned_staff_member.setter
+    def assigned_staff_member(self, new_staff_member: 'StaffMember | None') -> None:
+        self._assigned_staff_member = new_staff_member
+
+    @property
+    def active(self) -> bool:
+        """
+        Property initiation for whether the booking is still in the bar
+        """
+        return self._active
+
+    @active.setter
+    def active(self, new_active: bool) -> None:
+        self._active = new_active
+
+    def __hash__(self):
+        return hash(self._id)
+
+    def __eq__(self, other):
+        return isinstance(other, Booking) and self.id == other.id
+
+    def __repr__(self) -> str:
+        """
+        Representation of the Booking class
+        """
+        return f'<Booking id={self.id}, date={self.date}, covers={self.covers}, customer_id={self.customer_id}, ' \
+               f'comment="{self.comment}">'
+
+
+class Bookings(TableBase):
+    """
+    Bookings class for the Bookings table
+    """
+
+    # The bookings of a day are looked up by date, and a customer's bookings by customer_id
+    indexes = [('date',), ('customer_id',)]
+
+    # Related rows get() can prefetch, by name of the relationship, as (foreign key, table class name)
+    relations = {'customer': ('customer_id', 'Customers')}
+
+    def __init__(self, cur: Cursor, db: Connection) -> None:
+        super().__init__(cur, db, 'booking', Booking)
+
+    def create_table(self) -> None:
+        """
+        Creates the Bookings table if it does not exist
+        """
+        self.cur.execute('''
+            CREATE TABLE IF NOT EXISTS booking (
+                id INTEGER PRIMARY KEY,
+                date DATETIME NOT NULL,
+                covers INTEGER NOT NULL,
+                customer_id INTEGER NOT NULL,
+                comment TEXT DEFAULT '',
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (customer_id) REFERENCES customer (id)
+            )
+        ''')
+        self.db.commit()
+        print('Booking table created')
+
+    def add(self, date: datetime, covers: int, customer: Customer, comment: str = '') -> Booking:
+        """
+        Adds a booking to the Bookings table
+        :return Booking: the new booking
+        """
+        return self.add_many([dict(date=date, covers=covers, customer=customer, comment=comment)])[0]
+
+    def validate_record(self, date: datetime, covers: int, customer: Customer, comment: str = '') -> dict:
+        """
+        Validates a new booking
+        :return dict: the values to insert by column
+        """
+        # Validate types
+        self.validate_types([(date, datetime, 'date'), (covers, int, 'covers'), (customer, Customer, 'customer'),
+                             (comment, str, 'comment')])
+
+        # If the covers are not between 0 and 15, raise a ValueError
+        if not 0 <= covers <= 15:
+            raise ValueError(f'Covers must be between 0 and 15, not {covers}')
+
+        return dict(date=date, covers=covers, customer_id=customer.id, comment=comment)
+
+    def __repr__(self):
+        return f'<Bookings bookings={self.rows[0:5]}...>'
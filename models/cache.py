@@ -0,0 +1,125 @@
+"""
+This file contains the query cache which keeps the results of TableBase.get and count for tables that opt in, so
+repeated reads are served from memory
+"""
+from collections import OrderedDict
+from sqlite3 import Connection
+from typing import Any, Callable
+
+from config import config
+
+
+class QueryCache:
+    """
+    Map of (table_name, query) to the result of the query, scoped to one connection
+
+    The results of a table are dropped when the table is written to through the connection, and every result is
+    dropped when another connection commits a write, which SQLite reports through PRAGMA data_version
+
+    Attributes
+    ----------
+    db : Connection | None
+        Connection the results were read through, None if data_version should not be checked
+    max_size : int | None
+        Most results kept, the least recently used results are dropped first. None for no limit, 0 to disable the cache
+    results : OrderedDict
+        The results, ordered from least to most recently used
+    data_version : int | None
+        The data_version the results were read at
+
+    :returns None
+    """
+
+    def __init__(self, db: Connection = None, max_size: int | None = None) -> None:
+        """
+        Initialise the QueryCache class
+
+        :param db: Connection | None Connection the results are read through
+        :param max_size: int | None Most results kept, None for no limit, 0 to disable the cache
+        """
+        self.db = db
+        self.max_size = max_size
+        self.results = OrderedDict()
+        self.data_version = None
+
+    def get_or_load(self, table_name: str, query: tuple, load: Callable[[], Any]) -> Any:
+        """
+        Get the result of a query, running it with load if it is not cached
+
+        :param table_name: str Name of the table the query reads
+        :param query: tuple The normalised query, e.g. ('get', 'name = ?', ('John',))
+        :param load: Callable Runs the query
+        :return Any: the result
+        """
+        if self.max_size == 0:
+            return load()
+
+        # Another connection may have changed any table since the results were read
+        self.check_data_version()
+
+        key = (table_name, query)
+        if key in self.results:
+            # Mark the result as the most recently used
+            self.results.move_to_end(key)
+
+            return self.results[key]
+
+        result = load()
+        self.results[key] = result
+
+        # Drop the least recently used results if the cache is full
+        while self.max_size is not None and len(self.results) > self.max_size:
+            self.results.popitem(last=False)
+
+        return result
+
+    def check_data_version(self) -> None:
+        """
+        Drop every result if another connection has committed a write since they were read
+        """
+        if self.db is None:
+            return
+
+        data_version = self.db.execute('PRAGMA data_version').fetchone()[0]
+
+        if data_version != self.data_version:
+            self.results.clear()
+            self.data_version = data_version
+
+    def invalidate(self, table_name: str) -> None:
+        """
+        Remove the results of a table, e.g. after it has been written to
+
+        :param table_name: str Name of the table
+        """
+        for key in [key for key in self.results if key[0] == table_name]:
+            del self.results[key]
+
+    def clear(self) -> None:
+        """
+        Remove every result
+        """
+        self.results.clear()
+
+    def __contains__(self, key: tuple[str, tuple]) -> bool:
+        return key in self.results
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+
+def query_cache(db: Connection) -> QueryCache:
+    """
+    Get the query cache of a connection, creating it the first time
+
+    :param db: Connection Connection to the database
+    :return QueryCache: the query cache of the connection
+    """
+    # Plain sqlite3 connections can not hold the cache, so nothing read through them is cached
+    if not hasattr(db, 'query_cache'):
+        return QueryCache(max_size=0)
+
+    if db.query_cache is None:
+        db.query_cache = QueryCache(db, config['query_cache_size'])
+
+    return db.query_cache
@@ -9,7 +9,7 @@ class Customer(RowBase):
     attributes = ['name', 'vip']
     table_name = 'customer'
 
-    def __init__(self, cid: int, cur, db) -> None:
+    def __init__(self, cid: int, cur, db, row: tuple = None) -> None:
         """
         Constructor for the Customer class
 
@@ -17,7 +17,7 @@ class Customer(RowBase):
         """
 
         # Call the super constructor
-        super().__init__(cid, cur, db)
+        super().__init__(cid, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -120,6 +120,8 @@ class Customers(TableBase):
 
     """
 
+    aliases = {'cid': 'id'}
+
     def __init__(self, cur, db):
         super().__init__(cur, db, 'customer', Customer, )
 
@@ -142,16 +144,23 @@ class Customers(TableBase):
     def add(self, name: str, vip: bool):
         """
         Adds a customer to the Customers table
-        :return int: id of the new customer
+        :return Customer: the new customer
         """
-        cid = self.cur.execute(f"""
-                INSERT INTO customer (name, vip) VALUES (?, ?)
-                """, (name, vip)).lastrowid
-        new_customer = Customer(cid, self.cur, self.db)
+        return self.add_many([dict(name=name, vip=vip)])[0]
 
-        self.db.commit()
+    def validate_record(self, name: str, vip: bool) -> dict:
+        """
+        Validates a new customer
+        :return dict: the values to insert by column
+        """
+        # Validate types
+        self.validate_types([(name, str, 'name'), (vip, bool, 'vip')])
+
+        # If the name is not between 1 and 50 characters, raise a ValueError
+        if not 1 <= len(name) <= 50:
+            raise ValueError(f'Customer name must be between 1 and 50 characters, not {len(name)}')
 
-        return new_customer
+        return dict(name=name, vip=vip)
 
     def __repr__(self):
         return f'<Customers customers={self.rows[0:5]}...>'
@@ -0,0 +1,112 @@
+"""
+This file contains the identity map which makes sure each row in the database is only loaded into one object
+"""
+from collections import OrderedDict
+from sqlite3 import Connection
+
+from config import config
+
+
+class IdentityMap:
+    """
+    Map of (table_name, id) to the row object loaded for it, scoped to one connection
+
+    Attributes
+    ----------
+    max_size : int | None
+        Most rows kept, the least recently used rows are dropped first. None for no limit, 0 to disable the map
+    rows : OrderedDict
+        The rows, ordered from least to most recently used
+
+    :returns None
+    """
+
+    def __init__(self, max_size: int | None = None) -> None:
+        """
+        Initialise the IdentityMap class
+
+        :param max_size: int | None Most rows kept, None for no limit, 0 to disable the map
+        """
+        self.max_size = max_size
+        self.rows = OrderedDict()
+
+    def get(self, table_name: str, row_id: int):
+        """
+        Get the object loaded for a row
+
+        :param table_name: str Name of the table the row is in
+        :param row_id: int ID of the row
+        :return RowBase | None: the row, or None if it has not been loaded
+        """
+        key = (table_name, row_id)
+        row = self.rows.get(key)
+
+        # Mark the row as the most recently used
+        if row is not None:
+            self.rows.move_to_end(key)
+
+        return row
+
+    def add(self, row) -> None:
+        """
+        Add a row, replacing any other object loaded for it
+
+        :param row: RowBase The row to add
+        """
+        if self.max_size == 0:
+            return
+
+        key = (row.table_name, row.id)
+        self.rows[key] = row
+        self.rows.move_to_end(key)
+
+        # Drop the least recently used rows if the map is full
+        while self.max_size is not None and len(self.rows) > self.max_size:
+            self.rows.popitem(last=False)
+
+    def discard(self, table_name: str, row_id: int) -> None:
+        """
+        Remove a row, e.g. after it has been deleted
+
+        :param table_name: str Name of the table the row is in
+        :param row_id: int ID of the row
+        """
+        self.rows.pop((table_name, row_id), None)
+
+    def discard_table(self, table_name: str) -> None:
+        """
+        Remove every row of a table, e.g. after it has been cleared
+
+        :param table_name: str Name of the table
+        """
+        for key in [key for key in self.rows if key[0] == table_name]:
+            del self.rows[key]
+
+    def clear(self) -> None:
+        """
+        Remove every row
+        """
+        self.rows.clear()
+
+    def __contains__(self, key: tuple[str, int]) -> bool:
+        return key in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def identity_map(db: Connection) -> IdentityMap:
+    """
+    Get the identity map of a connection, creating it the first time
+
+    :param db: Connection Connection to the database
+    :return IdentityMap: the identity map of the connection
+    """
+    # Plain sqlite3 connections can not hold the map, so rows loaded through them are never shared
+    if not hasattr(db, 'identity_map'):
+        return IdentityMap(max_size=0)
+
+    if db.identity_map is None:
+        db.identity_map = IdentityMap(config['identity_map_size'])
+
+    return db.identity_map
@@ -1,7 +1,8 @@
 from sqlite3 import Connection, Cursor
 
+from constants import ITEM_DEPARTMENTS
 from .base import RowBase, TableBase
-from models.menuitem import MenuItems
+from .registry import RelatedTable
 
 
 class Item(RowBase):
@@ -13,26 +14,23 @@ class Item(RowBase):
     attributes = ['name', 'price', 'cost', 'vat', 'quantity', 'individual_volume', 'total_volume', 'department',
                     'description']
 
-    def __init__(self, iid: int, cur: Cursor, db: Connection) -> None:
+    DEPARTMENTS = ITEM_DEPARTMENTS
+
+    # Link table between Item and Menu
+    __menu_items = RelatedTable('MenuItems')
+
+    def __init__(self, iid: int, cur: Cursor, db: Connection, row: tuple = None) -> None:
         """
         Initialize the Item class
 
         :param iid: int : id of the Item
         :param cur: Cursor : database cursor
         :param db: Connection : database connection
+        :param row: tuple : values already fetched by the Items table
         """
 
-        # Set constant DEPARTMENTS
-        self.DEPARTMENTS = ['drink', 'food', 'other']
-
         # Initialize the RowBase
-        super().__init__(iid, cur, db)
-
-        # Set up MenuItems for the link table between Item and Menu
-        self.__menu_items = MenuItems(cur, db)
-
-        # Set the relationship variables
-        self._menus = []
+        super().__init__(iid, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -304,7 +302,7 @@ class Item(RowBase):
             raise ValueError(f'Menu<{menu_id}> does not exist')
 
         # If the menu_id is already in the menus, raise ValueError
-        if self.__menu_items.get(menu_id=menu_id, item_id=self.id):
+        if self.__menu_items.exists(menu_id=menu_id, item_id=self.id):
             raise ValueError(f'Menu<{menu_id}> already has Item<{self.id}>')
 
         # Add the menu_id to the menus
@@ -324,7 +322,7 @@ class Item(RowBase):
             raise ValueError(f'Menu<{menu_id}> does not exist')
 
         # If the menu_id is not in the menus, return
-        menu_item = self.__menu_items.get(menu_id=menu_id, item_id=self.id)
+        menu_item = self.__menu_items.first(menu_id=menu_id, item_id=self.id)
         if not menu_item:
             return
 
@@ -345,6 +343,14 @@ class Items(TableBase):
     Items class for the Item table in the database
     """
 
+    DEPARTMENTS = ITEM_DEPARTMENTS
+
+    # Items are read for every cover served and rarely change
+    cache_results = True
+
+    # Items are seeded by name
+    unique = [('name',)]
+
     def create_table(self):
         """
         Create the Items table
@@ -376,9 +382,6 @@ class Items(TableBase):
         :param cur: Cursor : database cursor
         :param db: Connection : database connection
         """
-        # Set constant DEPARTMENTS
-        self.DEPARTMENTS = ['drink', 'food', 'other']
-
         # Initialize the TableBase
         super().__init__(cur, db, 'item', Item)
 
@@ -397,6 +400,21 @@ class Items(TableBase):
         :param description: str: description of the Item
         :return: Item: new Item
         """
+        # Add the item to the Items table
+        new_item = self.add_many([dict(name=name, price=price, cost=cost, vat=vat, quantity=quantity,
+                                       individual_volume=individual_volume, total_volume=total_volume,
+                                       department=department, description=description)])[0]
+
+        print(f'Item<{name}> added')
+
+        return new_item
+
+    def validate_record(self, name: str, price: float, cost: float, vat: float, quantity: int, individual_volume: int,
+                        total_volume: int, department: str, description: str) -> dict:
+        """
+        Validate a new Item, see add for the parameters
+        :return: dict: the values to insert by column
+        """
 
         from helper import check_gte_0
 
@@ -414,10 +432,6 @@ class Items(TableBase):
         if department.lower() not in self.DEPARTMENTS:
             raise ValueError(f'Department<{department}> is not valid')
 
-        # If the item already exists, raise ValueError
-        if self.get(name=name):
-            raise ValueError(f'Item<{name}> already exists')
-
         non_zero_values = [(price, 'price'), (vat, 'vat'), (quantity, 'quantity'),
                            (individual_volume, 'individual_volume'),
                            (total_volume, 'total_volume')]
@@ -425,18 +439,27 @@ class Items(TableBase):
         for value, var_name in non_zero_values:
             check_gte_0(value, var_name)
 
-        # Add the item to the Items table
-        self.cur.execute('''
-            INSERT INTO item (name, price, cost, vat, quantity, individual_volume, total_volume, department, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (name, price, cost, vat, quantity, individual_volume, total_volume, department, description))
+        return dict(name=name, price=price, cost=cost, vat=vat, quantity=quantity, individual_volume=individual_volume,
+                    total_volume=total_volume, department=department, description=description)
 
-        self.db.commit()
-        print(f'Item<{name}> added')
+    def validate_records(self, records: list[dict]) -> None:
+        """
+        Check that none of the new Items share a name with each other or an existing Item
+        :param records: list[dict]: the values to insert by column
+        :return: None
+        """
+        names = [record['name'] for record in records]
 
-        new_item = Item(self.cur.lastrowid, self.cur, self.db)
+        # If a name is repeated in the new items, raise ValueError
+        if len(set(names)) != len(names):
+            repeated = sorted({name for name in names if names.count(name) > 1})
+            raise ValueError(f'Item<{", ".join(repeated)}> added more than once')
 
-        return new_item
+        # If any of the items already exist, raise ValueError
+        existing = self.cur.execute(f'SELECT name FROM item WHERE name IN ({", ".join("?" * len(names))})',
+                                    names).fetchall()
+        if existing:
+            raise ValueError(f'Item<{", ".join(name for name, in existing)}> already exists')
 
     def __repr__(self):
         """
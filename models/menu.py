@@ -1,22 +1,20 @@
 from sqlite3 import Cursor, Connection
 
 from models.base import RowBase, TableBase
-from models.menuitem import MenuItems, MenuItem
+from models.menuitem import MenuItem
+from models.registry import RelatedTable
 
 
 class Menu(RowBase):
     attributes = ['name', 'active', 'max_size']
     table_name = 'menu'
 
-    def __init__(self, menu_id: int, cur: Cursor, db: Connection) -> None:
+    # Link table between Menu and Item
+    __menu_items = RelatedTable('MenuItems')
 
-        super().__init__(menu_id, cur, db)
+    def __init__(self, menu_id: int, cur: Cursor, db: Connection, row: tuple = None) -> None:
 
-        # Initialize the MenuItems
-        self.__menu_items = MenuItems(self.cur, self.db)
-
-        # Set the relationship variables
-        self._items = []
+        super().__init__(menu_id, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -155,8 +153,7 @@ class Menu(RowBase):
             raise ValueError(f'Item<{item_id}> does not exist')
 
         # If there is already a MenuItem with the same item_id, return
-        if len(self.__menu_items.get(True, item_id=item_id, menu_id=self.id)) > 0:
-            print('fm', self.__menu_items.get(True, item_id=item_id, menu_id=self.id))
+        if self.__menu_items.exists(item_id=item_id, menu_id=self.id):
             return
 
         # If the menu is full, raise ValueError
@@ -181,7 +178,7 @@ class Menu(RowBase):
             raise ValueError(f'Item<{item_id}> does not exist')
 
         # Get the MenuItem with the item_id
-        menu_item = self.__menu_items.get(item_id=item_id, menu_id=self.id)
+        menu_item = self.__menu_items.first(item_id=item_id, menu_id=self.id)
 
         # If there is no MenuItem with the item_id, return
         if not menu_item: return
@@ -200,6 +197,14 @@ class Menu(RowBase):
 
 
 class Menus(TableBase):
+    aliases = {'mid': 'id'}
+
+    # Menus are looked up by name while items are assigned to them
+    cache_results = True
+
+    # Menus are seeded by name
+    unique = [('name',)]
+
     def __init__(self, cur: Cursor, db: Connection):
         super().__init__(cur, db, 'menu', Menu)
 
@@ -226,22 +231,18 @@ class Menus(TableBase):
         :param max_size: int max size of the Menu
         :return Menu: new Menu object
         """
-        # Validate inputs
-        self.validate_types([(name, str, 'name'), (active, bool, 'active'), (max_size, int, 'max_size')])
-
         # Insert the new Menu into the database
-        self.cur.execute('''
-            INSERT INTO menu (name, active, max_size)
-            VALUES (?, ?, ?)
-        ''', (name, int(active), max_size))
-
-        # Commit the changes
-        self.db.commit()
+        return self.add_many([dict(name=name, active=active, max_size=max_size)])[0]
 
-        # Get the id of the new Menu
-        new_menu = Menu(self.cur.lastrowid, self.cur, self.db)
+    def validate_record(self, name: str, active: bool, max_size: int) -> dict:
+        """
+        Validate a new Menu, see add for the parameters
+        :return dict: values to insert by column
+        """
+        # Validate inputs
+        self.validate_types([(name, str, 'name'), (active, bool, 'active'), (max_size, int, 'max_size')])
 
-        return new_menu
+        return dict(name=name, active=int(active), max_size=max_size)
 
     def __repr__(self):
         return f'<Menus rows={self.rows[0:5]}...>'
@@ -1,11 +1,12 @@
 from .base import RowBase, TableBase
+from .registry import RelatedTable
 
 
 class MenuItem(RowBase):
     attributes = ['menu_id', 'item_id']
     table_name = 'menu_item'
-    def __init__(self, menu_item_id: int, cur, db) -> None:
-        super().__init__(menu_item_id, cur, db)
+    def __init__(self, menu_item_id: int, cur, db, row: tuple = None) -> None:
+        super().__init__(menu_item_id, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -38,6 +39,14 @@ class MenuItem(RowBase):
 
 
 class MenuItems(TableBase):
+    indexes = [('menu_id',), ('item_id',)]
+
+    # Each item is only on a menu once
+    unique = [('menu_id', 'item_id')]
+
+    # Related tables
+    __menus = RelatedTable('Menus')
+
     def create_table(self):
         self.cur.execute('''
             CREATE TABLE IF NOT EXISTS menu_item (
@@ -58,23 +67,18 @@ class MenuItems(TableBase):
         super().__init__(cur, db, 'menu_item', MenuItem)
 
     def add(self, menu_id: int, item_id: int) -> MenuItem:
-        from .menu import Menus
+        new_menu_item = self.add_many([dict(menu_id=menu_id, item_id=item_id)])[0]
 
-        self.cur.execute('''
-            INSERT INTO menu_item (menu_id, item_id)
-            VALUES (?, ?)
-        ''', (menu_id, item_id))
+        print(f'Item<{item_id}> added to Menu<{menu_id}>')
+
+        return new_menu_item
 
+    def validate_record(self, menu_id: int, item_id: int) -> dict:
         # Check if the menu is full
-        if Menus(self.cur, self.db).get(mid=menu_id)[0].full:
+        if self.__menus.find(menu_id).full:
             raise ValueError(f'Menu<{menu_id}> is full')
 
-        self.db.commit()
-        print(f'Item<{item_id}> added to Menu<{menu_id}>')
-
-        new_menu_item = MenuItem(self.cur.lastrowid, self.cur, self.db)
-
-        return new_menu_item
+        return dict(menu_id=menu_id, item_id=item_id)
 
     def __repr__(self):
         return f'<MenuItems rows={self.rows[0:3]}...>'
@@ -0,0 +1,184 @@
+"""
+This file contains the query compiler which turns TableBase.get filters into a parameterised SQL WHERE clause
+"""
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+
+class CompiledQuery(NamedTuple):
+    """
+    A named tuple for the result of compile_filters
+    """
+    where: str
+    params: tuple
+    python_filters: list[tuple[str, Any]]
+
+
+def resolve_column(key: str, columns: list[str], aliases: dict[str, str]) -> str | None:
+    """
+    Get the column a filter key refers to
+    :param key: str: the filter key, e.g. name, bid or created_between
+    :param columns: list[str]: the columns of the table
+    :param aliases: dict[str, str]: short names for columns, e.g. {'bid': 'id'}
+    :return: str | None: the column, or None if the key is not a column (e.g. a computed property)
+    """
+    if key.endswith('_between'):
+        base = key[:-len('_between')]
+
+        # created_between refers to created_at
+        for candidate in [base, f'{base}_at']:
+            column = resolve_column(candidate, columns, aliases)
+            if column:
+                return column
+
+        return None
+
+    column = aliases.get(key, key)
+
+    return column if column in columns else None
+
+
+def normalise_filters(filters: dict, columns: list[str], aliases: dict[str, str]) -> dict:
+    """
+    Order filters by the column they refer to, so the same filters compile to the same query whatever order they were
+    given in, e.g. for the query cache
+    :param filters: dict: the filters passed to get()
+    :param columns: list[str]: the columns of the table
+    :param aliases: dict[str, str]: short names for columns, e.g. {'bid': 'id'}
+    :return: dict: the filters in order
+    """
+    return dict(sorted(filters.items(), key=lambda item: resolve_column(item[0], columns, aliases) or item[0]))
+
+
+def validate_between(key: str, value: tuple) -> tuple[datetime, datetime]:
+    """
+    Validate the value of a *_between filter
+    :param key: str: the filter key
+    :param value: tuple: the value in the format (start, end)
+    :return: tuple[datetime, datetime]: the start and end
+    """
+    from helper import validate_types
+
+    start, end = value
+    validate_types([(start, datetime, 'start'), (end, datetime, 'end')])
+
+    # If the end is before the start, raise a ValueError
+    if start > end:
+        raise ValueError(f'Start date must be before end date for {key}')
+
+    return start, end
+
+
+def compile_filters(columns: list[str], aliases: dict[str, str], match_all: bool, filters: dict) -> CompiledQuery:
+    """
+    Compile get() filters into a WHERE clause joined by AND (match_all) or OR
+    :param columns: list[str]: the columns of the table
+    :param aliases: dict[str, str]: short names for columns, e.g. {'bid': 'id'}
+    :param match_all: bool: whether to find the intersection (True) or union (False) of the filters
+    :param filters: dict: the filters passed to get()
+    :return: CompiledQuery: the WHERE clause, its parameters and the filters that are not columns
+    """
+    conditions = []
+    params = []
+    python_filters = []
+
+    for key, value in filters.items():
+        column = resolve_column(key, columns, aliases)
+
+        # Filters on computed properties can not be run in SQL
+        if column is None:
+            if key.endswith('_between'):
+                validate_between(key, value)
+            python_filters.append((key, value))
+            continue
+
+        if key.endswith('_between'):
+            start, end = validate_between(key, value)
+            conditions.append(f'{column} BETWEEN ? AND ?')
+            # Datetimes are bound with connector.adapt_datetime, which stores them in the same format as the columns
+            params.extend([start, end])
+        elif value is None:
+            conditions.append(f'{column} IS NULL')
+        else:
+            conditions.append(f'{column} = ?')
+            params.append(value)
+
+    where = f' {"AND" if match_all else "OR"} '.join(conditions)
+
+    return CompiledQuery(where, tuple(params), python_filters)
+
+
+def matches_python_filter(row, key: str, value: Any) -> bool:
+    """
+    Check if a row matches a filter that could not be compiled to SQL
+    :param row: RowBase: the row to check
+    :param key: str: the filter key
+    :param value: Any: the filter value
+    :return: bool: True if the row matches
+    """
+    if key.endswith('_between'):
+        base = key[:-len('_between')]
+        attribute = base if hasattr(row, base) else f'{base}_at'
+        start, end = value
+
+        return start <= getattr(row, attribute) <= end
+
+    return getattr(row, key) == value
+
+
+def compile_fields(fields: list[str], columns: list[str], aliases: dict[str, str]) -> list[str]:
+    """
+    Get the columns for the fields of a select
+    :param fields: list[str]: the fields, columns or aliases
+    :param columns: list[str]: the columns of the table
+    :param aliases: dict[str, str]: short names for columns, e.g. {'bid': 'id'}
+    :return: list[str]: the columns
+    """
+    selected = []
+
+    for field in fields:
+        column = aliases.get(field, field)
+
+        # Only columns can be selected, names are formatted into the query so they must be checked
+        if column not in columns:
+            raise ValueError(f'{field} is not a column, expected one of {", ".join(columns)}')
+
+        selected.append(column)
+
+    return selected
+
+
+def compile_order_by(order_by: str | list[str], columns: list[str], aliases: dict[str, str]) -> str:
+    """
+    Compile the order of a select into an ORDER BY clause
+    :param order_by: str | list[str]: the columns to sort by, a column starting with - is sorted in descending order
+    :param columns: list[str]: the columns of the table
+    :param aliases: dict[str, str]: short names for columns, e.g. {'bid': 'id'}
+    :return: str: the ORDER BY clause, or an empty string if there is no order
+    """
+    if not order_by:
+        return ''
+
+    if isinstance(order_by, str):
+        order_by = [order_by]
+
+    terms = []
+    for field in order_by:
+        descending = field.startswith('-')
+        column, = compile_fields([field.lstrip('-')], columns, aliases)
+        terms.append(f'{column} DESC' if descending else column)
+
+    return f'ORDER BY {", ".join(terms)}'
+
+
+@lru_cache(maxsize=None)
+def record_type(table_name: str, fields: tuple[str, ...]) -> type:
+    """
+    Get the named tuple class for the records of a select, made once for each table and fields
+    :param table_name: str: the table selected from, e.g. bill_item
+    :param fields: tuple[str, ...]: the fields selected
+    :return: type: the named tuple class, e.g. BillItemRecord(id, total)
+    """
+    return namedtuple(f'{table_name.title().replace("_", "")}Record', fields)
@@ -0,0 +1,113 @@
+"""
+This file contains the registry of tables, which lets rows reach related tables without building them in their
+constructors
+"""
+from sqlite3 import Cursor, Connection
+
+# Every TableBase subclass by class name, filled in by TableBase.__init_subclass__
+TABLE_CLASSES: dict[str, type] = {}
+
+
+class TableRegistry:
+    """
+    The tables of one connection, each table is only created the first time it is used
+
+    Attributes
+    ----------
+    cur : Cursor
+        Cursor the tables are created with
+    db : Connection
+        Connection the tables are created with
+    tables : dict
+        The tables created so far, by class name
+
+    :returns None
+    """
+
+    def __init__(self, cur: Cursor, db: Connection) -> None:
+        self.cur = cur
+        self.db = db
+        self.tables = {}
+
+    def __getitem__(self, name: str):
+        """
+        Get a table by class name, e.g. registry['BillItems']
+
+        :param name: str Name of the TableBase subclass
+        :return TableBase: the table
+        """
+        if name not in self.tables:
+            # Make sure every model has been imported so its table is registered
+            import models
+
+            if name not in TABLE_CLASSES:
+                raise KeyError(f'{name} is not a table')
+
+            self.tables[name] = TABLE_CLASSES[name](self.cur, self.db)
+
+        return self.tables[name]
+
+
+def table_registry(cur: Cursor, db: Connection) -> TableRegistry:
+    """
+    Get the table registry of a connection, creating it the first time
+
+    :param cur: Cursor Cursor to the database
+    :param db: Connection Connection to the database
+    :return TableRegistry: the table registry of the connection
+    """
+    # Plain sqlite3 connections can not hold the registry, so tables are not shared
+    if not hasattr(db, 'tables'):
+        return TableRegistry(cur, db)
+
+    if db.tables is None:
+        db.tables = TableRegistry(cur, db)
+
+    return db.tables
+
+
+class RelatedTable:
+    """
+    Descriptor for a table related to a row (or another table), resolved from the registry when it is first used
+
+    e.g. __bill_items = RelatedTable('BillItems') then self.__bill_items.get(bid=self.id)
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        :param name: str Name of the TableBase subclass
+        """
+        self.name = name
+
+    def __get__(self, instance, owner):
+        # Accessed on the class itself
+        if instance is None:
+            return self
+
+        return table_registry(instance.cur, instance.db)[self.name]
+
+
+def report_missing_indexes(cur: Cursor, db: Connection) -> dict[str, list[str]]:
+    """
+    Check every table for foreign keys and declared index columns that get() would have to scan the table for, and
+    print them
+
+    :param cur: Cursor Cursor to the database
+    :param db: Connection Connection to the database
+    :return dict[str, list[str]]: the columns without a usable index, by table name
+    """
+    # Make sure every model has been imported so its table is registered
+    import models
+
+    tables = table_registry(cur, db)
+    missing = {}
+
+    for name in TABLE_CLASSES:
+        table = tables[name]
+        columns = table.missing_indexes()
+
+        if columns:
+            missing[table.table_name] = columns
+            print(f'Table {table.table_name} has no index for {", ".join(columns)}')
+
+    return missing
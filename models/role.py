@@ -8,14 +8,6 @@ class Role(RowBase):
 
     table_name = 'role'
     attributes = ['name']
-    def __init(self, rid: int, cur: Cursor, db: Connection):
-        from helper import validate_types
-
-        self.validate_types = validate_types
-
-        # Get all the attributes of the Role
-        super().__init__(rid, cur, db)
-
     @property
     def id(self) -> int:
         return self._id
@@ -37,6 +29,14 @@ class Role(RowBase):
         self.set_attribute('name', new_name)
 
 class Roles(TableBase):
+    aliases = {'rid': 'id'}
+
+    # Roles are looked up by name whenever staff are chosen and rarely change
+    cache_results = True
+
+    # Roles are seeded by name
+    unique = [('name',)]
+
     def create_table(self):
         self.cur.execute('''
             CREATE TABLE IF NOT EXISTS role (
@@ -53,16 +53,24 @@ class Roles(TableBase):
     def __init__(self, cur: Cursor, db: Connection):
         super().__init__(cur, db, 'role', Role)
 
-        self.add_initial_roles()
-
     def add_initial_roles(self):
+        """
+        Add the roles staff are chosen from, which simulation_prep seeds before the staff
+        """
         roles = ['server', 'bartender', 'supervisor', 'manager', 'superuser']
 
-        for role in roles:
-            if not self.get(name=role):
-                self.add(role)
+        # Add the roles which do not exist yet in one statement
+        self.upsert_many([dict(name=role) for role in roles])
 
     def add(self, name: str) -> Role:
+        # Add the role
+        new_role = self.add_many([dict(name=name)])[0]
+
+        print(f'Role<{name}> added')
+
+        return new_role
+
+    def validate_record(self, name: str) -> dict:
         # Validate types
         self.validate_types([(name, str, 'name')])
 
@@ -70,14 +78,5 @@ class Roles(TableBase):
         if len(name) < 1 or len(name) > 25:
             raise ValueError('name must be between 1 and 25 characters long')
 
-        # Add the role
-        new_role = Role(row_id=self.cur.execute('''
-            INSERT INTO role (name)
-            VALUES (?)
-        ''', (name,)).lastrowid, cur=self.cur, db=self.db)
-
-        self.db.commit()
-        print(f'Role<{name}> added')
-
-        return new_role
+        return dict(name=name)
 
@@ -0,0 +1,92 @@
+"""
+This file contains the schema registry which keeps the tables and columns of the database, so they are not looked up
+in sqlite_master for every row
+"""
+from sqlite3 import Connection
+
+
+class Schema:
+    """
+    The tables of the database and their columns, scoped to one connection
+
+    Loaded the first time they are used and reloaded after DDL, a table that is not found is looked up again in case
+    another connection has created it
+
+    Attributes
+    ----------
+    db : Connection
+        Connection the schema is read through
+    tables : dict | None
+        Columns of each table by name, each table's columns are read the first time they are used. None until loaded
+
+    :returns None
+    """
+
+    def __init__(self, db: Connection) -> None:
+        """
+        Initialise the Schema class, nothing is read until it is used
+
+        :param db: Connection Connection to the database
+        """
+        self.db = db
+        self.tables = None
+
+    def load(self) -> None:
+        """
+        Read the names of the tables from sqlite_master
+        """
+        self.tables = {name: None for name, in
+                       self.db.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
+
+    def table_exists(self, table_name: str) -> bool:
+        """
+        Check if a table exists
+
+        :param table_name: str Name of the table
+        :return bool: True if the table exists, False otherwise
+        """
+        # A table that is not known may have been created since the schema was loaded
+        if self.tables is None or table_name not in self.tables:
+            self.load()
+
+        return table_name in self.tables
+
+    def columns(self, table_name: str) -> list[str]:
+        """
+        Get the columns of a table
+
+        :param table_name: str Name of the table
+        :return list[str]: the columns in the order they were declared
+        """
+        # If the table does not exist, raise ValueError
+        if not self.table_exists(table_name):
+            raise ValueError(f'Table {table_name} does not exist')
+
+        if self.tables[table_name] is None:
+            self.tables[table_name] = [column[1] for column in
+                                       self.db.execute(f'PRAGMA table_info({table_name})').fetchall()]
+
+        return self.tables[table_name]
+
+    def refresh(self) -> None:
+        """
+        Forget the schema so it is read again when it is next used, e.g. after a table is created or dropped
+        """
+        self.tables = None
+
+
+def schema(db: Connection) -> Schema:
+    """
+    Get the schema registry of a connection, creating it the first time
+
+    :param db: Connection Connection to the database
+    :return Schema: the schema registry of the connection
+    """
+    # Plain sqlite3 connections can not hold the registry, so the schema is read each time
+    if not hasattr(db, 'schema'):
+        return Schema(db)
+
+    if db.schema is None:
+        db.schema = Schema(db)
+
+    return db.schema
@@ -2,6 +2,7 @@ from datetime import datetime
 from sqlite3 import Cursor, Connection
 
 from facades.bill_only import get_all_bills_by_seat
+from constants import SEAT_STATUSES, SEAT_TYPES
 from models.base import RowBase, TableBase
 
 
@@ -12,12 +13,11 @@ class Seat(RowBase):
     attributes = ['name', 'max_size', 'flagged', 'status', 'type']
     table_name = 'seating'
 
-    def __init__(self, seat_id: int, cur: Cursor, db: Connection) -> None:
-        self._bills = []
-        self.STATUSES = ['clear', 'reserved', 'okay', 'mains', 'desserts', 'bill', 'paid', 'check', 'empty']
-        self.TYPES = ['table', 'booth', 'bar', 'high-table']
+    STATUSES = SEAT_STATUSES
+    TYPES = SEAT_TYPES
 
-        super().__init__(seat_id, cur, db)
+    def __init__(self, seat_id: int, cur: Cursor, db: Connection, row: tuple = None) -> None:
+        super().__init__(seat_id, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -170,8 +170,7 @@ class Seat(RowBase):
 
         :return list : bills of the Seat
         """
-        self._bills = get_all_bills_by_seat(self.id, self.cur, self.db)
-        return self._bills
+        return get_all_bills_by_seat(self.id, self.cur, self.db)
 
     @property
     def current_occupancy(self):
@@ -221,6 +220,18 @@ class Seat(RowBase):
 
 
 class Seats(TableBase):
+    aliases = {'sid': 'id'}
+    indexes = [('status',)]
+
+    # Empty seats are looked up for every booking, a seat changing status drops the cached results
+    cache_results = True
+
+    # Seats are seeded by name
+    unique = [('name',)]
+
+    STATUSES = SEAT_STATUSES
+    TYPES = SEAT_TYPES
+
     def create_table(self):
         # Create the table
         self.cur.execute('''
@@ -238,10 +249,6 @@ class Seats(TableBase):
         ''')
 
     def __init__(self, cur: Cursor, db: Connection):
-
-        self.STATUSES = ['clear', 'reserved', 'okay', 'mains', 'desserts', 'bill', 'paid', 'check', 'empty']
-
-        self.TYPES = ['table', 'booth', 'bar', 'high-table']
         super().__init__(cur, db, 'seating', Seat)
 
     def add(self, name: str, max_size: int, flagged: bool, status: str, seat_type: str) -> Seat:
@@ -255,6 +262,15 @@ class Seats(TableBase):
         :param seat_type: str Type of the Seat
         :return Seat : New Seat object
         """
+        return self.add_many([dict(name=name, max_size=max_size, flagged=flagged, status=status,
+                                   seat_type=seat_type)])[0]
+
+    def validate_record(self, name: str, max_size: int, flagged: bool, status: str, seat_type: str) -> dict:
+        """
+        Validate a new Seat, see add for the parameters
+
+        :return dict : values to insert by column
+        """
 
         # Validate types
         self.validate_types([(name, str, 'name'), (max_size, int, 'max_size'), (flagged, bool, 'flagged'),
@@ -274,17 +290,9 @@ class Seats(TableBase):
         if seat_type not in self.TYPES:
             raise ValueError(f'type must be one of {', '.join(self.TYPES)}')
 
-        # Insert the new Seat into the database
-        new_id = self.cur.execute(f'''
-            INSERT INTO seating (name, max_size, flagged, status, type, created_at, updated_at)
-            VALUES ('{name}', {max_size}, {flagged}, '{status}', '{seat_type}', '{datetime.now()}', '{datetime.now()}');
-        ''').lastrowid
-        self.db.commit()
-
-        # Create a new Seat object
-        new_seat = Seat(new_id, self.cur, self.db)
-
-        return new_seat
+        # The seating table has no defaults for the timestamps
+        return dict(name=name, max_size=max_size, flagged=flagged, status=status, type=seat_type,
+                    created_at=str(datetime.now()), updated_at=str(datetime.now()))
 
     def __repr__(self):
         return '<Seating>'
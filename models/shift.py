@@ -1,9 +1,8 @@
 from datetime import datetime
 
-from .action import Actions
-from .approval import Approvals
+from connector import current_time
 from .base import RowBase, TableBase
-from .staff import StaffMembers
+from .registry import RelatedTable
 
 
 class Shift(RowBase):
@@ -11,13 +10,16 @@ class Shift(RowBase):
                   'approval_id']
     table_name = 'shift'
 
-    def __init__(self, shift_id: int, cur, db) -> None:
+    # Related rows, see RowMeta
+    row_state = ('_staff_member', '_approval')
 
-        self.__approvals = Approvals(self.cur, self.db)
-        self.__staff_members = StaffMembers(self.cur, self.db)
-        self.__actions = Actions(self.cur, self.db)
+    # Related tables
+    __approvals = RelatedTable('Approvals')
+    __staff_members = RelatedTable('StaffMembers')
+    __actions = RelatedTable('Actions')
 
-        super().__init__(shift_id, cur, db)
+    def __init__(self, shift_id: int, cur, db, row: tuple = None) -> None:
+        super().__init__(shift_id, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -29,35 +31,37 @@ class Shift(RowBase):
         if not self._staff_id:
             return None
 
-        return self.__staff_members.get(sid=self._staff_id)[0]
+        # Use the staff member prefetched by get if it is still the row's staff member
+        staff_member = self.attached('staff_member', self._staff_id)
+        if staff_member is not None:
+            return staff_member
+
+        return self.__staff_members.find(self._staff_id)
 
     @staff_member.setter
     def staff_member(self, new_staff_id: int) -> None:
         # If there is no staff member with the new_staff_id, raise ValueError
-        staff_member = self.__staff_members.get(sid=new_staff_id)[0]
+        staff_member = self.__staff_members.first(sid=new_staff_id)
         if not staff_member:
             raise ValueError(f'Staff<{new_staff_id}> does not exist')
 
         # Set the staff_id
         self.set_attribute('staff_id', staff_member.id)
 
-    @staticmethod
-    def __handle_date(date: datetime) -> str:
-        date = date[0: date.rfind('.')]
+    def __handle_date(self, date: datetime | str) -> datetime:
         if type(date) is str:
-            date = datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
+            date = datetime.fromisoformat(date)
         # Validate types
         self.validate_types([(date, datetime, 'date')])
 
         # If date is in the future, raise a ValueError
-        if date > datetime.now():
+        if date > current_time(self.db):
             raise ValueError(f'Created at must be in the past, not {date}')
         return date
 
     @property
     def started_at(self) -> datetime:
-        return datetime.strptime(self._started_at, '%Y-%m-%d %H:%M:%S') if type(
-            self._started_at) is str else self._started_at
+        return self._started_at
 
     @started_at.setter
     def started_at(self, new_started_at: datetime) -> None:
@@ -67,8 +71,7 @@ class Shift(RowBase):
 
     @property
     def ended_at(self) -> datetime:
-        return datetime.strptime(self._ended_at, '%Y-%m-%d %H:%M:%S') if type(
-            self._ended_at) is str else self._ended_at
+        return self._ended_at
 
     @ended_at.setter
     def ended_at(self, new_ended_at: datetime) -> None:
@@ -78,8 +81,7 @@ class Shift(RowBase):
 
     @property
     def break_started_at(self) -> datetime:
-        return datetime.strptime(self._break_started_at, '%Y-%m-%d %H:%M:%S') if type(
-            self._break_started_at) is str else self._break_started_at
+        return self._break_started_at
 
     @break_started_at.setter
     def break_started_at(self, new_break_started_at: datetime) -> None:
@@ -89,8 +91,7 @@ class Shift(RowBase):
 
     @property
     def break_ended_at(self) -> datetime:
-        return datetime.strptime(self._break_ended_at, '%Y-%m-%d %H:%M:%S') if type(
-            self._break_ended_at) is str else self._break_ended_at
+        return self._break_ended_at
 
     @break_ended_at.setter
     def break_ended_at(self, new_break_ended_at: datetime) -> None:
@@ -120,12 +121,17 @@ class Shift(RowBase):
         if not self._approval_id or self._approval_id == 'NULL':
             return None
 
-        return self.__approvals.get(aid=self._approval_id)[0]
+        # Use the approval prefetched by get if it is still the row's approval
+        approval = self.attached('approval', self._approval_id)
+        if approval is not None:
+            return approval
+
+        return self.__approvals.find(self._approval_id)
 
     @approval.setter
     def approval(self, new_approval_id: int) -> None:
         # If there is no approval with the new_approval_id, raise ValueError
-        approval = self.__approvals.get(aid=new_approval_id)[0]
+        approval = self.__approvals.first(aid=new_approval_id)
         if not approval:
             raise ValueError(f'Approval<{new_approval_id}> does not exist')
 
@@ -157,7 +163,7 @@ class Shift(RowBase):
         allowed_to_approve = ['manager', 'superuser']
 
         # If the staff_id is not permitted, raise ValueError
-        if not self.__staff_members.get(sid=staff_id)[0].role not in allowed_to_approve:
+        if not self.__staff_members.first(sid=staff_id).role not in allowed_to_approve:
             raise ValueError(f'Staff<{staff_id}> is not allowed to approve shifts')
 
         self.approval = self.__approvals.add(staff_id, shift_id=self.id)
@@ -166,6 +172,9 @@ class Shift(RowBase):
 
 
 class Shifts(TableBase):
+    indexes = [('staff_id',)]
+    relations = {'staff_member': ('staff_id', 'StaffMembers'), 'approval': ('approval_id', 'Approvals')}
+
     def create_table(self):
         self.cur.execute('''
             CREATE TABLE IF NOT EXISTS shift (
@@ -192,6 +201,11 @@ class Shifts(TableBase):
 
     def add(self, staff_id: int, started_at: datetime, ended_at: datetime, break_started_at: datetime,
             break_ended_at: datetime):
+        return self.add_many([dict(staff_id=staff_id, started_at=started_at, ended_at=ended_at,
+                                   break_started_at=break_started_at, break_ended_at=break_ended_at)])[0]
+
+    def validate_record(self, staff_id: int, started_at: datetime, ended_at: datetime, break_started_at: datetime,
+                        break_ended_at: datetime) -> dict:
         # Validate types
         self.validate_types([(staff_id, int, 'staff_id')])
 
@@ -216,15 +230,8 @@ class Shifts(TableBase):
         if break_ended_at > ended_at:
             raise ValueError(f'break_ended_at must be before ended_at, not {break_ended_at} and {ended_at}')
 
-        # Add the shift to the database
-        new_shift_id = self.cur.execute('''
-            INSERT INTO shift (staff_id, started_at, ended_at, break_started_at, break_ended_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (staff_id, started_at, ended_at, break_started_at, break_ended_at)).lastrowid
-
-        self.db.commit()
-
-        return Shift(new_shift_id, self.cur, self.db)
+        return dict(staff_id=staff_id, started_at=started_at, ended_at=ended_at, break_started_at=break_started_at,
+                    break_ended_at=break_ended_at)
 
     @property
     def unapproved_shifts(self):
@@ -232,4 +239,4 @@ class Shifts(TableBase):
 
     @property
     def currently_on_shift(self):
-        return self.get(True, started_at_between=(datetime.fromtimestamp(1), datetime.now()), ended_at=None)
+        return self.get(True, started_at_between=(datetime.fromtimestamp(1), current_time(self.db)), ended_at=None)
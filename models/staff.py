@@ -3,20 +3,23 @@ from datetime import datetime, timedelta
 from facades.bill_only import get_all_bills_created_by_staff_member, add_bill
 
 from models.base import RowBase, TableBase
-from models.role import Roles, Role
+from models.registry import RelatedTable
+from models.role import Role
 
 
 class StaffMember(RowBase):
     table_name = 'staff_member'
     attributes = ['name', 'role_id', 'wage']
 
-    def __init__(self, staff_id: int, cur, db) -> None:
-        from models import Bookings
+    # Related rows, see RowMeta
+    row_state = ('_role',)
 
-        super().__init__(staff_id, cur, db)
+    # Related tables
+    __bookings = RelatedTable('Bookings')
+    __roles = RelatedTable('Roles')
 
-        self.__bookings = Bookings(self.cur, self.db)
-        self.__roles = Roles(self.cur, self.db)
+    def __init__(self, staff_id: int, cur, db, row: tuple = None) -> None:
+        super().__init__(staff_id, cur, db, row)
 
     @property
     def id(self) -> int:
@@ -75,10 +78,10 @@ class StaffMember(RowBase):
     def add_action(self):
         pass
 
-    def start_shift(self):
+    def start_shift(self, at: datetime = None):
         pass
 
-    def end_shift(self):
+    def end_shift(self, at: datetime = None):
         pass
 
     def start_break(self):
@@ -102,7 +105,12 @@ class StaffMember(RowBase):
 
     @property
     def role(self):
-        return self.__roles.get(rid=self._role_id)
+        # Use the role prefetched by StaffMembers.get if it is still the staff member's role
+        role = self.attached('role', self._role_id)
+        if role is not None:
+            return role
+
+        return self.__roles.find(self._role_id)
 
     @role.setter
     def role(self, new_role: Role | None):
@@ -130,6 +138,10 @@ class StaffMember(RowBase):
 
 
 class StaffMembers(TableBase):
+    aliases = {'sid': 'id'}
+    indexes = [('role_id',)]
+    relations = {'role': ('role_id', 'Roles')}
+
     def create_table(self):
         self.cur.execute('''
             CREATE TABLE IF NOT EXISTS staff_member (
@@ -152,6 +164,13 @@ class StaffMembers(TableBase):
         super().__init__(cur, db, 'staff_member', StaffMember)
 
     def add(self, name: str, role_id: int, wage: float) -> StaffMember:
+        # Add the staff member
+        new_staff_member = self.add_many([dict(name=name, role_id=role_id, wage=wage)])[0]
+        print('StaffMember added')
+
+        return new_staff_member
+
+    def validate_record(self, name: str, role_id: int, wage: float) -> dict:
         # Validate types
         self.validate_types([(name, str, 'name'), (role_id, int, 'role_id'), (wage, float, 'wage')])
 
@@ -167,15 +186,4 @@ class StaffMembers(TableBase):
         if wage < 0:
             raise ValueError('wage must be greater than 0')
 
-        # Add the staff member
-        self.cur.execute('''
-            INSERT INTO staff_member (name, role_id, wage)
-            VALUES (?, ?, ?)
-        ''', (name, role_id, wage))
-        self.db.commit()
-        print('StaffMember added')
-
-        new_staff_member = StaffMember(self.cur.lastrowid, self.cur, self.db)
-
-        return new_staff_member
-        pass
+        return dict(name=name, role_id=role_id, wage=wage)
@@ -0,0 +1,162 @@
+"""
+This file contains the random number streams of the simulation, each part of the simulation draws from its own stream
+so a run can be repeated from its seed and parallel runs do not share random state
+"""
+import zlib
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from config import config
+
+
+class RandomStreams:
+    """
+    Independent numpy Generators by name, all derived from one seed
+
+    A stream's seed comes from the master seed and its name, so it draws the same numbers whatever order the streams
+    are first used in, and drawing more from one stream does not change the others
+
+    Attributes
+    ----------
+    seed_sequence : np.random.SeedSequence
+        The master seed
+    generators : dict
+        The generator of each stream, by name
+    callbacks : list
+        Called after the streams are reseeded, e.g. to drop samples drawn ahead from the old streams
+
+    :returns None
+    """
+
+    def __init__(self, seed: int | None = None, key: tuple[int, ...] = ()) -> None:
+        """
+        Initialise the RandomStreams class
+
+        :param seed: int | None The master seed, None to seed from the operating system
+        :param key: tuple[int, ...] Identifies a run within the seed, e.g. the day a worker simulates
+        """
+        self.seed_sequence = np.random.SeedSequence(seed, spawn_key=key)
+        self.generators: dict[str, np.random.Generator] = {}
+        self.callbacks: list[Callable[[], None]] = []
+
+    @property
+    def seed(self) -> int:
+        """
+        The master seed, pass it back to repeat the run
+        :return: int: the seed
+        """
+        return self.seed_sequence.entropy
+
+    def seed_for(self, name: str) -> np.random.SeedSequence:
+        """
+        Get the seed of a stream
+
+        :param name: str The name of the stream
+        :return np.random.SeedSequence: the seed
+        """
+        return np.random.SeedSequence(self.seed_sequence.entropy,
+                                      spawn_key=(*self.seed_sequence.spawn_key, zlib.crc32(name.encode())))
+
+    def stream(self, name: str) -> np.random.Generator:
+        """
+        Get the generator of a stream, creating it the first time
+
+        :param name: str The name of the stream, e.g. bookings
+        :return np.random.Generator: the generator
+        """
+        if name not in self.generators:
+            self.generators[name] = np.random.Generator(np.random.PCG64(self.seed_for(name)))
+
+        return self.generators[name]
+
+    def reseed(self, seed: int | None = None, key: tuple[int, ...] = ()) -> None:
+        """
+        Start every stream again from a new seed, the generators already handed out are reset in place
+
+        :param seed: int | None The master seed, None to seed from the operating system
+        :param key: tuple[int, ...] Identifies a run within the seed
+        """
+        self.seed_sequence = np.random.SeedSequence(seed, spawn_key=key)
+
+        for name, generator in self.generators.items():
+            generator.bit_generator.state = np.random.PCG64(self.seed_for(name)).state
+
+        for callback in self.callbacks:
+            callback()
+
+    def on_reseed(self, callback: Callable[[], None]) -> None:
+        """
+        Call a function each time the streams are reseeded
+
+        :param callback: Callable Called with no arguments
+        """
+        self.callbacks.append(callback)
+
+    def randint(self, name: str, low: int, high: int, size: int = None) -> int | np.ndarray:
+        """
+        Draw whole numbers between low and high, including high like random.randint
+
+        :param name: str The name of the stream
+        :param low: int The lowest number
+        :param high: int The highest number
+        :param size: int The number to draw, None for a single number
+        :return int | np.ndarray: the number, or an array of size numbers
+        """
+        drawn = self.stream(name).integers(low, high, size, endpoint=True)
+
+        return int(drawn) if size is None else drawn
+
+    def chance(self, name: str, percent: float, size: int = None) -> bool | np.ndarray:
+        """
+        Draw whether something with a percent chance happens, like random.random() * 100 < percent, so fractions of
+        a percent can happen too
+
+        :param name: str The name of the stream
+        :param percent: float The chance out of 100
+        :param size: int The number to draw, None for a single draw
+        :return bool | np.ndarray: True if it happens, or an array of size draws
+        """
+        happens = self.stream(name).random(size) * 100 < percent
+
+        return bool(happens) if size is None else happens
+
+    def pick(self, name: str, options: Sequence, size: int = None, weights: Sequence[float] = None) -> Any | list:
+        """
+        Pick from a sequence, like random.choice or random.choices. The options are indexed rather than converted to
+        an array, so rows and other objects are returned as they are
+
+        :param name: str The name of the stream
+        :param options: Sequence The options
+        :param size: int The number to pick, with replacement, None for a single option
+        :param weights: Sequence[float] The relative weight of each option, None for equal weights
+        :return Any | list: the option, or a list of size options
+        """
+        # If there is nothing to pick from, raise IndexError like random.choice
+        if not len(options):
+            raise IndexError('Cannot choose from an empty sequence')
+
+        p = None
+        if weights is not None:
+            p = np.asarray(weights, dtype=float) / sum(weights)
+
+        indexes = self.stream(name).choice(len(options), size, p=p)
+
+        if size is None:
+            return options[int(indexes)]
+
+        return [options[int(i)] for i in indexes]
+
+
+# The streams every module draws from, seeded by the seed in the config
+streams = RandomStreams(config['seed'])
+
+
+def seed(value: int | None = None, *key: int) -> None:
+    """
+    Reseed every stream of the simulation
+
+    :param value: int | None The master seed, None to seed from the operating system
+    :param key: int Identifies a run within the seed, e.g. the day a worker simulates
+    """
+    streams.reseed(value, key)
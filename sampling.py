@@ -0,0 +1,156 @@
+"""
+This file contains the truncated normal sampler, which draws the weighted random numbers used by the simulation
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from rng import streams
+
+# Below this chance of a normal sample landing in the range, samples are drawn by inverse CDF instead of rejection
+MIN_ACCEPTANCE = 0.1
+
+
+class TruncatedNormalSampler:
+    """
+    Draws samples from normal distributions truncated to [low, high], exactly rather than by clipping
+
+    Samples are drawn ahead in buffers, one for each (low, high, mean, std_dev), so a single draw is taken from the
+    buffer instead of calling numpy. Empty buffers are refilled when they are next drawn from
+
+    Attributes
+    ----------
+    buffer_size : int
+        Samples drawn ahead for each set of parameters
+    generator : np.random.Generator
+        The random number generator the samples are drawn with
+    buffers : dict
+        The samples drawn ahead and the position of the next one, by (low, high, mean, std_dev)
+
+    :returns None
+    """
+
+    def __init__(self, buffer_size: int = 1024, generator: np.random.Generator = None) -> None:
+        """
+        Initialise the TruncatedNormalSampler class
+
+        :param buffer_size: int Samples drawn ahead for each set of parameters
+        :param generator: np.random.Generator The random number generator to use, defaults to a new one
+        """
+        # If the buffer size is less than 1, raise ValueError
+        if buffer_size < 1:
+            raise ValueError(f'Buffer size must be at least 1, not {buffer_size}')
+
+        self.buffer_size = buffer_size
+        self.generator = generator or np.random.default_rng()
+        self.buffers: dict[tuple[float, float, float, float], list] = {}
+
+    def sample(self, low: float, high: float, mean: float, std_dev: float = 1, size: int = None) \
+            -> np.float64 | np.ndarray:
+        """
+        Draw from a normal distribution truncated to [low, high]
+
+        :param low: float The lowest value
+        :param high: float The highest value
+        :param mean: float The mean of the normal distribution before it is truncated
+        :param std_dev: float The standard deviation of the normal distribution before it is truncated
+        :param size: int The number of samples to draw, None for a single sample
+        :return np.float64 | np.ndarray: the sample, or an array of size samples
+        """
+        key = (low, high, mean, std_dev)
+
+        if key not in self.buffers:
+            # Validate the parameters once, when their buffer is created
+            self.validate(low, high, mean, std_dev)
+            self.buffers[key] = [np.empty(0), 0]
+
+        wanted = 1 if size is None else size
+        samples, position = self.buffers[key]
+
+        # Refill the buffer with the samples left and enough new ones for the draw
+        if len(samples) - position < wanted:
+            samples = np.concatenate([samples[position:], self.draw(*key, max(self.buffer_size, wanted))])
+            position = 0
+
+        self.buffers[key] = [samples, position + wanted]
+
+        if size is None:
+            return samples[position]
+
+        return samples[position:position + wanted].copy()
+
+    def draw(self, low: float, high: float, mean: float, std_dev: float, n: int) -> np.ndarray:
+        """
+        Draw new samples, by rejecting normal samples outside the range or by inverse CDF if too few would land in it
+
+        :param low: float The lowest value
+        :param high: float The highest value
+        :param mean: float The mean of the normal distribution before it is truncated
+        :param std_dev: float The standard deviation of the normal distribution before it is truncated
+        :param n: int The number of samples to draw
+        :return np.ndarray: the samples
+        """
+        # CDFs in the upper tail round to 1, so ranges above the mean are sampled mirrored into the lower tail
+        if low > mean:
+            return 2 * mean - self.draw(2 * mean - high, 2 * mean - low, mean, std_dev, n)
+
+        distribution = NormalDist(mean, std_dev)
+
+        # erfc keeps its precision in the lower tail, where NormalDist.cdf rounds to 0
+        low_cdf, high_cdf = (0.5 * math.erfc((mean - x) / (std_dev * math.sqrt(2))) for x in (low, high))
+        acceptance = high_cdf - low_cdf
+
+        # If no sample can land in the range, raise ValueError
+        if acceptance <= 0:
+            raise ValueError(f'[{low}, {high}] is too far from N({mean}, {std_dev}) to sample')
+
+        if acceptance < MIN_ACCEPTANCE:
+            # Map uniform samples between the CDFs of low and high back through the inverse CDF
+            uniform = self.generator.uniform(low_cdf, high_cdf, n).clip(np.nextafter(0, 1), np.nextafter(1, 0))
+
+            return np.array([distribution.inv_cdf(u) for u in uniform]).clip(low, high)
+
+        # Draw enough normal samples that most draws only need one pass, and keep the ones in the range
+        accepted = []
+        needed = n
+        while needed > 0:
+            normal = self.generator.normal(mean, std_dev, int(needed / acceptance * 1.1) + 16)
+            normal = normal[(normal >= low) & (normal <= high)][:needed]
+
+            accepted.append(normal)
+            needed -= len(normal)
+
+        return np.concatenate(accepted)
+
+    @staticmethod
+    def validate(low: float, high: float, mean: float, std_dev: float) -> None:
+        """
+        Check the parameters of a truncated normal distribution
+
+        :param low: float The lowest value
+        :param high: float The highest value
+        :param mean: float The mean of the normal distribution before it is truncated
+        :param std_dev: float The standard deviation of the normal distribution before it is truncated
+        """
+        # If the range is empty, raise ValueError
+        if low >= high:
+            raise ValueError(f'low<{low}> must be less than high<{high}>')
+
+        # If the standard deviation is not positive, raise ValueError
+        if std_dev <= 0:
+            raise ValueError(f'std_dev<{std_dev}> must be greater than 0')
+
+    def clear(self) -> None:
+        """
+        Drop the samples drawn ahead, e.g. after the generator is reseeded
+        """
+        self.buffers.clear()
+
+    def __repr__(self) -> str:
+        return f'<TruncatedNormalSampler buffer_size={self.buffer_size} buffers={len(self.buffers)}>'
+
+
+# The sampler every module shares, samples drawn ahead are dropped when the streams are reseeded so runs repeat
+sampler = TruncatedNormalSampler(generator=streams.stream('sampling'))
+streams.on_reseed(sampler.clear)
@@ -0,0 +1,59 @@
+import unittest
+from uuid import uuid4
+
+from config import test_config
+from connector import open_connection
+from models.base import TableBase
+from models.customer import Customers
+
+# Connect to the test database
+db = open_connection(test_config)
+
+# Create cursor
+cur = db.cursor()
+
+
+class PlainCustomers(Customers):
+    # Only checks the columns, like a table which does not validate its records
+    validate_record = TableBase.validate_record
+
+
+class TestAddMany(unittest.TestCase):
+    def setUp(self):
+        self.customers = Customers(cur, db)
+        self.name = f'add many {uuid4().hex[:8]}'
+
+    def tearDown(self):
+        cur.execute('DELETE FROM customer WHERE name LIKE ?', (f'{self.name}%',))
+        db.commit()
+        db.forget_loaded()
+
+    def test_added_rows_are_returned_in_record_order(self):
+        names = [f'{self.name} {i}' for i in range(3)]
+        rows = self.customers.add_many([dict(name=name, vip=False) for name in names])
+
+        self.assertEqual([row.name for row in rows], names)
+        self.assertEqual([row.id for row in rows], [self.customers.first(name=name).id for name in names])
+
+    def test_rows_are_added_in_one_insert(self):
+        statements = []
+        db.set_trace_callback(statements.append)
+        try:
+            self.customers.add_many([dict(name=f'{self.name} {i}', vip=False) for i in range(5)])
+        finally:
+            db.set_trace_callback(None)
+
+        self.assertEqual(len([sql for sql in statements if sql.strip().startswith('INSERT')]), 1)
+
+    def test_columns_left_out_of_records_are_added_as_null(self):
+        rows = PlainCustomers(cur, db).add_many([dict(name=f'{self.name} vip', vip=True), dict(name=self.name)])
+
+        self.assertEqual([row.vip for row in rows], [True, None])
+
+    def test_default_validation_rejects_unknown_columns(self):
+        with self.assertRaises(ValueError):
+            PlainCustomers(cur, db).add_many([dict(name=self.name, nickname='unknown')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,22 @@
 import unittest
 from datetime import datetime, timedelta
+from uuid import uuid4
 
 from faker import Faker
 
-# Connect to db
-from connector import connect
+# Connect to the test database
+from config import test_config
+from connector import open_connection
 from models.bill import Bills
+from models.billitem import BillItems
 from models.customer import Customers
+from models.item import Items
+from models.role import Roles
+from models.staff import StaffMembers
 
 fake = Faker()
 
-db = connect()
+db = open_connection(test_config)
 
 # Create cursor
 cur = db.cursor()
@@ -21,11 +27,34 @@ class TestBills(unittest.TestCase):
         self.db = db
         self.cur = cur
         self.customers = Customers(self.cur, self.db)
+        self.name = f'bills {uuid4().hex[:8]}'
 
-        random_customer = fake.random_element(self.customers.get())
+        # The customers and staff the bills are made for and by
+        self.customer, self.other_customer = self.customers.add_many(
+            [dict(name=f'{self.name} {i}', vip=False) for i in range(2)])
+
+        roles = Roles(self.cur, self.db)
+        roles.add_initial_roles()
+        self.staff_member, self.other_staff_member = StaffMembers(self.cur, self.db).add_many(
+            [dict(name=f'{self.name} {i}', role_id=roles.first(name='manager').id, wage=10.0) for i in range(2)])
 
         self.bills = Bills(self.cur, self.db)
-        self.bill = self.bills.add(customer_id=random_customer.id, seating_id=1, created_by_staff_id=1, total=100.0, covers=5)
+        self.bill = self.bills.add(customer_id=self.customer.id, seating_id=1, created_by_staff_id=self.staff_member.id,
+                                   total=100.0, covers=5)
+
+    def tearDown(self):
+        customer_ids = (self.customer.id, self.other_customer.id)
+        staff_ids = (self.staff_member.id, self.other_staff_member.id)
+        bills = 'SELECT id FROM bill WHERE customer_id IN (?, ?)'
+
+        self.cur.execute(f'DELETE FROM bill_item WHERE bill_id IN ({bills})', customer_ids)
+        self.cur.execute(f'DELETE FROM action WHERE bill_id IN ({bills}) OR staff_id IN (?, ?)',
+                         customer_ids + staff_ids)
+        self.cur.execute('DELETE FROM bill WHERE customer_id IN (?, ?)', customer_ids)
+        self.cur.execute('DELETE FROM staff_member WHERE id IN (?, ?)', staff_ids)
+        self.cur.execute('DELETE FROM customer WHERE id IN (?, ?)', customer_ids)
+        self.db.commit()
+        self.db.forget_loaded()
 
     def test_bill_creation_returns_correct_bill(self):
         retrieved_bill = self.bills.get(bid=self.bill.id)
@@ -33,11 +62,13 @@ class TestBills(unittest.TestCase):
 
     def test_bill_creation_with_non_existent_customer_id_raises_error(self):
         with self.assertRaises(ValueError):
-            self.bills.add(customer_id=9999, seating_id=1, created_by_staff_id=1, total=100.0, covers=5)
+            self.bills.add(customer_id=9999, seating_id=1, created_by_staff_id=self.staff_member.id, total=100.0,
+                           covers=5)
 
     def test_bill_creation_with_negative_total_raises_error(self):
         with self.assertRaises(ValueError):
-            self.bills.add(customer_id=1, seating_id=1, created_by_staff_id=1, total=-100.0, covers=5)
+            self.bills.add(customer_id=self.customer.id, seating_id=1, created_by_staff_id=self.staff_member.id,
+                           total=-100.0, covers=5)
 
     def test_bill_deletion_removes_bill(self):
         self.bills.delete(self.bill.id)
@@ -68,7 +99,7 @@ class TestBills(unittest.TestCase):
             self.bill.covers = new_covers
 
     def test_update_valid_customer_id_updates_value(self):
-        new_customer_id = 2
+        new_customer_id = self.other_customer.id
         self.bill.customer_id = new_customer_id
         self.assertEqual(self.bill.customer_id, new_customer_id)
 
@@ -89,7 +120,7 @@ class TestBills(unittest.TestCase):
     #         self.bill.seating_id = new_seating_id
 
     def test_update_valid_created_by_staff_id_updates_value(self):
-        new_created_by_staff_id = 2
+        new_created_by_staff_id = self.other_staff_member.id
         self.bill.created_by_staff_id = new_created_by_staff_id
         self.assertEqual(self.bill.created_by_staff_id, new_created_by_staff_id)
 
@@ -114,6 +145,28 @@ class TestBills(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.bill.updated_at = "2022-01-01"
 
+    def test_writes_are_stamped_with_the_connection_clock(self):
+        simulated = datetime(2020, 1, 1, 12, 30)
+        db.clock = lambda: simulated
+        try:
+            bill = self.bills.add(customer_id=self.bill.customer_id, covers=2)
+            bill.covers = 3
+        finally:
+            db.clock = datetime.now
+
+        self.assertEqual(bill.created_at, simulated)
+        self.assertEqual(bill.updated_at, simulated)
+
+    def test_failed_update_puts_back_old_value(self):
+        # The update action can not be created for a member of staff who does not exist
+        with self.assertRaises(ValueError):
+            self.bill.created_by_staff_id = 999
+
+        self.assertEqual(self.bill.created_by_staff_id, self.staff_member.id)
+        self.assertEqual(self.bill.dirty, {})
+        self.assertEqual(cur.execute('SELECT created_by_staff_id FROM bill WHERE id = ?', (self.bill.id,)).fetchone(),
+                         (self.staff_member.id,))
+
     def test_get_all_bills_returns_correct_bills(self):
         retrieved_bills = self.bills.get()
         self.assertIn(self.bill, retrieved_bills)
@@ -153,6 +206,38 @@ class TestBills(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.bills.get(created_between=(start, end))
 
+    def test_total_sums_items_without_complimentary_lines(self):
+        items = Items(self.cur, self.db)
+        item = items.add(fake.unique.pystr(), 5.0, 1.0, 0.2, 10, 1, 1, 'drink', 'misc')
+        self.addCleanup(items.delete, item.id)
+        bill = self.bills.add(customer_id=self.bill.customer_id, covers=2)
+
+        bill_items = BillItems(self.cur, self.db)
+        bill_items.add(bill.id, item.id, 1, quantity=2)
+        bill_items.add(bill.id, item.id, 1, staff_note='complimentary')
+        bill_items.add(bill.id, None, 1, staff_note='vegan')
+
+        self.assertEqual(bill.refresh_total(), 10.0)
+
+    def test_get_with_prefetch_attaches_customer(self):
+        bill = self.bills.get(bid=self.bill.id, prefetch=['customer'])[0]
+        self.assertIs(bill.attached('customer', bill.customer_id), bill.customer)
+        self.assertEqual(bill.customer.id, self.bill.customer_id)
+
+    def test_update_bill_without_staff_is_not_logged(self):
+        bill = self.bills.add(customer_id=self.bill.customer_id, covers=2)
+        actions = cur.execute('SELECT COUNT(*) FROM action WHERE bill_id = ?', (bill.id,)).fetchone()[0]
+
+        bill.covers = 3
+
+        self.assertEqual(self.bills.find(bill.id).covers, 3)
+        self.assertEqual(cur.execute('SELECT COUNT(*) FROM action WHERE bill_id = ?', (bill.id,)).fetchone()[0],
+                         actions)
+
+    def test_get_with_unknown_prefetch_raises_error(self):
+        with self.assertRaises(ValueError):
+            self.bills.get(bid=self.bill.id, prefetch=['nothing'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from datetime import datetime
+from uuid import uuid4
+
+from config import test_config
+from connector import open_connection
+from handlers.booking_generation import generate_bookings
+from models.bookings import Bookings
+from models.customer import Customers
+from rng import seed
+
+# Connect to the test database
+db = open_connection(test_config)
+
+# Create cursor
+cur = db.cursor()
+
+
+class TestBookingGeneration(unittest.TestCase):
+    def setUp(self):
+        self.customers = Customers(cur, db)
+        self.bookings = Bookings(cur, db)
+        self.name = f'bookings {uuid4().hex[:8]}'
+        self.customers.add_many([dict(name=f'{self.name} {i}', vip=i == 0) for i in range(3)])
+
+        # A Friday, which always has bookings
+        self.date = datetime(2031, 1, 3)
+
+    def tearDown(self):
+        self.forget_bookings()
+        cur.execute('DELETE FROM customer WHERE name LIKE ?', (f'{self.name}%',))
+        db.commit()
+        db.forget_loaded()
+
+    def forget_bookings(self):
+        cur.execute('DELETE FROM booking WHERE date BETWEEN ? AND ?',
+                    (self.date, self.date.replace(hour=23, minute=59, second=59)))
+        db.commit()
+        db.forget_loaded()
+
+    def generate(self):
+        seed(1234)
+        bookings = generate_bookings('friday', self.date, self.bookings, self.customers)
+
+        return [(booking.date, booking.covers, booking.customer_id, booking.comment) for booking in bookings]
+
+    def test_same_seed_generates_same_bookings(self):
+        bookings = self.generate()
+        self.forget_bookings()
+
+        self.assertTrue(bookings)
+        self.assertEqual(self.generate(), bookings)
+
+    def test_bookings_are_at_lunch_or_dinner_every_15_minutes(self):
+        for date, _, _, _ in self.generate():
+            minutes = date.hour * 60 + date.minute
+
+            self.assertEqual(date.date(), self.date.date())
+            self.assertEqual(minutes % 15, 0)
+            self.assertTrue(12 * 60 <= minutes <= 14 * 60 or 18 * 60 <= minutes <= 20 * 60, date)
+
+    def test_covers_are_between_0_and_15(self):
+        for _, covers, _, _ in self.generate():
+            self.assertTrue(0 <= covers <= 15)
+
+    def test_bookings_are_added_in_one_insert(self):
+        statements = []
+        db.set_trace_callback(statements.append)
+        try:
+            self.generate()
+        finally:
+            db.set_trace_callback(None)
+
+        self.assertEqual(len([sql for sql in statements if sql.strip().startswith('INSERT INTO booking')]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import threading
+import time
+import unittest
+
+from connector import connect, ConnectionPool
+from models.customer import Customers
+
+
+class TestConnector(unittest.TestCase):
+    def test_connecting_twice_in_one_thread_shares_the_connection(self):
+        self.assertIs(connect(), connect())
+
+    def test_connecting_in_another_thread_gets_another_connection(self):
+        # Connect first, the other thread's connection is released to the pool when it ends
+        db = connect()
+        connections = []
+        thread = threading.Thread(target=lambda: connections.append(connect()))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(connections[0], db)
+
+    def test_connection_uses_write_ahead_logging(self):
+        self.assertEqual(connect().execute('PRAGMA journal_mode').fetchone(), ('wal',))
+
+    def test_released_connection_is_reused(self):
+        pool = ConnectionPool(size=1)
+
+        with pool.connection() as first:
+            pass
+
+        with pool.connection() as second:
+            self.assertIs(first, second)
+
+        pool.close()
+
+    def test_released_connection_forgets_the_rows_it_loaded(self):
+        pool = ConnectionPool(size=1)
+
+        with pool.connection() as db:
+            customers = Customers(db.cursor(), db)
+            customer = customers.add('pooled', False)
+
+        # Another connection changes the row while the connection is idle
+        connect().execute('UPDATE customer SET name = ? WHERE id = ?', ('changed', customer.id))
+        connect().commit()
+
+        try:
+            with pool.connection() as db:
+                self.assertEqual(Customers(db.cursor(), db).find(customer.id).name, 'changed')
+        finally:
+            connect().execute('DELETE FROM customer WHERE id = ?', (customer.id,))
+            connect().commit()
+            pool.close()
+
+    def test_full_pool_times_out(self):
+        pool = ConnectionPool(size=1)
+
+        with pool.connection():
+            with self.assertRaises(TimeoutError):
+                pool.acquire(timeout=0.01)
+
+        pool.close()
+
+    def test_shared_connection_is_released_when_thread_ends(self):
+        pool = ConnectionPool(size=1)
+
+        thread = threading.Thread(target=pool.shared)
+        thread.start()
+        thread.join()
+
+        self.assertIsNotNone(pool.acquire(timeout=1))
+
+        pool.close()
+
+    def test_more_threads_than_connections_share_the_pool(self):
+        pool = ConnectionPool(size=2)
+        pool.timeout = 5
+        results = []
+
+        def work():
+            db = pool.shared()
+            time.sleep(0.01)
+            results.append(db.execute('SELECT 1').fetchone())
+
+        # The threads which can not get a connection wait for one released by a thread which has ended
+        threads = [threading.Thread(target=work) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [(1,)] * 5)
+        self.assertEqual(pool.opened, 2)
+
+        pool.close()
+
+    def test_released_shared_connection_is_only_released_once(self):
+        pool = ConnectionPool(size=1)
+
+        pool.shared()
+        pool.release_shared()
+        pool.release_shared()
+
+        self.assertEqual(pool.idle.qsize(), 1)
+
+        pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
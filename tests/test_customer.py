@@ -1,4 +1,5 @@
 import unittest
+from datetime import datetime
 
 from faker import Faker
 
@@ -25,8 +26,6 @@ class TestCustomer(unittest.TestCase):
         self.customer = self.customers.add(fake.name(), fake.boolean())
         self.bills = Bills(self.cur, self.db)
 
-        self.__reset()
-
     def test_set_up_created_table(self):
         """
         Test that the customer table exists
@@ -202,6 +201,36 @@ class TestCustomer(unittest.TestCase):
         # Assert that the retrieved customers list contains the new customer
         self.assertIn(new_customer, retrieved_customers)
 
+    def test_getting_customer_matching_all_filters_excludes_partial_matches(self):
+        """
+        Tests that getting customers with match_all only returns customers matching every filter
+        """
+        # Add two customers with the same name and different vip statuses
+        fake_name = fake.name()
+        vip_customer = self.customers.add(fake_name, True)
+        other_customer = self.customers.add(fake_name, False)
+
+        # Get customers by name and vip status
+        retrieved_customers = self.customers.get(True, name=fake_name, vip=True)
+
+        # Assert that only the vip customer was retrieved
+        self.assertIn(vip_customer, retrieved_customers)
+        self.assertNotIn(other_customer, retrieved_customers)
+
+    def test_getting_customer_matching_any_filter_includes_partial_matches(self):
+        """
+        Tests that getting customers without match_all returns customers matching any filter
+        """
+        # Add a customer
+        fake_name = fake.name()
+        new_customer = self.customers.add(fake_name, False)
+
+        # Get customers by name or a vip status the customer does not have
+        retrieved_customers = self.customers.get(name=fake_name, vip=True)
+
+        # Assert that the customer was retrieved
+        self.assertIn(new_customer, retrieved_customers)
+
     def test_getting_all_customers_returns_all(self):
         """
         Tests that all customers being retrieved is retrieved from the database
@@ -217,6 +246,70 @@ class TestCustomer(unittest.TestCase):
         # Assert that the all_customers list contains the new customer
         self.assertIn(new_customer, all_customers)
 
+    def test_indexing_rows_returns_same_customer_as_iterating(self):
+        """
+        Tests that indexing and slicing the lazy rows matches iterating over them
+        """
+        all_customers = list(self.customers.rows)
+
+        self.assertEqual(self.customers.rows[0], all_customers[0])
+        self.assertEqual(self.customers.rows[-1], all_customers[-1])
+        self.assertEqual(self.customers.rows[0:2], all_customers[0:2])
+        self.assertEqual(len(self.customers.rows), len(all_customers))
+
+    def test_indexing_rows_out_of_range_raises_index_error(self):
+        """
+        Tests that indexing past the end of the rows raises an IndexError
+        """
+        with self.assertRaises(IndexError):
+            self.customers.rows[self.customers.count()]
+
+    def test_selecting_fields_returns_records_without_customers(self):
+        """
+        Tests that selecting fields returns plain records of only those fields
+        """
+        records = self.customers.select(['cid', 'name'], where={'cid': self.customer.id})
+        self.assertEqual(records, [(self.customer.id, self.customer.name)])
+
+        records = self.customers.select(['name'], where={'cid': self.customer.id}, row_type='dict')
+        self.assertEqual(records, [{'name': self.customer.name}])
+
+    def test_selecting_field_that_is_not_a_column_raises_value_error(self):
+        """
+        Tests that selecting a field that is not a column raises a ValueError
+        """
+        with self.assertRaises(ValueError):
+            self.customers.select(['bills'])
+
+    def test_iterating_rows_in_batches_returns_every_matching_customer(self):
+        """
+        Tests that iter_rows streams every customer matching the filters, in id order, across batches
+        """
+        vips = [self.customers.add(fake.name(), True) for _ in range(3)]
+        self.customers.add(fake.name(), False)
+
+        streamed = list(self.customers.iter_rows(batch_size=2, where={'vip': True}))
+
+        self.assertEqual([customer.id for customer in streamed][-3:], [customer.id for customer in vips])
+        self.assertTrue(all(customer.vip for customer in streamed))
+
+    def test_first_returns_lowest_id_matching_customer(self):
+        """
+        Tests that first returns the matching customer with the lowest id, or None if none match
+        """
+        name = fake.unique.name()
+        first, _ = self.customers.add(name, False), self.customers.add(name, True)
+
+        self.assertIs(self.customers.first(name=name), first)
+        self.assertIsNone(self.customers.first(name=name, vip=True, cid=first.id))
+
+    def test_exists_checks_for_matching_customer(self):
+        """
+        Tests that exists is True only if a customer matches every filter
+        """
+        self.assertTrue(self.customers.exists(cid=self.customer.id, name=self.customer.name))
+        self.assertFalse(self.customers.exists(cid=self.customer.id, name=f'{self.customer.name} not'))
+
     def test_getting_customer_by_non_existent_id_returns_none(self):
         """
         Test that getting a customer by an id that does not exist returns None
@@ -230,6 +323,15 @@ class TestCustomer(unittest.TestCase):
         """
         self.assertEqual(self.customer.id, self.customer._id)
 
+    def test_timestamps_are_loaded_as_datetimes(self):
+        """
+        Tests that created_at and updated_at are datetimes when the customer is fetched
+        """
+        retrieved_customer = self.customers.fetch('WHERE id = ?', (self.customer.id,))[0]
+
+        self.assertIsInstance(retrieved_customer.created_at, datetime)
+        self.assertIsInstance(retrieved_customer.updated_at, datetime)
+
     def test_getting_id_of_nonexistent_customer_raises_value_error(self):
         """
         Test that getting a customer's id that does not exist raises a ValueError
@@ -292,9 +394,10 @@ class TestCustomer(unittest.TestCase):
         # Assert that all customers were removed
         self.assertEqual(len(self.customers.rows), 0)
 
-    def __reset(self):
-        # Clear customers
-        self.customers.rows.clear()
+    def test_clearing_rows_raises_error(self):
+        # The rows are a view of the table, clearing them has to go through the table
+        with self.assertRaises(TypeError):
+            self.customers.rows.clear()
 
 
 if __name__ == '__main__':
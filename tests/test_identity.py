@@ -0,0 +1,69 @@
+import unittest
+from uuid import uuid4
+
+from config import test_config
+from connector import open_connection, ConnectionPool
+from models.customer import Customers
+from models.identity import IdentityMap, identity_map
+
+# Connect to the test database
+db = open_connection(test_config)
+
+# Create cursor
+cur = db.cursor()
+
+
+class TestIdentityMap(unittest.TestCase):
+    def setUp(self):
+        self.customers = Customers(cur, db)
+        self.name = f'identity {uuid4().hex[:8]}'
+        self.customer = self.customers.add(self.name, False)
+
+    def tearDown(self):
+        cur.execute('DELETE FROM customer WHERE name LIKE ?', (f'{self.name}%',))
+        db.commit()
+        db.forget_loaded()
+
+    def test_getting_same_row_twice_returns_same_object(self):
+        self.assertIs(self.customers.get(cid=self.customer.id)[0], self.customer)
+        self.assertIs(self.customers.find(self.customer.id), self.customer)
+
+    def test_deleting_row_removes_it_from_the_map(self):
+        self.customers.delete(self.customer.id)
+        self.assertNotIn(('customer', self.customer.id), identity_map(db))
+
+    def test_fetching_row_changed_elsewhere_refreshes_loaded_object(self):
+        pool = ConnectionPool(size=1, settings=test_config)
+        with pool.connection() as other:
+            other.execute('UPDATE customer SET name = ? WHERE id = ?', (f'{self.name} changed', self.customer.id))
+            other.commit()
+        pool.close()
+
+        self.assertIs(self.customers.first(cid=self.customer.id), self.customer)
+        self.assertEqual(self.customer.name, f'{self.name} changed')
+
+    def test_fetching_row_keeps_changes_not_saved_yet(self):
+        with db.transaction():
+            self.customer.vip = True
+
+            self.assertIs(self.customers.fetch('WHERE id = ?', (self.customer.id,))[0], self.customer)
+            self.assertTrue(self.customer.vip)
+
+    def test_full_map_drops_least_recently_used_row(self):
+        identity = IdentityMap(max_size=2)
+        first, second, third = self.customers.add_many([dict(name=f'{self.name} {i}', vip=False) for i in range(3)])
+
+        identity.add(first)
+        identity.add(second)
+
+        # Use the first row so the second is the least recently used
+        identity.get('customer', first.id)
+        identity.add(third)
+
+        self.assertIn(('customer', first.id), identity)
+        self.assertNotIn(('customer', second.id), identity)
+        self.assertEqual(len(identity), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from config import test_config
+from connector import open_connection
+from models.billitem import BillItems
+
+# Connect to the test database
+db = open_connection(test_config)
+
+# Create cursor
+cur = db.cursor()
+
+
+class TestIndexes(unittest.TestCase):
+    def setUp(self):
+        self.bill_items = BillItems(cur, db)
+
+    def test_declared_index_is_created_with_table(self):
+        indexes = [index[1] for index in cur.execute('PRAGMA index_list(bill_item)').fetchall()]
+        self.assertIn('bill_item_bill_id_index', indexes)
+
+    def test_getting_by_indexed_column_searches_index(self):
+        self.assertIn('USING INDEX bill_item_bill_id_index', self.bill_items.query_plan(bid=1)[0])
+
+    def test_foreign_key_without_index_is_reported_missing(self):
+        self.assertIn('created_by_staff_id', self.bill_items.missing_indexes())
+        self.assertNotIn('bill_id', self.bill_items.missing_indexes())
+
+
+if __name__ == '__main__':
+    unittest.main()
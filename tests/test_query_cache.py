@@ -0,0 +1,77 @@
+import unittest
+from uuid import uuid4
+
+from config import test_config
+from connector import open_connection
+from models.cache import QueryCache, query_cache
+from models.customer import Customers
+
+# Connect to the test database
+db = open_connection(test_config)
+
+# Create cursor
+cur = db.cursor()
+
+
+class CachedCustomers(Customers):
+    # Customers which keep their query results, like Roles
+    cache_results = True
+
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.customers = CachedCustomers(cur, db)
+        self.name = f'cached {uuid4().hex[:8]}'
+        self.customer = self.customers.add(self.name, False)
+
+    def tearDown(self):
+        cur.execute('DELETE FROM customer WHERE name LIKE ?', (f'{self.name}%',))
+        db.commit()
+        db.forget_loaded()
+
+    def test_repeated_get_is_served_from_cache(self):
+        first = self.customers.get(name=self.name)
+        self.assertIn(('customer', ('get', 'name = ?', (self.name,))), query_cache(db))
+        self.assertEqual(self.customers.get(name=self.name), first)
+
+    def test_filters_in_any_order_share_a_result(self):
+        self.customers.get(True, name=self.name, cid=self.customer.id)
+        cached = len(query_cache(db))
+        self.customers.get(True, id=self.customer.id, name=self.name)
+        self.assertEqual(len(query_cache(db)), cached)
+
+    def test_adding_row_invalidates_table(self):
+        count = self.customers.count()
+        self.customers.add(f'{self.name} another', False)
+        self.assertEqual(self.customers.count(), count + 1)
+
+    def test_changing_row_invalidates_table(self):
+        self.customers.get(name=self.name)
+        self.customer.name = f'{self.name} no longer cached'
+        self.assertNotIn(self.customer, self.customers.get(name=self.name))
+
+    def test_write_from_other_connection_invalidates_cache(self):
+        count = self.customers.count()
+
+        other = open_connection(test_config)
+        other.execute('INSERT INTO customer (name, vip) VALUES (?, 0)', (f'{self.name} elsewhere',))
+        other.commit()
+        other.close()
+
+        self.assertEqual(self.customers.count(), count + 1)
+
+    def test_customers_do_not_cache_results_unless_asked_to(self):
+        Customers(cur, db).get(name=self.name)
+        self.assertNotIn(('customer', ('get', 'name = ?', (self.name,))), query_cache(db))
+
+    def test_full_cache_drops_least_recently_used_result(self):
+        cache = QueryCache(max_size=2)
+        for query in ['first', 'second', 'third']:
+            cache.get_or_load('customer', (query,), lambda: query)
+
+        self.assertNotIn(('customer', ('first',)), cache)
+        self.assertEqual(len(cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
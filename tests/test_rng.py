@@ -0,0 +1,75 @@
+import unittest
+
+from constants import EVENT_CHANCES
+from helper import event_happens
+from rng import RandomStreams, seed
+from sampling import TruncatedNormalSampler
+
+
+class TestRandomStreams(unittest.TestCase):
+    def setUp(self):
+        self.streams = RandomStreams(1234)
+
+    def test_same_seed_draws_the_same_numbers(self):
+        other = RandomStreams(1234)
+        self.assertEqual(self.streams.randint('bookings', 0, 100, 10).tolist(),
+                         other.randint('bookings', 0, 100, 10).tolist())
+
+    def test_streams_do_not_depend_on_the_order_they_are_used(self):
+        other = RandomStreams(1234)
+        other.randint('orders', 0, 100, 50)
+        self.assertEqual(self.streams.randint('bookings', 0, 100, 10).tolist(),
+                         other.randint('bookings', 0, 100, 10).tolist())
+
+    def test_keys_give_independent_runs(self):
+        first, second = RandomStreams(1234, (1,)), RandomStreams(1234, (2,))
+        self.assertNotEqual(first.randint('bookings', 0, 10 ** 6, 10).tolist(),
+                            second.randint('bookings', 0, 10 ** 6, 10).tolist())
+
+    def test_reseed_resets_generators_in_place(self):
+        generator = self.streams.stream('bookings')
+        drawn = generator.integers(0, 10 ** 6, 10).tolist()
+        self.streams.reseed(1234)
+        self.assertIs(self.streams.stream('bookings'), generator)
+        self.assertEqual(generator.integers(0, 10 ** 6, 10).tolist(), drawn)
+
+    def test_reseed_drops_samples_drawn_ahead(self):
+        sampler = TruncatedNormalSampler(generator=self.streams.stream('sampling'))
+        self.streams.on_reseed(sampler.clear)
+        drawn = sampler.sample(0, 25, 10, 2, size=5).tolist()
+        self.streams.reseed(1234)
+        self.assertEqual(sampler.sample(0, 25, 10, 2, size=5).tolist(), drawn)
+
+    def test_randint_includes_high(self):
+        self.assertEqual(set(self.streams.randint('bookings', 1, 3, 1000).tolist()), {1, 2, 3})
+
+    def test_pick_returns_the_options_themselves(self):
+        options = [object(), object()]
+        self.assertIn(self.streams.pick('orders', options), options)
+        self.assertEqual(len(self.streams.pick('orders', options, 5)), 5)
+
+    def test_pick_follows_weights(self):
+        self.assertEqual(set(self.streams.pick('orders', ['a', 'b'], 100, weights=[1, 0])), {'a'})
+
+    def test_pick_from_empty_sequence_raises_index_error(self):
+        with self.assertRaises(IndexError):
+            self.streams.pick('orders', [])
+
+    def test_chance(self):
+        self.assertTrue(self.streams.chance('events', 100))
+        self.assertFalse(self.streams.chance('events', 0, 100).any())
+
+    def test_chance_happens_about_percent_of_the_time(self):
+        for percent in [0.5, 20, 75]:
+            rate = self.streams.chance('events', percent, 100000).mean() * 100
+            self.assertAlmostEqual(rate, percent, delta=max(percent / 10, 0.2))
+
+    def test_events_happen_at_their_chance(self):
+        seed(1234)
+        for event in ['booking_has_comment', 'customer_wants_another_round']:
+            rate = sum(event_happens(event) for _ in range(10000)) / 100
+            self.assertAlmostEqual(rate, EVENT_CHANCES[event], delta=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
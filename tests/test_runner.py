@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from handlers.runner import copy_database, merge_databases, run_days
+
+
+class TestMergeDatabases(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.template = self.path('template.db')
+
+        # The template has one bill every worker copies
+        db = sqlite3.connect(self.template)
+        db.execute('CREATE TABLE bill (id INTEGER PRIMARY KEY, covers INTEGER)')
+        db.execute('CREATE TABLE action (id INTEGER PRIMARY KEY, bill_id INTEGER, approval_id INTEGER, type TEXT)')
+        db.execute('INSERT INTO bill (covers) VALUES (1)')
+        db.commit()
+        db.close()
+
+        self.output = self.path('output.db')
+        copy_database(self.template, self.output)
+
+        # Each worker adds a bill with an action, and an action on the template's bill
+        self.workers = []
+        for i in range(2):
+            worker = self.path(f'worker_{i}.db')
+            copy_database(self.template, worker)
+
+            db = sqlite3.connect(worker)
+            bill_id = db.execute('INSERT INTO bill (covers) VALUES (?)', (i + 2,)).lastrowid
+            db.execute("INSERT INTO action (bill_id, approval_id, type) VALUES (?, 0, 'create')", (bill_id,))
+            db.execute("INSERT INTO action (bill_id, approval_id, type) VALUES (1, 0, 'payment')")
+            db.commit()
+            db.close()
+
+            self.workers.append(worker)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def merge(self):
+        return merge_databases(self.output, self.workers, {'bill': 1, 'action': 0})
+
+    def test_rows_after_the_template_are_merged(self):
+        merged = self.merge()
+        self.assertEqual(merged['bill'], 2)
+        self.assertEqual(merged['action'], 4)
+
+    def test_ids_do_not_collide_and_references_follow_them(self):
+        self.merge()
+
+        db = sqlite3.connect(self.output)
+        rows = db.execute('''
+            SELECT bill.covers, action.type, action.approval_id FROM action
+            JOIN bill ON bill.id = action.bill_id
+            ORDER BY action.id
+        ''').fetchall()
+        db.close()
+
+        self.assertEqual(rows, [(2, 'create', 0), (1, 'payment', 0), (3, 'create', 0), (1, 'payment', 0)])
+
+    def test_missing_tables_are_created(self):
+        db = sqlite3.connect(self.workers[0])
+        db.execute('CREATE TABLE shift (id INTEGER PRIMARY KEY, staff_id INTEGER, approval_id INTEGER)')
+        db.execute('INSERT INTO shift (staff_id) VALUES (1)')
+        db.commit()
+        db.close()
+
+        self.assertEqual(self.merge()['shift'], 1)
+
+
+def simulate_bills(staff_members, customers, actions, bills, roles, date):
+    """
+    Stands in for simulate_day, adds a few bills drawn from the day's streams
+    """
+    from rng import streams
+
+    customer_ids = [customer_id for customer_id, in customers.select(['id'])]
+
+    # Each day starts from the template, so no day sees the bills of another
+    covers = bills.count() + date.day
+
+    for _ in range(streams.randint('runner test', 1, 5)):
+        bills.add(customer_id=streams.pick('runner test', customer_ids), covers=covers)
+
+
+class TestRunDays(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.dates = [datetime(2024, 3, 2), datetime(2024, 3, 1)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_days(self, name, workers):
+        output = os.path.join(self.directory.name, name)
+        merged = run_days(self.dates, output, workers, seed=1234, simulate=simulate_bills)
+
+        # Timestamps are left out, the rows are added at the time the test runs
+        db = sqlite3.connect(output)
+        bills = db.execute('SELECT id, customer_id, covers FROM bill ORDER BY id').fetchall()
+        db.close()
+
+        return merged, bills
+
+    def test_same_seed_simulates_same_days_whatever_the_workers(self):
+        merged, bills = self.run_days('parallel.db', 2)
+
+        self.assertGreater(merged['bill'], 0)
+        self.assertEqual(self.run_days('serial.db', 1), (merged, bills))
+
+    def test_days_are_simulated_apart_and_merged_in_date_order(self):
+        merged, bills = self.run_days('output.db', 2)
+        covers = [covers for _, _, covers in bills[-merged['bill']:]]
+
+        # The template has no bills, so each day's bills have the day of the month as their covers
+        self.assertEqual(covers, sorted(covers))
+        self.assertEqual(set(covers), {1, 2})
+
+if __name__ == '__main__':
+    unittest.main()
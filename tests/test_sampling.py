@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from sampling import TruncatedNormalSampler
+
+
+class TestTruncatedNormalSampler(unittest.TestCase):
+    def setUp(self):
+        self.sampler = TruncatedNormalSampler(buffer_size=64, generator=np.random.default_rng(0))
+
+    def test_samples_are_in_range(self):
+        samples = self.sampler.sample(0, 15, 4, 2, size=1000)
+        self.assertEqual(samples.shape, (1000,))
+        self.assertTrue(((samples >= 0) & (samples <= 15)).all())
+
+    def test_samples_are_not_piled_up_at_the_bounds(self):
+        # Clipping would put about 2% of the samples exactly on 0
+        samples = self.sampler.sample(0, 15, 4, 2, size=1000)
+        self.assertFalse((samples == 0).any())
+
+    def test_mean_of_untruncated_range_is_the_mean(self):
+        samples = self.sampler.sample(50, 90, 70, 5, size=5000)
+        self.assertAlmostEqual(samples.mean(), 70, delta=0.5)
+
+    def test_range_far_in_the_tail_uses_inverse_cdf(self):
+        samples = self.sampler.sample(10, 11, 0, 1, size=100)
+        self.assertTrue(((samples >= 10) & (samples <= 11)).all())
+
+    def test_single_draws_come_from_the_buffer(self):
+        first = self.sampler.sample(0, 25, 10, 2)
+        samples, position = self.sampler.buffers[(0, 25, 10, 2)]
+        self.assertEqual(first, samples[0])
+        self.assertEqual(position, 1)
+
+    def test_buffer_is_refilled_when_empty(self):
+        draws = [self.sampler.sample(0, 25, 10, 2) for _ in range(100)]
+        self.assertEqual(len(set(draws)), 100)
+
+    def test_empty_range_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.sampler.sample(10, 10, 10, 2)
+
+    def test_non_positive_std_dev_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.sampler.sample(0, 10, 5, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
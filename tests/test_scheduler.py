@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timedelta
+
+from handlers.clock import SimulatedClock
+from handlers.scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimulatedClock(datetime(2023, 1, 2, 12, 0, 30))
+        self.scheduler = Scheduler(self.clock)
+        self.handled = []
+        self.scheduler.on('test', lambda event: self.handled.append((self.clock.now(), event.booking)))
+
+    def test_clock_drops_seconds(self):
+        self.assertEqual(self.clock.now(), datetime(2023, 1, 2, 12, 0))
+
+    def test_clock_can_not_go_back(self):
+        with self.assertRaises(ValueError):
+            self.clock.advance_to(datetime(2023, 1, 2, 11, 59))
+
+    def test_events_are_handled_in_time_order(self):
+        self.scheduler.schedule('test', datetime(2023, 1, 2, 13, 0), 'second')
+        self.scheduler.schedule('test', datetime(2023, 1, 2, 12, 30), 'first')
+        self.scheduler.run()
+        self.assertEqual(self.handled, [(datetime(2023, 1, 2, 12, 30), 'first'),
+                                        (datetime(2023, 1, 2, 13, 0), 'second')])
+
+    def test_events_at_the_same_minute_are_handled_in_the_order_scheduled(self):
+        for name in ['first', 'second', 'third']:
+            self.scheduler.schedule('test', datetime(2023, 1, 2, 12, 15, 45), name)
+        self.scheduler.run()
+        self.assertEqual([name for _, name in self.handled], ['first', 'second', 'third'])
+
+    def test_handlers_can_schedule_events_after_the_current_time(self):
+        def handle(event):
+            self.handled.append(self.clock.now())
+            if len(self.handled) < 3:
+                self.scheduler.schedule('repeat', timedelta(minutes=10))
+
+        self.scheduler.on('repeat', handle)
+        self.scheduler.schedule('repeat', timedelta(minutes=0))
+        self.assertEqual(self.scheduler.run(), 3)
+        self.assertEqual(self.handled, [datetime(2023, 1, 2, 12, 0), datetime(2023, 1, 2, 12, 10),
+                                        datetime(2023, 1, 2, 12, 20)])
+
+    def test_events_in_the_past_happen_now(self):
+        self.clock.advance_to(datetime(2023, 1, 2, 14, 0))
+        event = self.scheduler.schedule('test', datetime(2023, 1, 2, 13, 0))
+        self.assertEqual(event.time, datetime(2023, 1, 2, 14, 0))
+
+    def test_run_until_leaves_later_events(self):
+        self.scheduler.schedule('test', datetime(2023, 1, 2, 12, 30), 'first')
+        self.scheduler.schedule('test', datetime(2023, 1, 2, 23, 30), 'second')
+        self.assertEqual(self.scheduler.run(until=datetime(2023, 1, 2, 23, 0)), 1)
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertEqual(self.clock.now(), datetime(2023, 1, 2, 12, 30))
+
+    def test_event_without_handler_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.scheduler.schedule('unknown', timedelta(minutes=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from connector import connect, open_connection
+from models.customer import Customers
+from models.schema import schema
+
+# Connect to db
+db = connect()
+
+# Create cursor
+cur = db.cursor()
+
+
+class TestSchema(unittest.TestCase):
+    def setUp(self):
+        self.customers = Customers(cur, db)
+
+    def test_columns_are_read_from_table(self):
+        self.assertEqual(self.customers.columns, ['id', 'name', 'vip', 'created_at', 'updated_at'])
+
+    def test_table_created_by_other_connection_is_found(self):
+        other = open_connection()
+        other.execute('CREATE TABLE IF NOT EXISTS schema_test (id INTEGER PRIMARY KEY)')
+        other.commit()
+
+        self.assertTrue(schema(db).table_exists('schema_test'))
+
+        other.execute('DROP TABLE schema_test')
+        other.commit()
+        other.close()
+
+    def test_getting_by_unknown_filter_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.customers.get(nickname='Unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
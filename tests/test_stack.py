@@ -0,0 +1,73 @@
+import unittest
+
+from handlers.stack import PriorityQueue
+
+
+class TestPriorityQueue(unittest.TestCase):
+    def setUp(self):
+        self.queue = PriorityQueue(max_size=3)
+
+    def test_pop_returns_lowest_priority_first(self):
+        self.queue.push('regular', 2)
+        self.queue.push('vip', 1)
+        self.assertEqual(self.queue.pop(), 'vip')
+
+    def test_equal_priorities_pop_in_order_pushed(self):
+        for item in ['first', 'second', 'third']:
+            self.queue.push(item, 1)
+        self.assertEqual([self.queue.pop() for _ in range(3)], ['first', 'second', 'third'])
+
+    def test_removed_item_is_not_popped(self):
+        self.queue.push('first', 1)
+        self.queue.push('second', 2)
+        self.queue.remove('first')
+        self.assertEqual(len(self.queue), 1)
+        self.assertEqual(self.queue.pop(), 'second')
+
+    def test_removing_equal_but_other_item_raises_value_error(self):
+        self.queue.push(['first'], 1)
+        with self.assertRaises(ValueError):
+            self.queue.remove(['first'])
+        self.assertEqual(len(self.queue), 1)
+
+    def test_removing_item_not_in_queue_raises_value_error(self):
+        self.queue.push('first', 1)
+        with self.assertRaises(ValueError):
+            self.queue.remove('second')
+
+    def test_decreasing_key_of_equal_but_other_item_raises_value_error(self):
+        self.queue.push(['first'], 1)
+        with self.assertRaises(ValueError):
+            self.queue.decrease_key(['first'], 0)
+        self.assertEqual(self.queue.peek(), (['first'], 1))
+
+    def test_decrease_key_moves_item_forward(self):
+        self.queue.push('first', 1)
+        self.queue.push('second', 2)
+        self.queue.decrease_key('second', 0)
+        self.assertEqual(self.queue.peek(), ('second', 0))
+
+    def test_increasing_priority_with_decrease_key_raises_value_error(self):
+        self.queue.push('first', 1)
+        with self.assertRaises(ValueError):
+            self.queue.decrease_key('first', 2)
+
+    def test_pushing_existing_item_moves_it_without_growing_queue(self):
+        self.queue.push('first', 1)
+        self.queue.push('second', 2)
+        self.queue.push('first', 2)
+        self.assertEqual(self.queue.queue, [('second', 2), ('first', 2)])
+
+    def test_pushing_to_full_queue_raises_value_error(self):
+        for item in ['first', 'second', 'third']:
+            self.queue.push(item, 1)
+        with self.assertRaises(ValueError):
+            self.queue.push('fourth', 1)
+
+    def test_popping_empty_queue_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            self.queue.pop()
+
+
+if __name__ == '__main__':
+    unittest.main()
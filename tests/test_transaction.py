@@ -0,0 +1,110 @@
+import unittest
+from uuid import uuid4
+
+from config import test_config
+from connector import open_connection
+from models.customer import Customers
+
+# Connect to the test database
+db = open_connection(test_config)
+
+# Create cursor
+cur = db.cursor()
+
+
+class TestTransaction(unittest.TestCase):
+    def setUp(self):
+        self.customers = Customers(cur, db)
+        self.name = f'transaction {uuid4().hex[:8]}'
+
+    def tearDown(self):
+        cur.execute('DELETE FROM customer WHERE name LIKE ?', (f'{self.name}%',))
+        db.commit()
+        db.forget_loaded()
+
+    def test_writes_in_transaction_are_committed_together(self):
+        with db.transaction():
+            customer = self.customers.add(f'{self.name} committed', False)
+            customer.vip = True
+
+            # Nothing is committed until the transaction ends
+            self.assertTrue(db.in_transaction)
+
+        self.assertFalse(db.in_transaction)
+        self.assertEqual(cur.execute('SELECT vip FROM customer WHERE id = ?', (customer.id,)).fetchone(), (1,))
+
+    def test_error_in_transaction_rolls_back_writes(self):
+        count = self.customers.count()
+
+        with self.assertRaises(ValueError):
+            with db.transaction():
+                self.customers.add(f'{self.name} rolled back', False)
+                raise ValueError
+
+        self.assertEqual(self.customers.count(), count)
+
+    def test_error_in_nested_transaction_only_rolls_back_savepoint(self):
+        with db.transaction():
+            kept = self.customers.add(f'{self.name} kept', False)
+
+            with self.assertRaises(ValueError):
+                with db.transaction():
+                    self.customers.add(f'{self.name} dropped', False)
+                    raise ValueError
+
+        self.assertIsNotNone(self.customers.find(kept.id))
+        self.assertEqual(self.customers.get(name=f'{self.name} dropped'), [])
+
+    def test_changes_in_transaction_are_saved_once_when_it_ends(self):
+        customer = self.customers.add(f'{self.name} unchanged', False)
+
+        with db.transaction():
+            customer.name = f'{self.name} changed once'
+            customer.name = f'{self.name} changed twice'
+            customer.vip = True
+
+            # The changes are held on the row until the transaction ends
+            self.assertEqual(customer.dirty, {'name': f'{self.name} changed twice', 'vip': True})
+            self.assertEqual(cur.execute('SELECT name FROM customer WHERE id = ?', (customer.id,)).fetchone(),
+                             (f'{self.name} unchanged',))
+
+        self.assertEqual(customer.dirty, {})
+        self.assertEqual(cur.execute('SELECT name, vip FROM customer WHERE id = ?', (customer.id,)).fetchone(),
+                         (f'{self.name} changed twice', 1))
+
+    def test_changes_outside_transaction_are_saved_straight_away(self):
+        customer = self.customers.add(f'{self.name} unchanged', False)
+        customer.name = f'{self.name} changed'
+
+        self.assertEqual(customer.dirty, {})
+        self.assertEqual(cur.execute('SELECT name FROM customer WHERE id = ?', (customer.id,)).fetchone(),
+                         (f'{self.name} changed',))
+
+    def test_queries_in_transaction_see_changes_not_saved_yet(self):
+        customer = self.customers.add(f'{self.name} before flush', False)
+        name = f'{self.name} after flush'
+
+        with db.transaction():
+            customer.name = name
+
+            self.assertEqual(self.customers.first(name=name), customer)
+            self.assertTrue(self.customers.exists(name=name))
+            self.assertNotIn(customer, self.customers.get(name=f'{self.name} before flush'))
+            self.assertEqual(customer.dirty, {})
+    def test_rolled_back_changes_are_put_back_on_the_row(self):
+        customer = self.customers.add(f'{self.name} kept name', False)
+
+        with self.assertRaises(ValueError):
+            with db.transaction():
+                customer.name = f'{self.name} rolled back name'
+
+                # Saved inside the transaction, then rolled back with it
+                self.customers.first(name=f'{self.name} rolled back name')
+                raise ValueError
+
+        self.assertEqual(customer.name, f'{self.name} kept name')
+        self.assertEqual(customer.dirty, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
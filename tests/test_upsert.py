@@ -0,0 +1,95 @@
+import unittest
+from sqlite3 import IntegrityError
+from uuid import uuid4
+
+from config import test_config
+from connector import open_connection
+from models.customer import Customers
+from models.menu import Menus
+from models.role import Roles
+
+# Connect to the test database
+db = open_connection(test_config)
+
+# Create cursor
+cur = db.cursor()
+
+
+class TestUpsert(unittest.TestCase):
+    def setUp(self):
+        self.menus = Menus(cur, db)
+        self.name = f'upsert {uuid4().hex[:8]}'
+
+    def tearDown(self):
+        cur.execute('DELETE FROM menu WHERE name LIKE ?', (f'{self.name}%',))
+        db.commit()
+        db.forget_loaded()
+
+    def test_upserting_same_records_twice_adds_them_once(self):
+        records = [dict(name=self.name, active=True, max_size=40)]
+        count = self.menus.count()
+
+        self.assertEqual(self.menus.upsert_many(records), 1)
+        self.assertEqual(self.menus.upsert_many(records), 0)
+        self.assertEqual(self.menus.count(), count + 1)
+
+    def test_upserting_existing_record_only_updates_given_columns(self):
+        self.menus.upsert_many([dict(name=self.name, active=True, max_size=40)])
+        self.menus.upsert_many([dict(name=self.name, active=False, max_size=10)], update=['max_size'])
+
+        menu = self.menus.first(name=self.name)
+        self.assertEqual((menu.active, menu.max_size), (True, 10))
+
+    def test_adding_existing_natural_key_raises_integrity_error(self):
+        self.menus.add(self.name, True, 40)
+
+        with self.assertRaises(IntegrityError):
+            self.menus.add(self.name, True, 40)
+
+    def test_upserting_table_without_unique_key_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            Customers(cur, db).upsert_many([dict(name=self.name, vip=False)])
+
+    def test_creating_roles_table_does_not_add_roles(self):
+        Roles(cur, db)
+
+        statements = []
+        db.set_trace_callback(statements.append)
+        try:
+            Roles(cur, db)
+        finally:
+            db.set_trace_callback(None)
+
+        self.assertFalse([sql for sql in statements if sql.strip().startswith('INSERT')])
+
+    def test_adding_initial_roles_twice_adds_them_once(self):
+        roles = Roles(cur, db)
+        roles.add_initial_roles()
+        count = roles.count()
+        roles.add_initial_roles()
+
+        self.assertEqual(roles.count(), count)
+        self.assertIsNotNone(roles.first(name='server'))
+
+    def test_upserting_without_unique_index_matches_rows_by_key(self):
+        # Rows which shared the key before it was declared stop the unique index being created
+        cur.execute('DROP INDEX menu_name_unique')
+        try:
+            self.menus.add(self.name, True, 40)
+            cur.execute('INSERT INTO menu (name, active, max_size) VALUES (?, ?, ?)', (self.name, True, 40))
+            db.commit()
+            count = self.menus.count()
+
+            self.assertEqual(self.menus.upsert_many([dict(name=self.name, active=True, max_size=10)],
+                                                    update=['max_size']), 2)
+            self.assertEqual(self.menus.upsert_many([dict(name=f'{self.name} new', active=True, max_size=10)]), 1)
+            self.assertEqual(self.menus.count(), count + 1)
+            self.assertEqual({menu.max_size for menu in self.menus.get(name=self.name)}, {10})
+        finally:
+            cur.execute('DELETE FROM menu WHERE name LIKE ?', (f'{self.name}%',))
+            self.menus.create_indexes()
+            db.commit()
+
+
+if __name__ == '__main__':
+    unittest.main()